@@ -0,0 +1,386 @@
+"""
+Estatísticas agregadas de um corpus de arquivos: contagens por tipo de
+token, identificadores e literais mais frequentes, proporção de comentários
+e distribuições de tamanho de token e de linha.
+
+Os arquivos são tokenizados como bytes e contados direto das tuplas
+(tipo, início, fim) do engine, sem construir objetos Token; cada worker
+produz um CorpusStats por arquivo e o processo principal os junta com
+merge().
+
+Uso:
+    python -m src.main stats exemplos/ "outros/**/*.txt" --top 20
+"""
+
+import heapq
+import mmap
+import os
+import time
+from array import array
+from functools import partial
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from src.lexer import (Lexer, LexerError, LexerSpec, LineIndex, TokenType, TOKEN_TYPE_IDS,
+                       TOKEN_TYPES)
+
+DEFAULT_TOP = 10
+
+# Limite de valores distintos guardados por TopK é capacity_factor * k
+DEFAULT_CAPACITY_FACTOR = 20
+
+_LITERAL_TYPES = (TokenType.NUMBER, TokenType.STRING_LITERAL, TokenType.BOOLEAN_LITERAL)
+
+
+class TopK:
+    """
+    Contador de frequências com memória limitada.
+
+    Guarda no máximo 2 * capacity valores; ao passar disso, mantém só os
+    capacity mais frequentes. Valores descartados perdem a contagem, então
+    as contagens são limites inferiores e error é o maior valor descartado:
+    um valor fora da tabela ocorreu no máximo error vezes por descarte.
+    Com capacity bem maior que o k consultado, o topo é exato na prática.
+    """
+
+    __slots__ = ('capacity', 'counts', 'error')
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[Hashable, int] = {}
+        self.error = 0
+
+    def add(self, value: Hashable, count: int = 1):
+        counts = self.counts
+        counts[value] = counts.get(value, 0) + count
+        if len(counts) > 2 * self.capacity:
+            self._prune()
+
+    def merge(self, other: "TopK"):
+        counts = self.counts
+        for value, count in other.counts.items():
+            counts[value] = counts.get(value, 0) + count
+        self.error += other.error
+        if len(counts) > 2 * self.capacity:
+            self._prune()
+
+    def most_common(self, k: int) -> List[Tuple[Hashable, int]]:
+        return heapq.nlargest(k, self.counts.items(), key=lambda item: item[1])
+
+    def _prune(self):
+        ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        self.error = max(self.error, ranked[self.capacity][1])
+        self.counts = dict(ranked[:self.capacity])
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+class Histogram:
+    """
+    Distribuição de inteiros não negativos em faixas de potências de 2: a
+    faixa b contém os valores com b bits (0; 1; 2-3; 4-7; ...).
+    """
+
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    BUCKETS = 64
+
+    def __init__(self):
+        self.buckets = array('Q', bytes(8 * self.BUCKETS))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value: int):
+        self.buckets[value.bit_length()] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "Histogram"):
+        buckets = self.buckets
+        for b, n in enumerate(other.buckets):
+            buckets[b] += n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction: float) -> int:
+        """Limite superior da faixa que contém o percentil"""
+        target = fraction * self.count
+        seen = 0
+        for b, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return min((1 << b) - 1, self.max)
+        return 0
+
+    def ranges(self) -> List[Tuple[int, int, int]]:
+        """(mínimo, máximo, quantidade) de cada faixa não vazia"""
+        return [(1 << (b - 1) if b else 0, (1 << b) - 1, n)
+                for b, n in enumerate(self.buckets) if n]
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'max': self.max,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'p99': self.percentile(0.99),
+            'buckets': [{'min': low, 'max': high, 'count': n} for low, high, n in self.ranges()],
+        }
+
+
+class CorpusStats:
+    """Métricas de um ou mais arquivos, combináveis com merge()"""
+
+    def __init__(self, capacity: int = DEFAULT_TOP * DEFAULT_CAPACITY_FACTOR):
+        self.files = 0
+        self.failed = 0
+        self.errors: List[Tuple[str, str]] = []
+        self.size = 0
+        self.lines = 0
+        self.seconds = 0.0
+        self.type_counts = array('Q', bytes(8 * len(TOKEN_TYPES)))
+        self.identifiers = TopK(capacity)
+        self.literals = TopK(capacity)
+        self.comment_bytes = 0
+        self.code_bytes = 0
+        self.token_lengths = Histogram()
+        self.line_lengths = Histogram()
+
+    @property
+    def tokens(self) -> int:
+        """Tokens emitidos com skip_whitespace (comentários incluídos), sem os EOF"""
+        return sum(self.type_counts) - self.count(TokenType.WHITESPACE) - self.count(TokenType.EOF)
+
+    def count(self, token_type: TokenType) -> int:
+        return self.type_counts[TOKEN_TYPE_IDS[token_type]]
+
+    @property
+    def comment_ratio(self) -> float:
+        """Bytes em comentários por byte de código (tokens que não são espaço nem comentário)"""
+        return self.comment_bytes / self.code_bytes if self.code_bytes else 0.0
+
+    def merge(self, other: "CorpusStats"):
+        self.files += other.files
+        self.failed += other.failed
+        self.errors.extend(other.errors)
+        self.size += other.size
+        self.lines += other.lines
+        counts = self.type_counts
+        for type_id, n in enumerate(other.type_counts):
+            counts[type_id] += n
+        self.identifiers.merge(other.identifiers)
+        self.literals.merge(other.literals)
+        self.comment_bytes += other.comment_bytes
+        self.code_bytes += other.code_bytes
+        self.token_lengths.merge(other.token_lengths)
+        self.line_lengths.merge(other.line_lengths)
+
+    def add_source(self, data, lexer: Lexer):
+        """Conta os tokens e as linhas de data (bytes-like), tokenizado por lexer"""
+        counts = self.type_counts
+        ids = TOKEN_TYPE_IDS
+        identifier = ids[TokenType.IDENTIFIER]
+        literals = frozenset(ids[token_type] for token_type in _LITERAL_TYPES)
+        comment = ids[TokenType.COMMENT]
+        whitespace = ids[TokenType.WHITESPACE]
+        add_identifier = self.identifiers.add
+        add_literal = self.literals.add
+        buckets = self.token_lengths.buckets
+        comment_bytes = code_bytes = total = longest = 0
+
+        for token_type, start, end in lexer.iter_raw(False, False):
+            type_id = ids[token_type]
+            counts[type_id] += 1
+            if type_id == whitespace:
+                continue
+            length = end - start
+            if type_id == comment:
+                comment_bytes += length
+            else:
+                code_bytes += length
+                if type_id == identifier:
+                    add_identifier(bytes(data[start:end]))
+                elif type_id in literals:
+                    add_literal(bytes(data[start:end]))
+            buckets[length.bit_length()] += 1
+            total += length
+            if length > longest:
+                longest = length
+        counts[ids[TokenType.EOF]] += 1
+
+        # Só os tokens que não são espaço entram na distribuição de tamanhos
+        lengths = self.token_lengths
+        lengths.count = sum(buckets)
+        lengths.total += total
+        lengths.max = max(lengths.max, longest)
+        self.comment_bytes += comment_bytes
+        self.code_bytes += code_bytes
+
+        starts = LineIndex(data).starts
+        add_line = self.line_lengths.add
+        for start, end in zip(starts, starts[1:]):
+            add_line(end - start - 1)
+        if starts[-1] < len(data):
+            add_line(len(data) - starts[-1])
+        self.lines += len(starts)
+        self.size += len(data)
+
+    def to_dict(self, top: int = DEFAULT_TOP) -> Dict:
+        return {
+            'files': self.files,
+            'failed': self.failed,
+            'size': self.size,
+            'lines': self.lines,
+            'tokens': self.tokens,
+            'seconds': self.seconds,
+            'types': {token_type.value: self.count(token_type) for token_type in TOKEN_TYPES
+                      if self.count(token_type)},
+            'identifiers': _frequencies(self.identifiers, top),
+            'literals': _frequencies(self.literals, top),
+            'comment_bytes': self.comment_bytes,
+            'code_bytes': self.code_bytes,
+            'comment_ratio': self.comment_ratio,
+            'token_lengths': self.token_lengths.to_dict(),
+            'line_lengths': self.line_lengths.to_dict(),
+            'errors': [{'path': path, 'error': error} for path, error in sorted(self.errors)],
+        }
+
+
+def _decoded(items: List[Tuple[bytes, int]]) -> List[Tuple[str, int]]:
+    return [(str(value, 'utf-8', 'replace'), count) for value, count in items]
+
+
+def _frequencies(table: TopK, top: int) -> List[Dict]:
+    return [{'value': value, 'count': count} for value, count in _decoded(table.most_common(top))]
+
+
+def analyze_file(path: str, spec: Optional[LexerSpec] = None, recover: bool = False,
+                 capacity: int = DEFAULT_TOP * DEFAULT_CAPACITY_FACTOR) -> CorpusStats:
+    """Métricas de um arquivo (executado nos workers)"""
+    stats = CorpusStats(capacity)
+    stats.files = 1
+    start = time.perf_counter()
+    try:
+        with open(path, 'rb') as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Arquivos vazios não podem ser mapeados
+                data = b''
+            try:
+                source = data
+                if data.find(b'\r') != -1:
+                    # Mesma normalização de quebras de linha do modo texto
+                    source = bytes(data).replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+                stats.add_source(source, Lexer(source, recover=recover, spec=spec))
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+    except LexerError as e:
+        stats = CorpusStats(capacity)
+        stats.files = stats.failed = 1
+        stats.errors.append((path, str(e)))
+    except OSError as e:
+        stats = CorpusStats(capacity)
+        stats.files = stats.failed = 1
+        stats.errors.append((path, f"Erro ao ler arquivo: {e}"))
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def analyze_corpus(paths: Iterable[str], jobs: Optional[int] = None,
+                   spec: Optional[LexerSpec] = None, recover: bool = False,
+                   top: int = DEFAULT_TOP,
+                   capacity_factor: int = DEFAULT_CAPACITY_FACTOR) -> CorpusStats:
+    """
+    Métricas agregadas de todos os arquivos, calculadas em paralelo.
+
+    Args:
+        paths: Caminhos dos arquivos
+        jobs: Número de processos (padrão: número de CPUs); 1 roda no
+            próprio processo, sem pool
+        top: Quantos identificadores e literais serão consultados; as
+            tabelas guardam até 2 * top * capacity_factor valores distintos
+        recover: Conta trechos não reconhecidos como ERROR em vez de
+            descartar o arquivo
+    """
+    capacity = max(1, top) * capacity_factor
+    worker = partial(analyze_file, spec=spec, recover=recover, capacity=capacity)
+    jobs = jobs or os.cpu_count() or 1
+    total = CorpusStats(capacity)
+    start = time.perf_counter()
+
+    if jobs == 1:
+        for stats in map(worker, paths):
+            total.merge(stats)
+    else:
+        from multiprocessing import Pool
+        paths = list(paths)
+        chunksize = max(1, min(64, len(paths) // (jobs * 8)))
+        with Pool(jobs) as pool:
+            for stats in pool.imap_unordered(worker, paths, chunksize):
+                total.merge(stats)
+
+    total.seconds = time.perf_counter() - start
+    return total
+
+
+def format_report(stats: CorpusStats, top: int = DEFAULT_TOP) -> List[str]:
+    """Relatório das métricas para a CLI"""
+    seconds = stats.seconds or 1e-9
+    tokens = stats.tokens
+    lines = [
+        "Estatísticas do corpus:",
+        f"  Arquivos analisados: {stats.files}",
+        f"  Arquivos com erro: {stats.failed}",
+        f"  Tamanho: {stats.size} bytes",
+        f"  Linhas processadas: {stats.lines}",
+        f"  Total de tokens: {tokens}",
+        f"  Tempo total: {stats.seconds:.3f}s ({stats.size / seconds / 1e6:.2f} MB/s)",
+        "",
+        "Tokens por tipo:",
+    ]
+    by_type = sorted(((stats.count(t), t) for t in TOKEN_TYPES
+                      if stats.count(t) and t not in (TokenType.WHITESPACE, TokenType.EOF)),
+                     key=lambda item: -item[0])
+    for n, token_type in by_type:
+        lines.append(f"  {token_type.value:<20} {n:>10} {n / (tokens or 1):7.2%}")
+
+    for title, table in (("Identificadores mais frequentes", stats.identifiers),
+                         ("Literais mais frequentes", stats.literals)):
+        lines.append("")
+        lines.append(f"{title}:")
+        for value, n in _decoded(table.most_common(top)):
+            lines.append(f"  {value!r:<30} {n:>10}")
+        if table.error:
+            lines.append(f"  (contagens aproximadas: erro máximo {table.error})")
+
+    lines.append("")
+    lines.append(f"Comentários: {stats.comment_bytes} bytes, {stats.code_bytes} bytes de código "
+                 f"(razão {stats.comment_ratio:.3f})")
+
+    for title, histogram in (("Tamanho dos tokens (bytes)", stats.token_lengths),
+                             ("Tamanho das linhas (bytes)", stats.line_lengths)):
+        lines.append("")
+        lines.append(f"{title}: média {histogram.mean:.1f}, p50 ≤ {histogram.percentile(0.5)}, "
+                     f"p90 ≤ {histogram.percentile(0.9)}, p99 ≤ {histogram.percentile(0.99)}, "
+                     f"máximo {histogram.max}")
+        for low, high, n in histogram.ranges():
+            label = str(low) if low == high else f"{low}-{high}"
+            lines.append(f"  {label:>15} {n:>10} {n / histogram.count:7.2%}")
+
+    if stats.errors:
+        lines.append("")
+        lines.append("Erros por arquivo:")
+        for path, error in sorted(stats.errors):
+            lines.append(f"  {path}: {error}")
+    return lines
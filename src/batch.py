@@ -0,0 +1,186 @@
+"""
+Análise de vários arquivos em paralelo com um pool de processos
+"""
+
+import glob
+import os
+import time
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from src.cache import DEFAULT_MAX_SIZE, TokenCache
+from src.lexer import LexerError, LexerSpec, iter_file_tokens
+
+
+@dataclass
+class FileResult:
+    """Resultado da análise léxica de um arquivo"""
+    path: str
+    tokens: int = 0
+    lines: int = 0
+    size: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+    # True/False se o resultado veio ou não do cache; None sem cache
+    cached: Optional[bool] = None
+
+
+@dataclass
+class BatchSummary:
+    """Estatísticas agregadas de um lote de arquivos"""
+    files: int = 0
+    tokens: int = 0
+    lines: int = 0
+    size: int = 0
+    seconds: float = 0.0
+    failed: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    def add(self, result: FileResult):
+        self.files += 1
+        self.tokens += result.tokens
+        self.lines += result.lines
+        self.size += result.size
+        if result.error is not None:
+            self.failed += 1
+        if result.cached is not None:
+            if result.cached:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+
+def is_batch_input(value: str) -> bool:
+    """Indica se um argumento da CLI é um diretório ou um glob com resultados"""
+    if os.path.isdir(value):
+        return True
+    return glob.has_magic(value) and any(True for _ in glob.iglob(value, recursive=True))
+
+
+def expand_paths(inputs: Iterable[str]) -> Iterator[str]:
+    """
+    Expande arquivos, diretórios (recursivamente) e globs em uma sequência de
+    caminhos de arquivo, sem repetições e em ordem estável.
+    """
+    seen = set()
+    for value in inputs:
+        if os.path.isdir(value):
+            candidates = (
+                str(path) for path in sorted(Path(value).rglob('*'))
+                if not any(part.startswith('.') for part in path.relative_to(value).parts)
+            )
+        elif glob.has_magic(value):
+            candidates = sorted(glob.iglob(value, recursive=True))
+        else:
+            candidates = [value]
+
+        for path in candidates:
+            if path not in seen and (os.path.isfile(path) or path == value):
+                seen.add(path)
+                yield path
+
+
+def lex_file(path: str, engine: str = 'master', skip_whitespace: bool = True,
+             skip_comments: bool = True, cache_dir: Optional[str] = None,
+             cache_size: int = DEFAULT_MAX_SIZE, spec: Optional[LexerSpec] = None) -> FileResult:
+    """Tokeniza um arquivo e resume o resultado (executado nos workers)"""
+    result = FileResult(path)
+    cache = TokenCache.open(cache_dir, cache_size) if cache_dir is not None else None
+    hits = cache.hits if cache is not None else 0
+    start = time.perf_counter()
+    try:
+        result.size = os.path.getsize(path)
+        count = 0
+        for token in iter_file_tokens(path, engine, skip_whitespace=skip_whitespace,
+                                      skip_comments=skip_comments, cache=cache, spec=spec):
+            count += 1
+        # O último token é o EOF, que está na última linha
+        result.tokens = count - 1
+        result.lines = token.line
+    except LexerError as e:
+        result.error = str(e)
+    except (OSError, UnicodeDecodeError) as e:
+        result.error = f"Erro ao ler arquivo: {e}"
+    result.seconds = time.perf_counter() - start
+    if cache is not None:
+        result.cached = cache.hits > hits
+    return result
+
+
+def run_batch(paths: Iterable[str], jobs: Optional[int] = None, engine: str = 'master',
+              skip_whitespace: bool = True, skip_comments: bool = True,
+              on_result: Optional[Callable[[FileResult], None]] = None,
+              cache_dir: Optional[str] = None,
+              cache_size: int = DEFAULT_MAX_SIZE,
+              spec: Optional[LexerSpec] = None) -> BatchSummary:
+    """
+    Tokeniza os arquivos em paralelo, chamando on_result à medida que cada
+    arquivo termina (em ordem de conclusão, não de entrada).
+
+    Args:
+        paths: Caminhos dos arquivos
+        jobs: Número de processos (padrão: número de CPUs); 1 roda no
+            próprio processo, sem pool
+        cache_dir: Diretório de um cache de tokens compartilhado pelos
+            workers, limitado a cache_size bytes
+        spec: LexerSpec do dialeto (padrão: a especificação do Lexer)
+    """
+    worker = partial(lex_file, engine=engine, skip_whitespace=skip_whitespace,
+                     skip_comments=skip_comments, cache_dir=cache_dir,
+                     cache_size=cache_size, spec=spec)
+    jobs = jobs or os.cpu_count() or 1
+    summary = BatchSummary()
+    start = time.perf_counter()
+
+    if jobs == 1:
+        results = map(worker, paths)
+        for result in results:
+            summary.add(result)
+            if on_result is not None:
+                on_result(result)
+    else:
+        from multiprocessing import Pool
+        paths = list(paths)
+        # Lotes pequenos amortizam a comunicação entre processos sem atrasar
+        # demais a saída dos primeiros resultados
+        chunksize = max(1, min(64, len(paths) // (jobs * 8)))
+        with Pool(jobs) as pool:
+            for result in pool.imap_unordered(worker, paths, chunksize):
+                summary.add(result)
+                if on_result is not None:
+                    on_result(result)
+
+    summary.seconds = time.perf_counter() - start
+    return summary
+
+
+def format_result(result: FileResult) -> str:
+    """Linha de resultado de um arquivo para a CLI"""
+    if result.error is not None:
+        return f"{result.path}: ERRO - {result.error}"
+    return f"{result.path}: {result.tokens} tokens, {result.lines} linhas"
+
+
+def format_summary(summary: BatchSummary, errors: List[FileResult]) -> List[str]:
+    """Relatório agregado do lote para a CLI"""
+    seconds = summary.seconds or 1e-9
+    lines = [
+        "\nEstatísticas:",
+        f"  Arquivos analisados: {summary.files}",
+        f"  Total de tokens: {summary.tokens}",
+        f"  Linhas processadas: {summary.lines}",
+        f"  Arquivos com erro: {summary.failed}",
+        f"  Tempo total: {summary.seconds:.3f}s",
+        f"  Vazão: {summary.tokens / seconds:,.0f} tokens/s, "
+        f"{summary.size / seconds / 1e6:.2f} MB/s",
+    ]
+    if summary.cache_hits or summary.cache_misses:
+        lines.append(f"  Cache: {summary.cache_hits} acertos, {summary.cache_misses} falhas")
+    if errors:
+        lines.append("\nErros por arquivo:")
+        for result in sorted(errors, key=lambda r: r.path):
+            lines.append(f"  {result.path}: {result.error}")
+    return lines
@@ -0,0 +1,451 @@
+"""
+Benchmarks do analisador léxico com corpus sintético
+
+Uso:
+    python -m src.bench --sizes 1K,1M --output resultados.json
+    python -m src.bench --baseline resultados.json --threshold 0.15
+    python -m src.bench --adversarial --sizes 64K
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from src.cache import parse_size
+from src.lexer import Lexer
+
+RESULTS_VERSION = 1
+
+# O engine de referência é ordens de grandeza mais lento; acima deste
+# tamanho ele é omitido
+LOOP_MAX_SIZE = 1 << 20
+
+DEFAULT_SIZES = '1K,100K,1M,10M'
+
+MIN_SECONDS = 0.05
+
+_NAMES = ['contador', 'resultado', 'lista', 'indice', 'valor', 'total', 'soma',
+          'tamanho', 'temp', 'i', 'j', 'n', 'media', 'maximo', 'nome', 'ativo']
+_TYPES = ['int', 'float', 'string', 'bool']
+_OPERATORS = ['+', '-', '*', '/', '%']
+_COMPARISONS = ['==', '!=', '<', '>', '<=', '>=']
+_COMMENTS = ['// Atualiza o contador', '// Busca linear', '/* Estrutura de repetição */',
+             '// Fibonacci recursivo - exemplo', '/* Bloco\n   com várias linhas */']
+
+
+class _ProgramGenerator:
+    """Gera declarações no estilo dos programas de exemplos/"""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+
+    def name(self) -> str:
+        return self.rng.choice(_NAMES) + (str(self.rng.randint(1, 99)) if self.rng.random() < 0.3 else '')
+
+    def literal(self) -> str:
+        rng = self.rng
+        kind = rng.random()
+        if kind < 0.45:
+            return str(rng.randint(0, 10000))
+        if kind < 0.65:
+            return f"{rng.randint(0, 999)}.{rng.randint(0, 99)}"
+        if kind < 0.85:
+            return f'"{rng.choice(["Olá, mundo!", "valor", "ação", "erro: %d"])}"'
+        return rng.choice(['true', 'false'])
+
+    def expression(self, depth: int = 0) -> str:
+        rng = self.rng
+        if depth > 2 or rng.random() < 0.4:
+            return self.name() if rng.random() < 0.6 else self.literal()
+        if rng.random() < 0.15:
+            return f"{self.name()}({self.expression(depth + 1)}, {self.expression(depth + 1)})"
+        if rng.random() < 0.15:
+            return f"{self.name()}[{self.expression(depth + 1)}]"
+        left, right = self.expression(depth + 1), self.expression(depth + 1)
+        expr = f"{left} {rng.choice(_OPERATORS)} {right}"
+        return f"({expr})" if rng.random() < 0.3 else expr
+
+    def condition(self) -> str:
+        condition = f"{self.expression(1)} {self.rng.choice(_COMPARISONS)} {self.expression(1)}"
+        if self.rng.random() < 0.2:
+            condition += f" {self.rng.choice(['and', 'or'])} not {self.name()}"
+        return condition
+
+    def statements(self, indent: int, count: int) -> List[str]:
+        return [line for _ in range(count) for line in self.statement(indent)]
+
+    def statement(self, indent: int) -> List[str]:
+        rng = self.rng
+        pad = '    ' * indent
+        kind = rng.random()
+        if indent < 3 and kind < 0.1:
+            return ([f"{pad}if ({self.condition()}) {{"] + self.statements(indent + 1, 2)
+                    + [f"{pad}}} else {{"] + self.statements(indent + 1, 1) + [f"{pad}}}"])
+        if indent < 3 and kind < 0.18:
+            return ([f"{pad}while ({self.condition()}) {{"] + self.statements(indent + 1, 2)
+                    + [f"{pad}}}"])
+        if indent < 3 and kind < 0.22:
+            var = self.name()
+            return ([f"{pad}for ({var} = 0; {var} < {self.name()}; {var} = {var} + 1) {{"]
+                    + self.statements(indent + 1, 2) + [f"{pad}}}"])
+        if indent == 0 and kind < 0.3:
+            params = ', '.join(f"{rng.choice(_TYPES)} {self.name()}" for _ in range(rng.randint(0, 3)))
+            return ([f"function {self.name()}({params}) {{"] + self.statements(1, 3)
+                    + [f"    return {self.expression()};", "}", ""])
+        if kind < 0.4:
+            return [f"{pad}{rng.choice(_COMMENTS)}"]
+        if kind < 0.6:
+            return [f"{pad}{rng.choice(_TYPES)} {self.name()} = {self.expression()};"]
+        if kind < 0.65:
+            return [f"{pad}return {self.expression()};"]
+        return [f"{pad}{self.name()} = {self.expression()};"]
+
+
+def generate_program(size: int, seed: int = 0) -> str:
+    """Gera um programa válido com aproximadamente size caracteres"""
+    generator = _ProgramGenerator(seed)
+    lines = []
+    total = 0
+    while total < size:
+        for line in generator.statement(0):
+            lines.append(line)
+            total += len(line) + 1
+    return '\n'.join(lines) + '\n'
+
+
+def huge_block_comment(size: int, seed: int = 0) -> str:
+    """Um único comentário de bloco com várias linhas ocupando o texto"""
+    line = " * texto de comentário com / e * soltos e \"aspas\"\n"
+    body = line * max(1, (size - 16) // len(line))
+    return "int x = 1;\n/*\n" + body + "*/\nx = 2;\n"
+
+
+def long_string(size: int, seed: int = 0) -> str:
+    """Uma única string literal ocupando o texto, com escapes"""
+    piece = 'abc \\" def \\\\ ação '
+    body = piece * max(1, (size - 20) // len(piece))
+    return f'string s = "{body}";\n'
+
+
+def deep_indentation(size: int, seed: int = 0) -> str:
+    """Blocos aninhados em profundidade crescente, com muito whitespace"""
+    lines = []
+    total = 0
+    depth = 0
+    while total < size:
+        pad = '\t' * (depth % 64) + ' ' * (depth % 7)
+        lines.append(f"{pad}if (x{depth % 10} < {depth}) {{")
+        lines.append(f"{pad}    x = x + 1;")
+        total += len(lines[-1]) + len(lines[-2]) + 2
+        depth += 1
+    lines.extend('}' for _ in range(depth))
+    return '\n'.join(lines) + '\n'
+
+
+CASES: Dict[str, Callable[[int, int], str]] = {
+    'program': generate_program,
+    'block_comment': huge_block_comment,
+    'long_string': long_string,
+    'deep_indent': deep_indentation,
+}
+
+
+def _repeat(piece: str, size: int) -> str:
+    return piece * max(1, size // len(piece))
+
+
+# Entradas hostis: delimitadores sem fechamento, strings interrompidas por
+# um escape antes da quebra de linha e longas sequências de '/', '*' e
+# aspas. Não são programas válidos; são tokenizadas no modo de
+# recuperação e o tempo deve crescer linearmente com o tamanho
+ADVERSARIAL: Dict[str, Callable[[int], str]] = {
+    'unclosed_comment': lambda size: 'x = 1;\n/*' + _repeat(' a * b / c /', size),
+    'unclosed_string': lambda size: 'x = "' + _repeat('abc \\" ação ', size),
+    'comment_openers': lambda size: _repeat('/*', size),
+    'comment_closers': lambda size: _repeat('*/', size),
+    'slashes': lambda size: _repeat('/' * 63 + '\n', size),
+    'stars': lambda size: _repeat('*', size),
+    'quotes': lambda size: _repeat('"\'', size),
+    'open_quotes': lambda size: _repeat('"a\n', size),
+    'escapes': lambda size: '"' + _repeat('\\', size),
+    'escaped_newlines': lambda size: _repeat('"\\\n', size),
+    'revived_strings': lambda size: _repeat('"\\\nx = "a";\n', size),
+    'mixed_openers': lambda size: _repeat('/* " \' ', size),
+    'long_line': lambda size: _repeat('x = "ação"; ', size),
+}
+
+# Razão máxima entre o tempo por byte da entrada maior e o da menor
+LINEAR_LIMIT = 3.0
+
+# Tamanho menor medido com --adversarial quando --sizes não é dado
+ADVERSARIAL_SIZE = '64K'
+
+# Tamanho dos blocos na leitura em blocos das entradas hostis
+_ADVERSARIAL_CHUNK = 4096
+
+
+def _run_adversarial(engine: str, text: str) -> int:
+    """
+    Tokeniza text (e, com o engine master, seus bytes) no modo de
+    recuperação, em memória e em blocos, resolvendo a posição de cada token
+    """
+    count = 0
+    sources = [text, text.encode('utf-8')] if engine == 'master' else [text]
+    for source in sources:
+        for token in Lexer(source, engine=engine, recover=True).iter_tokens():
+            token.column
+            count += 1
+    chunks = (text[start:start + _ADVERSARIAL_CHUNK] for start in range(0, len(text), _ADVERSARIAL_CHUNK))
+    for token in Lexer.iter_chunks(chunks, engine=engine, recover=True):
+        token.column
+        count += 1
+    return count
+
+
+def measure_scaling(case: str, size: int, engine: str = 'master', factor: int = 8,
+                    repeat: int = 3) -> float:
+    """
+    Tempo por byte do caso hostil com size * factor bytes dividido pelo
+    tempo por byte com size bytes: perto de 1 se a tokenização é linear,
+    perto de factor se é quadrática.
+    """
+    per_byte = []
+    for n in (size, size * factor):
+        text = ADVERSARIAL[case](n)
+        best = float('inf')
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            _run_adversarial(engine, text)
+            best = min(best, time.perf_counter() - start)
+        per_byte.append(best / len(text))
+    return per_byte[1] / per_byte[0]
+
+
+def _run_list(engine: str, text: str) -> int:
+    return len(Lexer(text, engine=engine).tokenize())
+
+
+def _run_buffer(engine: str, text: str) -> int:
+    return len(Lexer(text, engine=engine).tokenize(as_buffer=True))
+
+
+def _run_stream(engine: str, text: str) -> int:
+    count = 0
+    for _ in Lexer(text, engine=engine).iter_tokens():
+        count += 1
+    return count
+
+
+def _run_bytes(engine: str, text: bytes) -> int:
+    return len(Lexer(text, engine=engine).tokenize(as_buffer=True))
+
+
+# Modo -> (função, se recebe o texto em bytes)
+MODES = {
+    'list': (_run_list, False),
+    'buffer': (_run_buffer, False),
+    'stream': (_run_stream, False),
+    'bytes': (_run_bytes, True),
+}
+
+
+def _measure(run: Callable, engine: str, text, repeat: int, memory: bool) -> Dict:
+    # Como timeit: textos pequenos são tokenizados várias vezes por medida,
+    # para que cada medida dure pelo menos MIN_SECONDS
+    gc.collect()
+    start = time.perf_counter()
+    tokens = run(engine, text)
+    elapsed = time.perf_counter() - start
+    number = max(1, int(MIN_SECONDS / max(elapsed, 1e-6)))
+
+    best = elapsed if number == 1 else float('inf')
+    for _ in range(repeat - 1 if number == 1 else repeat):
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(number):
+            run(engine, text)
+        best = min(best, (time.perf_counter() - start) / number)
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run(engine, text)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    best = best or 1e-9
+    return {
+        'tokens': tokens,
+        'seconds': best,
+        'tokens_per_sec': tokens / best,
+        'mb_per_sec': len(text) / best / 1e6,
+        'peak_bytes': peak,
+    }
+
+
+def run_benchmarks(sizes: List[int], cases: List[str], engines: List[str], modes: List[str],
+                   repeat: int = 3, memory: bool = True, seed: int = 0,
+                   on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+    """Executa cada combinação de caso, tamanho, engine e modo"""
+    results = []
+    for case in cases:
+        for size in sizes:
+            text = CASES[case](size, seed)
+            data = text.encode('utf-8')
+            for engine in engines:
+                if engine != 'master' and size > LOOP_MAX_SIZE:
+                    continue
+                for mode in modes:
+                    run, binary = MODES[mode]
+                    if binary and engine != 'master':
+                        continue
+                    result = {'case': case, 'size': size, 'engine': engine, 'mode': mode}
+                    result.update(_measure(run, engine, data if binary else text, repeat, memory))
+                    results.append(result)
+                    if on_result is not None:
+                        on_result(result)
+    return results
+
+
+def result_key(result: Dict) -> str:
+    return f"{result['case']}/{result['size']}/{result['engine']}/{result['mode']}"
+
+
+def find_regressions(results: List[Dict], baseline: List[Dict], threshold: float) -> List[str]:
+    """
+    Compara a vazão com a da linha de base e descreve cada combinação que
+    ficou mais lenta que (1 - threshold) vezes a vazão de referência.
+    """
+    reference = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        base = reference.get(result_key(result))
+        if base is None:
+            continue
+        ratio = result['tokens_per_sec'] / base['tokens_per_sec']
+        if ratio < 1 - threshold:
+            regressions.append(
+                f"{result_key(result)}: {result['tokens_per_sec']:,.0f} tokens/s, "
+                f"{ratio:.0%} da linha de base ({base['tokens_per_sec']:,.0f} tokens/s)"
+            )
+    return regressions
+
+
+def format_result(result: Dict) -> str:
+    peak = result['peak_bytes']
+    memory = f"{peak / 1e6:9.2f} MB" if peak is not None else f"{'-':>12}"
+    return (f"{result['case']:<14} {result['size']:>10} {result['engine']:<7} {result['mode']:<7} "
+            f"{result['tokens_per_sec']:>14,.0f} {result['mb_per_sec']:>9.2f} {memory}")
+
+
+def _adversarial_main(size: int, engines: List[str], repeat: int):
+    """Mede a escala das entradas hostis e termina com código 1 se alguma não for linear"""
+    print(f"{'caso':<18} {'engine':<7} {'razão':>7}")
+    failures = []
+    for case in ADVERSARIAL:
+        for engine in engines:
+            ratio = measure_scaling(case, size, engine, repeat=repeat)
+            print(f"{case:<18} {engine:<7} {ratio:>7.2f}", flush=True)
+            if ratio > LINEAR_LIMIT:
+                failures.append(f"{case}/{engine}: {ratio:.2f}x")
+    if failures:
+        print(f"\nCrescimento acima de {LINEAR_LIMIT}x o linear:", file=sys.stderr)
+        for line in failures:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+    print(f"\nTodas as entradas hostis escalam linearmente (limite: {LINEAR_LIMIT}x)")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m src.bench',
+        description='Benchmarks do analisador léxico com corpus sintético'
+    )
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f'Tamanhos do texto gerado, ex.: 1K,1M,100M (padrão: {DEFAULT_SIZES})')
+    parser.add_argument('--cases', default=','.join(CASES),
+                        help=f'Casos a executar (padrão: {",".join(CASES)})')
+    parser.add_argument('--engines', default=','.join(Lexer.ENGINES),
+                        help='Engines a medir (padrão: todos)')
+    parser.add_argument('--modes', default=','.join(MODES),
+                        help=f'Modos a medir (padrão: {",".join(MODES)})')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Repetições por medida; vale a mais rápida (padrão: 3)')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Não mede o pico de memória (evita uma execução extra com tracemalloc)')
+    parser.add_argument('--seed', type=int, default=0, help='Semente do gerador (padrão: 0)')
+    parser.add_argument('--output', '-o', help='Grava os resultados em JSON')
+    parser.add_argument('--baseline', help='Resultados JSON de referência para detectar regressões')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Queda de vazão tolerada em relação à linha de base (padrão: 0.10)')
+    parser.add_argument('--adversarial', action='store_true',
+                        help='Mede como o tempo cresce com o tamanho em entradas hostis, a partir do '
+                             f'primeiro tamanho de --sizes (padrão: {ADVERSARIAL_SIZE}), e falha se não '
+                             f'for linear (limite: {LINEAR_LIMIT}x)')
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = [parse_size(value) for value in args.sizes.split(',')]
+    except ValueError as e:
+        parser.error(f"--sizes: {e}")
+    choices = {'cases': CASES, 'engines': Lexer.ENGINES, 'modes': MODES}
+    selected = {}
+    for option, valid in choices.items():
+        selected[option] = getattr(args, option).split(',')
+        unknown = [value for value in selected[option] if value not in valid]
+        if unknown:
+            parser.error(f"--{option}: valores desconhecidos: {', '.join(unknown)}")
+    if args.repeat < 1:
+        parser.error("--repeat deve ser pelo menos 1")
+
+    if args.adversarial:
+        size = parse_size(ADVERSARIAL_SIZE) if args.sizes == DEFAULT_SIZES else sizes[0]
+        return _adversarial_main(size, selected['engines'], args.repeat)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+
+    print(f"{'caso':<14} {'tamanho':>10} {'engine':<7} {'modo':<7} {'tokens/s':>14} {'MB/s':>9} {'pico mem.':>12}")
+
+    def on_result(result):
+        print(format_result(result), flush=True)
+
+    results = run_benchmarks(sizes, selected['cases'], selected['engines'], selected['modes'],
+                             repeat=args.repeat, memory=not args.no_memory, seed=args.seed,
+                             on_result=on_result)
+
+    if args.output:
+        report = {
+            'version': RESULTS_VERSION,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados salvos em: {args.output}")
+
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressões acima de {args.threshold:.0%}:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\nSem regressões acima de {args.threshold:.0%} em relação a {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
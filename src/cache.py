@@ -0,0 +1,251 @@
+"""
+Cache em disco de resultados de tokenização, endereçado pelo conteúdo
+"""
+
+import hashlib
+import os
+import struct
+import tempfile
+from array import array
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: a limpeza fica sem trava, o que é seguro
+    fcntl = None
+
+# Incrementar quando o formato das entradas mudar
+CACHE_FORMAT_VERSION = 2
+
+_MAGIC = b'LXC1'
+# magic, versão, tipo da entrada, tamanhos dos itens dos arrays, nº de tokens
+# e, nas entradas de erro, linha, coluna e deslocamento do erro
+_HEADER = struct.Struct('<4sHB3BQIIQ')
+_TYPECODES = ('B', 'Q', 'I')
+_ENTRY_OK = 0
+_ENTRY_ERROR = 1
+
+DEFAULT_MAX_SIZE = 1 << 30
+
+_SIZE_SUFFIXES = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+
+def parse_size(value: str) -> int:
+    """Converte tamanhos como '512M' ou '2G' em bytes"""
+    text = value.strip().upper().rstrip('B')
+    suffix = text[-1:] if text[-1:] in _SIZE_SUFFIXES else ''
+    number = text[:len(text) - len(suffix)]
+    if not number.isdigit() or int(number) <= 0:
+        raise ValueError(f"Tamanho inválido: {value!r}")
+    return int(number) * _SIZE_SUFFIXES[suffix]
+
+
+class CacheEntry:
+    """Resultado guardado no cache: colunas de um TokenBuffer ou um erro léxico"""
+
+    __slots__ = ('arrays', 'error')
+
+    def __init__(self, arrays=None, error: Optional[Tuple[str, int, int, int]] = None):
+        self.arrays = arrays
+        self.error = error
+
+
+class TokenCache:
+    """
+    Cache de tokens em um diretório, com chave derivada do hash do conteúdo,
+    da especificação do lexer e das opções de tokenização.
+
+    Cada entrada é um arquivo escrito em um arquivo temporário e renomeado
+    atomicamente, então vários processos podem ler e escrever no mesmo
+    diretório ao mesmo tempo. Quando o tamanho total passa de max_size, as
+    entradas usadas há mais tempo (pela data de modificação, atualizada a
+    cada acerto) são removidas.
+    """
+
+    _instances: Dict[Tuple[str, int], 'TokenCache'] = {}
+
+    def __init__(self, directory, max_size: int = DEFAULT_MAX_SIZE):
+        if max_size <= 0:
+            raise ValueError("max_size deve ser positivo")
+        self.directory = os.path.abspath(os.fspath(directory))
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._size: Optional[int] = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    @classmethod
+    def open(cls, directory, max_size: int = DEFAULT_MAX_SIZE) -> 'TokenCache':
+        """Retorna a instância compartilhada do processo para o diretório"""
+        key = (os.path.abspath(os.fspath(directory)), max_size)
+        cache = cls._instances.get(key)
+        if cache is None:
+            cache = cls._instances[key] = cls(directory, max_size)
+        return cache
+
+    @staticmethod
+    def make_key(source, spec_key: str, binary: bool, skip_whitespace: bool,
+                 skip_comments: bool) -> str:
+        """Chave da entrada: hash do conteúdo, da especificação e das opções"""
+        digest = hashlib.sha256()
+        options = f"{CACHE_FORMAT_VERSION}|{spec_key}|{int(binary)}|{int(skip_whitespace)}|{int(skip_comments)}|"
+        digest.update(options.encode('ascii'))
+        digest.update(source.encode('utf-8') if isinstance(source, str) else source)
+        return digest.hexdigest()
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de uso do cache neste processo"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'writes': self.writes,
+            'evictions': self.evictions,
+        }
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Lê uma entrada; None se não existir ou estiver corrompida"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+
+        entry = self._decode(data)
+        if entry is None:
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: CacheEntry):
+        """Grava uma entrada de forma atômica e aplica o limite de tamanho"""
+        data = self._encode(entry)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            self._remove(temp_path)
+            return
+        self.writes += 1
+
+        if self._size is None:
+            self._size = self._total_size()
+        else:
+            self._size += len(data)
+        if self._size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        """Remove as entradas menos usadas até ficar abaixo de 90% do limite"""
+        lock = None
+        if fcntl is not None:
+            lock = open(os.path.join(self.directory, '.lock'), 'w')
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            entries = []
+            for path in self._entry_paths():
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            target = self.max_size * 9 // 10
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                if self._remove(path):
+                    self.evictions += 1
+                total -= size
+            self._size = total
+        finally:
+            if lock is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+                lock.close()
+
+    def clear(self):
+        """Remove todas as entradas"""
+        for path in self._entry_paths():
+            self._remove(path)
+        self._size = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key[2:] + '.tok')
+
+    def _entry_paths(self):
+        for prefix in os.listdir(self.directory):
+            subdir = os.path.join(self.directory, prefix)
+            if len(prefix) != 2 or not os.path.isdir(subdir):
+                continue
+            for name in os.listdir(subdir):
+                if name.endswith('.tok'):
+                    yield os.path.join(subdir, name)
+
+    def _total_size(self) -> int:
+        total = 0
+        for path in self._entry_paths():
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _encode(entry: CacheEntry) -> bytes:
+        itemsizes = [array(code).itemsize for code in _TYPECODES]
+        if entry.error is not None:
+            message, line, column, offset = entry.error
+            header = _HEADER.pack(_MAGIC, CACHE_FORMAT_VERSION, _ENTRY_ERROR, *itemsizes, 0,
+                                  line, column, offset)
+            return header + message.encode('utf-8')
+
+        count = len(entry.arrays[0])
+        header = _HEADER.pack(_MAGIC, CACHE_FORMAT_VERSION, _ENTRY_OK, *itemsizes, count, 0, 0, 0)
+        return header + b''.join(data.tobytes() for data in entry.arrays)
+
+    @staticmethod
+    def _decode(data: bytes) -> Optional[CacheEntry]:
+        if len(data) < _HEADER.size:
+            return None
+        magic, version, kind, *rest = _HEADER.unpack_from(data)
+        itemsizes, (count, line, column, offset) = rest[:3], rest[3:]
+        expected_sizes = [array(code).itemsize for code in _TYPECODES]
+        if magic != _MAGIC or version != CACHE_FORMAT_VERSION or itemsizes != expected_sizes:
+            return None
+
+        body = memoryview(data)[_HEADER.size:]
+        if kind == _ENTRY_ERROR:
+            return CacheEntry(error=(str(body, 'utf-8'), line, column, offset))
+
+        if len(body) != count * sum(itemsizes):
+            return None
+        arrays = []
+        offset = 0
+        for code, size in zip(_TYPECODES, itemsizes):
+            data = array(code)
+            data.frombytes(body[offset:offset + count * size])
+            arrays.append(data)
+            offset += count * size
+        return CacheEntry(tuple(arrays))
@@ -0,0 +1,407 @@
+"""
+Gerador de um scanner especializado para uma especificação léxica
+
+Transforma as palavras-chave e os padrões de uma LexerSpec em um módulo
+Python com tabelas de despacho pelo primeiro caractere e laços escritos
+para cada classe de token, sem chamadas de regex. O engine 'master' usa o
+scanner gerado automaticamente quando o módulo existe e foi gerado para a
+especificação em uso; caso contrário, usa a regex mestre.
+
+Uso:
+    python -m src.codegen
+    python -m src.codegen --spec dialeto.json --output src/_generated_scanner.py
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from src.lexer import DEFAULT_SPEC, LexerSpec, TokenType
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_generated_scanner.py')
+
+# Padrões de literais que o gerador sabe escrever como laços
+_DIGITS = r'\d+'
+_DECIMAL = r'\d+\.\d+'
+_ASCII_DIGITS = frozenset('0123456789')
+
+_CLASS_ESCAPES = {'t': '\t', 'n': '\n', 'r': '\r', 'f': '\f', 'v': '\v'}
+
+
+class UnsupportedSpec(ValueError):
+    """Especificação com um padrão que o gerador não sabe traduzir"""
+    pass
+
+
+def _parse_class(pattern: str, pos: int) -> Tuple[FrozenSet[str], int]:
+    """Lê uma classe [...] simples (caracteres, faixas e escapes de um caractere)"""
+    if not pattern.startswith('[', pos) or pattern.startswith('[^', pos):
+        raise UnsupportedSpec(f"Padrão não suportado pelo gerador: {pattern!r}")
+    # Itens (caractere, é um '-' sem escape)
+    items: List[Tuple[str, bool]] = []
+    pos += 1
+    while pos < len(pattern) and pattern[pos] != ']':
+        char = pattern[pos]
+        if char == '\\':
+            escaped = pattern[pos + 1:pos + 2]
+            if not escaped or (escaped.isalnum() and escaped not in _CLASS_ESCAPES):
+                raise UnsupportedSpec(f"Padrão não suportado pelo gerador: {pattern!r}")
+            items.append((_CLASS_ESCAPES.get(escaped, escaped), False))
+            pos += 2
+        else:
+            items.append((char, char == '-'))
+            pos += 1
+    if pos >= len(pattern) or not items:
+        raise UnsupportedSpec(f"Padrão não suportado pelo gerador: {pattern!r}")
+    
+    chars = set()
+    index = 0
+    while index < len(items):
+        char = items[index][0]
+        if index + 2 < len(items) and items[index + 1][1]:
+            high = items[index + 2][0]
+            chars.update(chr(code) for code in range(ord(char), ord(high) + 1))
+            index += 3
+        else:
+            chars.add(char)
+            index += 1
+    return frozenset(chars), pos + 1
+
+
+def _parse_run(pattern: str) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """
+    Conjuntos do primeiro caractere e dos seguintes de um padrão na forma
+    [A][B]* ou [A]+
+    """
+    first, pos = _parse_class(pattern, 0)
+    if pattern[pos:] == '+':
+        return first, first
+    rest, pos = _parse_class(pattern, pos)
+    if pattern[pos:] != '*':
+        raise UnsupportedSpec(f"Padrão não suportado pelo gerador: {pattern!r}")
+    return first, rest
+
+
+def _name(token_type: TokenType) -> str:
+    return f"_{token_type.name}"
+
+
+class _Generator:
+    """Monta o código de scan() para uma especificação"""
+
+    def __init__(self, spec: LexerSpec, function: str):
+        self.spec = spec
+        self.function = function
+        self.ident_first, self.ident_rest = _parse_run(spec.identifier)
+        self.space_first, self.space_rest = _parse_run(spec.whitespace)
+        self.literals = []
+        for pattern, token_type in spec.literals:
+            if pattern not in (_DIGITS, _DECIMAL):
+                raise UnsupportedSpec(f"Literal não suportado pelo gerador: {pattern!r}")
+            self.literals.append((pattern, token_type))
+        self.types = {TokenType.IDENTIFIER, TokenType.WHITESPACE, TokenType.NEWLINE,
+                      TokenType.COMMENT, TokenType.STRING_LITERAL}
+        self.types.update(spec.keywords.values())
+        self.types.update(token_type for _, token_type in spec.operators)
+        self.types.update(token_type for _, token_type in spec.literals)
+
+    def rules(self) -> List[Tuple]:
+        """Regras na ordem de precedência de LexerSpec.patterns()"""
+        spec = self.spec
+        rules = [('line', opener) for opener in spec.line_comments]
+        rules += [('block', opener, closer) for opener, closer in spec.block_comments]
+        rules += [('string', quote) for quote in spec.strings]
+        rules += [('literal', pattern, token_type) for pattern, token_type in self.literals]
+        rules += [('operator', text, token_type) for text, token_type in spec.operators]
+        rules += [('identifier',), ('whitespace',), ('newline',)]
+        return rules
+
+    def first_chars(self, rule) -> FrozenSet[str]:
+        kind = rule[0]
+        if kind in ('line', 'block', 'string', 'operator'):
+            return frozenset(rule[1][0])
+        if kind == 'literal':
+            return _ASCII_DIGITS
+        if kind == 'identifier':
+            return self.ident_first
+        if kind == 'whitespace':
+            return self.space_first
+        return frozenset('\n')
+
+    def candidates(self) -> Dict[str, Tuple]:
+        """Regras que podem começar em cada caractere, em ordem de precedência"""
+        table: Dict[str, List] = {}
+        for rule in self.rules():
+            for char in self.first_chars(rule):
+                table.setdefault(char, []).append(rule)
+        return {char: tuple(rules) for char, rules in table.items()}
+
+    @staticmethod
+    def unconditional(rule) -> bool:
+        """A regra sempre decide (reconhece ou desiste do texto) ao ser tentada"""
+        kind = rule[0]
+        if kind in ('line', 'block', 'operator'):
+            return len(rule[1]) == 1
+        if kind == 'literal':
+            return rule[1] == _DIGITS
+        return True
+
+    def attempt(self, rule, indent: str) -> List[str]:
+        """
+        Código que tenta a regra em pos: define t e token_end se ela casar
+        ou retorna pos se o texto precisar da regex mestre (delimitado sem
+        fechamento, dígito não ASCII)
+        """
+        kind = rule[0]
+        lines = []
+        if kind == 'line':
+            lines += ["j = text.find('\\n', pos)",
+                      "t = _COMMENT",
+                      "token_end = end if j < 0 else j"]
+        elif kind == 'block':
+            opener, closer = rule[1], rule[2]
+            lines += [f"j = text.find({closer!r}, pos + {len(opener)})",
+                      "if j < 0:",
+                      "    return pos",
+                      "t = _COMMENT",
+                      f"token_end = j + {len(closer)}"]
+        elif kind == 'string':
+            quote = rule[1]
+            # A aspa só é procurada de novo quando a encontrada estava
+            # escapada, então o trecho é percorrido uma única vez
+            lines += ["i = pos + 1",
+                      f"j = text.find({quote!r}, i)",
+                      "while True:",
+                      "    if j < 0:",
+                      "        return pos",
+                      "    k = text.find('\\\\', i, j)",
+                      "    if k < 0:",
+                      "        break",
+                      "    if text[k + 1] == '\\n':",
+                      "        return pos",
+                      "    i = k + 2",
+                      "    if i > j:",
+                      f"        j = text.find({quote!r}, i)",
+                      "t = _STRING_LITERAL",
+                      "token_end = j + 1"]
+        elif kind == 'literal':
+            pattern, token_type = rule[1], rule[2]
+            lines += ["i = pos + 1",
+                      "while i < end and text[i] in digits:",
+                      "    i += 1",
+                      "if i < end and text[i] > '\\x7f':",
+                      "    return pos"]
+            if pattern == _DECIMAL:
+                lines += ["if i + 1 < end and text[i] == '.':",
+                          "    if text[i + 1] > '\\x7f':",
+                          "        return pos",
+                          "    if text[i + 1] in digits:",
+                          "        i += 2",
+                          "        while i < end and text[i] in digits:",
+                          "            i += 1",
+                          "        if i < end and text[i] > '\\x7f':",
+                          "            return pos",
+                          f"        t = {_name(token_type)}",
+                          "        token_end = i"]
+            else:
+                lines += [f"t = {_name(token_type)}",
+                          "token_end = i"]
+        elif kind == 'operator':
+            text, token_type = rule[1], rule[2]
+            lines += [f"t = {_name(token_type)}",
+                      f"token_end = pos + {len(text)}"]
+        elif kind == 'identifier':
+            lines += ["i = pos + 1",
+                      "while i < end and text[i] in ident_rest:",
+                      "    i += 1",
+                      "t = keywords.get(text[pos:i], _IDENTIFIER)",
+                      "token_end = i"]
+        elif kind == 'whitespace':
+            lines += ["i = pos + 1",
+                      "while i < end and text[i] in space_rest:",
+                      "    i += 1",
+                      "t = _WHITESPACE",
+                      "token_end = i"]
+        else:
+            lines += ["t = _NEWLINE",
+                      "token_end = pos + 1"]
+        return [indent + line for line in lines]
+
+    def guard(self, rule) -> Optional[str]:
+        """Condição, além do primeiro caractere, para tentar a regra"""
+        if rule[0] in ('line', 'block', 'operator') and len(rule[1]) > 1:
+            return f"text.startswith({rule[1]!r}, pos)"
+        return None
+
+    def group_code(self, rules: Sequence, indent: str) -> List[str]:
+        """Tenta as regras em ordem até uma decidir; se nenhuma casar, desiste"""
+        lines = []
+        decided = False
+        for index, rule in enumerate(rules):
+            conditions = [] if index == 0 else ["t is None"]
+            guard = self.guard(rule)
+            if guard is not None:
+                conditions.append(guard)
+            if conditions:
+                lines.append(f"{indent}if {' and '.join(conditions)}:")
+                lines += self.attempt(rule, indent + '    ')
+            else:
+                lines += self.attempt(rule, indent)
+            if not conditions and self.unconditional(rule):
+                decided = True
+                break
+            if guard is None and self.unconditional(rule):
+                decided = True
+                break
+        if not decided:
+            lines.append(f"{indent}if t is None:")
+            lines.append(f"{indent}    return pos")
+        return lines
+
+    def generate(self) -> Tuple[List[str], List[str]]:
+        """Tabelas do módulo e o código da função"""
+        candidates = self.candidates()
+        prefix = f"_{self.function}"
+
+        # Caracteres cuja primeira regra é um operador de um caractere, um
+        # identificador ou whitespace são tratados sem despacho por grupo
+        single = {}
+        ident_fast, space_fast = set(), set()
+        groups: Dict[Tuple, int] = {}
+        dispatch: Dict[str, int] = {}
+        for char in sorted(candidates):
+            rules = candidates[char]
+            head = rules[0]
+            if head[0] == 'operator' and len(head[1]) == 1:
+                single[char] = head[2]
+            elif head[0] == 'identifier':
+                ident_fast.add(char)
+            elif head[0] == 'whitespace':
+                space_fast.add(char)
+            else:
+                dispatch[char] = groups.setdefault(rules, len(groups))
+
+        tables = [
+            f"{prefix}_KEYWORDS = {{",
+            *(f"    {word!r}: {_name(token_type)}," for word, token_type in sorted(self.spec.keywords.items())),
+            "}",
+            f"{prefix}_SINGLE = {{",
+            *(f"    {char!r}: {_name(token_type)}," for char, token_type in single.items()),
+            "}",
+            f"{prefix}_IDENT_START = frozenset({''.join(sorted(ident_fast))!r})",
+            f"{prefix}_IDENT_REST = frozenset({''.join(sorted(self.ident_rest))!r})",
+            f"{prefix}_SPACE_START = frozenset({''.join(sorted(space_fast))!r})",
+            f"{prefix}_SPACE_REST = frozenset({''.join(sorted(self.space_rest))!r})",
+            f"{prefix}_GROUPS = {{",
+            *(f"    {char!r}: {group}," for char, group in dispatch.items()),
+            "}",
+        ]
+
+        body = [
+            f"def {self.function}(text, pos, skipped):",
+            '    """',
+            '    Gera (tipo, início, fim) a partir de pos, como o engine master.',
+            '    Retorna onde parou: o fim do texto, ou uma posição que precisa da',
+            '    regex mestre (erro, delimitado sem fechamento, dígito não ASCII).',
+            '    """',
+            "    end = len(text)",
+            f"    single = {prefix}_SINGLE",
+            f"    keywords = {prefix}_KEYWORDS",
+            f"    ident_start = {prefix}_IDENT_START",
+            f"    ident_rest = {prefix}_IDENT_REST",
+            f"    space_start = {prefix}_SPACE_START",
+            f"    space_rest = {prefix}_SPACE_REST",
+            f"    groups = {prefix}_GROUPS",
+            "    digits = _ASCII_DIGITS",
+            "    while pos < end:",
+            "        c = text[pos]",
+            "        t = single.get(c)",
+            "        if t is not None:",
+            "            token_end = pos + 1",
+            "        elif c in ident_start:",
+            *self.attempt(('identifier',), '            '),
+            "        elif c in space_start:",
+            *self.attempt(('whitespace',), '            '),
+            "        else:",
+            "            group = groups.get(c)",
+            "            if group is None:",
+            "                return pos",
+        ]
+        for rules, group in groups.items():
+            keyword = 'if' if group == 0 else 'elif'
+            body.append(f"            {keyword} group == {group}:")
+            body += self.group_code(rules, '                ')
+        body += [
+            "        if t not in skipped:",
+            "            yield t, pos, token_end",
+            "        pos = token_end",
+            "    return pos",
+        ]
+        return tables, body
+
+
+def generate(specs: Sequence[LexerSpec] = (DEFAULT_SPEC,)) -> str:
+    """Código-fonte do módulo com um scanner para cada especificação"""
+    generators = [_Generator(spec, f"scan_{index}") for index, spec in enumerate(specs)]
+    types = set()
+    for generator in generators:
+        types |= generator.types
+    lines = [
+        '"""',
+        'Scanner gerado por src.codegen - não edite; gere de novo com',
+        '    python -m src.codegen',
+        '"""',
+        '',
+        'from src.lexer import TokenType',
+        '',
+        *(f"{_name(token_type)} = TokenType.{token_type.name}"
+          for token_type in sorted(types, key=lambda t: t.name)),
+        '',
+        f"_ASCII_DIGITS = frozenset({''.join(sorted(_ASCII_DIGITS))!r})",
+    ]
+    for generator in generators:
+        tables, body = generator.generate()
+        lines += ['', ''] + tables + ['', ''] + body
+    lines += [
+        '',
+        '',
+        '# Chave da especificação (LexerSpec.key) -> scanner',
+        'SCANNERS = {',
+        *(f"    {spec.key!r}: scan_{index}," for index, spec in enumerate(specs)),
+        '}',
+        '',
+    ]
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m src.codegen',
+        description='Gera um scanner especializado, sem regex, para a especificação léxica'
+    )
+    parser.add_argument('--spec', action='append',
+                        help='Especificação em JSON (pode ser repetida; padrão: a da linguagem)')
+    parser.add_argument('--output', '-o', default=DEFAULT_OUTPUT,
+                        help='Arquivo do módulo gerado (padrão: src/_generated_scanner.py, '
+                             'carregado automaticamente pelo lexer)')
+    args = parser.parse_args(argv)
+
+    specs = [DEFAULT_SPEC]
+    if args.spec:
+        try:
+            specs = [LexerSpec.from_file(path) for path in args.spec]
+        except (OSError, ValueError) as e:
+            parser.error(f"--spec: {e}")
+    try:
+        source = generate(specs)
+    except UnsupportedSpec as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(source)
+    print(f"Scanner gerado em: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+Re-tokenização incremental para editores
+"""
+
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from src.lexer import Lexer, LineIndex, Token, TokenType
+
+# Número de caracteres após o fim de um token que as regex podem examinar
+# para decidir o token (ex.: '1.' seguido de dígito, '<' seguido de '=').
+# A única exceção é '/*' sem fechamento, tratado à parte em update().
+LOOKAHEAD = 2
+
+# Tipos de token que podem conter quebras de linha além de NEWLINE
+_MULTILINE = frozenset((TokenType.COMMENT, TokenType.STRING_LITERAL))
+
+
+def _newlines(text: str, token_type: TokenType, start: int, end: int) -> int:
+    """Número de quebras de linha dentro do token"""
+    if token_type is TokenType.NEWLINE:
+        return 1
+    if token_type in _MULTILINE:
+        return text.count('\n', start, end)
+    return 0
+
+
+@dataclass
+class TokenEdit:
+    """
+    Descreve a mudança na sequência de tokens causada por uma edição.
+
+    Os tokens em [index, index + removed) foram substituídos por inserted.
+    Os tokens seguintes mantêm tipo e valor; seus deslocamentos mudam em
+    offset_delta, suas linhas em line_delta e, na linha do fim do trecho
+    alterado, também suas colunas.
+    """
+    index: int
+    removed: int
+    inserted: List[Token]
+    offset_delta: int
+    line_delta: int
+
+
+class IncrementalLexer:
+    """
+    Mantém os tokens de um texto e os atualiza a cada edição, re-tokenizando
+    só a partir do último token afetado até a nova sequência voltar a
+    coincidir com a antiga.
+
+    Os tokens ficam em um gap buffer: os anteriores à última edição guardam
+    deslocamentos absolutos e os posteriores guardam a distância até o fim
+    do texto, que não muda com edições feitas antes deles. Assim o custo de
+    uma edição depende do trecho re-tokenizado e da distância até a edição
+    anterior, não do tamanho do arquivo. Todos os tokens são mantidos,
+    inclusive whitespace e comentários; tokens() pode filtrá-los.
+    """
+
+    def __init__(self, text: str, engine: str = 'master', lexer_class=Lexer):
+        if not isinstance(text, str):
+            raise ValueError("IncrementalLexer requer texto str")
+        self.lexer_class = lexer_class
+        self.engine = engine
+        self._text = text
+        # (tipo, início, fim) em ordem, com deslocamentos absolutos
+        self._head: List[Tuple[TokenType, int, int]] = []
+        # (tipo, início, fim) em ordem inversa, medidos a partir do fim do texto
+        self._tail: List[Tuple[TokenType, int, int]] = []
+        self._head_newlines = 0
+        self._count = 0
+        self._stale = True
+        self._relex_all()
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def __len__(self) -> int:
+        """Número de tokens, sem o EOF"""
+        return len(self._head) + len(self._tail)
+
+    def tokens(self, skip_whitespace: bool = False, skip_comments: bool = False) -> List[Token]:
+        """Tokens atuais com linha e coluna, terminando com EOF"""
+        if self._stale:
+            self._relex_all()
+
+        skipped = set()
+        if skip_whitespace:
+            skipped.add(TokenType.WHITESPACE)
+        if skip_comments:
+            skipped.add(TokenType.COMMENT)
+
+        text = self._text
+        index = LineIndex(text)
+        result = [Token(token_type, text[start:end], None, None, None, start, index)
+                  for token_type, start, end in self._iter_absolute()
+                  if token_type not in skipped]
+        result.append(Token(TokenType.EOF, "", None, None, None, len(text), index))
+        return result
+
+    def update(self, edit_offset: int, removed_len: int, inserted_text: str) -> TokenEdit:
+        """
+        Aplica uma edição ao texto (remove removed_len caracteres a partir de
+        edit_offset e insere inserted_text) e atualiza os tokens.
+
+        Se o novo texto tiver um erro léxico, o texto é atualizado e o
+        LexerError é propagado; a próxima chamada tokeniza o texto inteiro.
+        """
+        old_text = self._text
+        old_size = len(old_text)
+        if edit_offset < 0 or removed_len < 0 or edit_offset + removed_len > old_size:
+            raise ValueError("Edição fora dos limites do texto")
+
+        new_text = old_text[:edit_offset] + inserted_text + old_text[edit_offset + removed_len:]
+        if self._stale:
+            self._text = new_text
+            previous = self._count
+            self._relex_all()
+            return TokenEdit(0, previous, self.tokens()[:-1], len(new_text) - old_size, 0)
+
+        # Tokens que terminam antes do alcance do lookahead não mudam
+        limit = edit_offset - LOOKAHEAD
+
+        # Um '/*' sem fechamento vira '/' e '*', mas a regex examinou o texto
+        # até o fim; se a edição cria um '*/', o comentário passa a fechar.
+        # Esses '/*' ficam após o último '*/' do texto antigo.
+        window_end = edit_offset + len(inserted_text) + 1
+        if '*/' in new_text[max(0, edit_offset - 1):window_end]:
+            last_close = old_text.rfind('*/')
+            opener = old_text.find('/*', max(0, last_close - 1), edit_offset)
+            if opener != -1:
+                limit = min(limit, opener)
+
+        self._move_gap(limit)
+        self._text = new_text
+        self._stale = True
+
+        head, tail = self._head, self._tail
+        restart = head[-1][2] if head else 0
+        index = len(head)
+        line = 1 + self._head_newlines
+        line_start = new_text.rfind('\n', 0, restart) + 1
+
+        new_size = len(new_text)
+        edit_end = edit_offset + len(inserted_text)
+        lexer = self.lexer_class(new_text, engine=self.engine)
+        lexer.position = restart
+        inserted: List[Tuple[TokenType, int, int]] = []
+        removed = 0
+        synced = False
+
+        for token_type, start, end in lexer._scan_raw(frozenset()):
+            inserted.append((token_type, start, end))
+            if end < edit_end:
+                continue
+            # Descarta os tokens antigos que começam antes do fim deste; se
+            # algum começa exatamente aqui, o restante do texto é igual
+            end_from_end = new_size - end
+            while tail and tail[-1][1] > end_from_end:
+                tail.pop()
+                removed += 1
+            if tail and tail[-1][1] == end_from_end:
+                synced = True
+                break
+
+        if not synced:
+            removed += len(tail)
+            tail.clear()
+
+        result = []
+        for token_type, start, end in inserted:
+            result.append(Token(token_type, new_text[start:end], line, start - line_start + 1, offset=start))
+            newlines = _newlines(new_text, token_type, start, end)
+            if newlines:
+                line += newlines
+                line_start = new_text.rfind('\n', start, end) + 1
+
+        head.extend(inserted)
+        self._head_newlines = line - 1
+        self._count = len(self)
+        self._stale = False
+
+        # Os tokens seguintes não mudaram; só o texto da edição altera suas linhas
+        line_delta = (inserted_text.count('\n')
+                      - old_text.count('\n', edit_offset, edit_offset + removed_len))
+        return TokenEdit(index, removed, result, new_size - old_size, line_delta)
+
+    def _relex_all(self):
+        """Tokeniza o texto inteiro do zero"""
+        lexer = self.lexer_class(self._text, engine=self.engine)
+        self._stale = True
+        self._head = list(lexer._scan_raw(frozenset()))
+        self._tail = []
+        self._head_newlines = self._text.count('\n', 0, self._head[-1][2]) if self._head else 0
+        self._count = len(self._head)
+        self._stale = False
+
+    def _move_gap(self, limit: int):
+        """Deixa no início do buffer exatamente os tokens que terminam até limit"""
+        text = self._text
+        size = len(text)
+        head, tail = self._head, self._tail
+        while head and head[-1][2] > limit:
+            token_type, start, end = head.pop()
+            self._head_newlines -= _newlines(text, token_type, start, end)
+            tail.append((token_type, size - start, size - end))
+        while tail and size - tail[-1][2] <= limit:
+            token_type, start, end = tail.pop()
+            start, end = size - start, size - end
+            self._head_newlines += _newlines(text, token_type, start, end)
+            head.append((token_type, start, end))
+
+    def _iter_absolute(self):
+        """Percorre todos os tokens com deslocamentos absolutos"""
+        size = len(self._text)
+        yield from self._head
+        for token_type, start, end in reversed(self._tail):
+            yield token_type, size - start, size - end
@@ -1,7 +1,18 @@
+import codecs
+import mmap
 import re
 from enum import Enum
-from dataclasses import dataclass
-from typing import List, Optional, Iterator
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import islice
+from operator import methodcaller
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Iterator, Sequence, Tuple, Union
+
+# Texto fonte aceito pelo lexer: str ou um objeto bytes-like (bytes,
+# memoryview, mmap.mmap) com o código em UTF-8
+Source = Union[str, bytes, memoryview, "mmap.mmap"]
 
 
 class TokenType(Enum):
@@ -55,35 +66,893 @@ class TokenType(Enum):
     EOF = "EOF"
     WHITESPACE = "WHITESPACE"
     COMMENT = "COMMENT"
+    
+    # Trecho não reconhecido, emitido só no modo de recuperação de erros
+    ERROR = "ERROR"
+
+
+_NEWLINE = re.compile('\n')
+_NEWLINE_BYTES = re.compile(b'\n')
+_match_end = methodcaller('end')
+# Quebras de linha acrescentadas de cada vez ao índice de um LineIndex
+_STARTS_CHUNK = 1 << 16
+
+
+class LineIndex:
+    """
+    Índice das quebras de linha de um texto, para converter deslocamentos em
+    linha e coluna por busca binária.
+    
+    O índice é construído sob demanda, em uma única passada, na primeira
+    consulta; textos cujas posições nunca são consultadas não pagam nada.
+    offset e first_line descrevem onde o texto começa quando ele é um
+    trecho de um texto maior (sempre no início de uma linha); as consultas
+    usam deslocamentos absolutos. Para textos bytes-like os deslocamentos
+    são em bytes e as colunas continuam contando caracteres. path é o
+    arquivo de onde o texto veio, quando conhecido (Token.file).
+    """
+    
+    __slots__ = ('text', 'binary', 'offset', 'first_line', 'path', '_starts', '_last')
+    
+    def __init__(self, text: Source, offset: int = 0, first_line: int = 1,
+                 path: Optional[str] = None):
+        self.text = text
+        self.binary = not isinstance(text, str)
+        self.offset = offset
+        self.first_line = first_line
+        self.path = path
+        self._starts: Optional[array] = None
+        # (início da linha, deslocamento, bytes de continuação entre os dois)
+        # da última consulta em texto bytes-like
+        self._last = (0, 0, 0)
+    
+    @property
+    def starts(self) -> array:
+        """Deslocamento (relativo ao trecho) do início de cada linha"""
+        if self._starts is None:
+            newline = _NEWLINE_BYTES if self.binary else _NEWLINE
+            starts = array('Q', [0])
+            # Em blocos, sem uma lista intermediária do tamanho do texto
+            ends = map(_match_end, newline.finditer(self.text))
+            chunk = list(islice(ends, _STARTS_CHUNK))
+            while chunk:
+                starts.extend(chunk)
+                chunk = list(islice(ends, _STARTS_CHUNK))
+            self._starts = starts
+        return self._starts
+    
+    def __len__(self) -> int:
+        """Número de linhas do trecho"""
+        return len(self.starts)
+    
+    def line_of(self, offset: int) -> int:
+        """Linha (a partir de 1) que contém o deslocamento"""
+        return bisect_right(self.starts, offset - self.offset) - 1 + self.first_line
+    
+    def line_start(self, line: int) -> int:
+        """Deslocamento absoluto do início da linha"""
+        return self.starts[line - self.first_line] + self.offset
+    
+    def position(self, offset: int) -> Tuple[int, int]:
+        """(linha, coluna) do deslocamento; a coluna conta caracteres, a partir de 1"""
+        local = offset - self.offset
+        index = bisect_right(self.starts, local) - 1
+        start = self.starts[index]
+        column = local - start + 1
+        if self.binary:
+            # Tokens da mesma linha são consultados em ordem: conta só os
+            # bytes desde a consulta anterior, para que uma linha muito longa
+            # não seja percorrida de novo a cada token
+            last_start, last_local, continuation = self._last
+            if last_start == start and last_local <= local:
+                continuation += _continuation_bytes(self.text, last_local, local)
+            else:
+                continuation = _continuation_bytes(self.text, start, local)
+            self._last = (start, local, continuation)
+            column -= continuation
+        return index + self.first_line, column
+    
+    def column(self, offset: int, tab_width: int = 8) -> int:
+        """Coluna visual do deslocamento, com tabs alinhados a cada tab_width colunas"""
+        local = offset - self.offset
+        start = self.starts[bisect_right(self.starts, local) - 1]
+        prefix = self.text[start:local]
+        if self.binary:
+            prefix = str(prefix, 'utf-8', 'replace')
+        return len(prefix.expandtabs(tab_width)) + 1
+    
+    def byte_column(self, offset: int) -> int:
+        """Coluna do deslocamento contada em bytes UTF-8, a partir de 1"""
+        local = offset - self.offset
+        start = self.starts[bisect_right(self.starts, local) - 1]
+        if self.binary:
+            return local - start + 1
+        return len(self.text[start:local].encode('utf-8')) + 1
 
 
-@dataclass
 class Token:
-    """Representa um token identificado pelo lexer"""
-    type: TokenType
-    value: str
-    line: int
-    column: int
+    """
+    Representa um token identificado pelo lexer.
+    
+    offset é a posição do lexema no texto fonte. Nos tokens gerados pelo
+    lexer, linha e coluna só são calculadas (pelo LineIndex do texto) quando
+    acessadas. symbol é o id do valor em uma SymbolTable, quando o lexer usa
+    uma; não participa da comparação entre tokens.
+    """
+    __slots__ = ('type', 'value', 'offset', 'symbol', '_line', '_column', '_index')
+    
+    def __init__(self, type: TokenType, value: str, line: Optional[int] = None,
+                 column: Optional[int] = None, symbol: Optional[int] = None,
+                 offset: Optional[int] = None, index: Optional[LineIndex] = None):
+        self.type = type
+        self.value = value
+        self._line = line
+        self._column = column
+        self.symbol = symbol
+        self.offset = offset
+        self._index = index
+    
+    @property
+    def line(self) -> int:
+        if self._line is None:
+            self._resolve()
+        return self._line
+    
+    @line.setter
+    def line(self, value: int):
+        self._line = value
+    
+    @property
+    def column(self) -> int:
+        if self._column is None:
+            self._resolve()
+        return self._column
+    
+    @column.setter
+    def column(self, value: int):
+        self._column = value
+    
+    @property
+    def file(self) -> Optional[str]:
+        """Arquivo de origem do token (o path do LineIndex), se conhecido"""
+        return self._index.path if self._index is not None else None
+    
+    def _resolve(self):
+        self._line, self._column = self._index.position(self.offset)
+    
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.type, self.value, self.line, self.column) == \
+            (other.type, other.value, other.line, other.column)
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return (f"Token(type={self.type!r}, value={self.value!r}, "
+                f"line={self.line!r}, column={self.column!r})")
     
     def __str__(self):
-        if self.value and self.type in [TokenType.IDENTIFIER, TokenType.NUMBER, TokenType.STRING_LITERAL, TokenType.BOOLEAN_LITERAL]:
+        if self.value and self.type in [TokenType.IDENTIFIER, TokenType.NUMBER, TokenType.STRING_LITERAL, TokenType.BOOLEAN_LITERAL, TokenType.ERROR]:
             return f"{self.type.value}({self.value})"
         return self.type.value
 
 
+# Tipos de token na ordem dos seus ids, usados em colunas compactas como as
+# de TokenBuffer, e o id de cada tipo
+TOKEN_TYPES: List[TokenType] = list(TokenType)
+TOKEN_TYPE_IDS = {token_type: index for index, token_type in enumerate(TOKEN_TYPES)}
+
+# Tipos cujos valores são internados em uma SymbolTable
+SYMBOL_TYPES = frozenset((
+    TokenType.IDENTIFIER, TokenType.NUMBER, TokenType.STRING_LITERAL, TokenType.BOOLEAN_LITERAL,
+))
+_SYMBOL_TYPE_IDS = frozenset(TOKEN_TYPE_IDS[token_type] for token_type in SYMBOL_TYPES)
+
+# Valor da coluna de símbolos de um TokenBuffer para tokens sem símbolo
+NO_SYMBOL = 0xFFFFFFFF
+
+
+class SymbolTable:
+    """
+    Tabela de símbolos que interna os valores de identificadores e literais.
+    
+    Cada valor distinto recebe um id inteiro sequencial e é guardado uma
+    única vez: os tokens com o mesmo valor compartilham o mesmo objeto str,
+    e fases seguintes podem comparar ids em vez de strings. Uma mesma tabela
+    pode ser passada a vários Lexer (ex.: todos os arquivos de um lote).
+    """
+    
+    __slots__ = ('values', 'ids', '_ids', '_byte_ids')
+    
+    def __init__(self):
+        self.values: List[str] = []
+        # ids[i] é i, mas sempre o mesmo objeto int, compartilhado pelos tokens
+        self.ids: List[int] = []
+        self._ids = {}
+        self._byte_ids = {}
+    
+    def intern(self, value: str) -> int:
+        """Retorna o id do valor, registrando-o se ainda não existir"""
+        symbol = self._ids.get(value)
+        if symbol is None:
+            symbol = self._ids[value] = len(self.values)
+            self.values.append(value)
+            self.ids.append(symbol)
+        return symbol
+    
+    def intern_bytes(self, value) -> int:
+        """Como intern(), para um valor em UTF-8 (decodificado só na primeira vez)"""
+        value = bytes(value)
+        symbol = self._byte_ids.get(value)
+        if symbol is None:
+            symbol = self._byte_ids[value] = self.intern(str(value, 'utf-8'))
+        return symbol
+    
+    def lookup(self, value: str) -> Optional[int]:
+        """Id do valor, ou None se ele não estiver na tabela"""
+        return self._ids.get(value)
+    
+    def __getitem__(self, symbol: int) -> str:
+        return self.values[symbol]
+    
+    def __contains__(self, value: str) -> bool:
+        return value in self._ids
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def __repr__(self) -> str:
+        return f"<SymbolTable: {len(self)} símbolos>"
+
+
+class TokenBuffer:
+    """
+    Sequência compacta de tokens armazenada em colunas (arrays tipados).
+    
+    Cada token ocupa um id de tipo e o deslocamento e o tamanho do lexema no
+    texto fonte - 13 bytes, contra algumas centenas de um objeto Token. Os
+    valores não são copiados do texto e linha e coluna vêm do LineIndex do
+    texto: os objetos Token só são construídos quando um item é acessado.
+    
+    Se o texto fonte for bytes-like, os deslocamentos são em bytes e cada
+    valor só é decodificado de UTF-8 quando é pedido.
+    
+    Após attach_symbols(), uma coluna extra guarda o id de símbolo de cada
+    identificador e literal, e seus valores vêm da SymbolTable.
+    """
+    
+    __slots__ = ('source', 'binary', 'index', 'type_ids', 'starts', 'lengths',
+                 'symbols', 'symbol_table')
+    
+    def __init__(self, source: Source, index: Optional[LineIndex] = None):
+        self.source = source
+        self.binary = not isinstance(source, str)
+        self.index = index if index is not None else LineIndex(source)
+        self.type_ids = array('B')
+        self.starts = array('Q')
+        self.lengths = array('I')
+        self.symbols: Optional[array] = None
+        self.symbol_table: Optional[SymbolTable] = None
+    
+    def append(self, token_type: TokenType, start: int, end: int):
+        """Acrescenta um token descrito pela sua posição no texto fonte"""
+        self.type_ids.append(TOKEN_TYPE_IDS[token_type])
+        self.starts.append(start)
+        self.lengths.append(end - start)
+    
+    def type_at(self, index: int) -> TokenType:
+        """Tipo do token na posição index, sem construir o Token"""
+        return TOKEN_TYPES[self.type_ids[index]]
+    
+    def value_at(self, index: int) -> str:
+        """Lexema do token na posição index, sem construir o Token"""
+        if self.symbols is not None and self.symbols[index] != NO_SYMBOL:
+            return self.symbol_table.values[self.symbols[index]]
+        start = self.starts[index]
+        value = self.source[start:start + self.lengths[index]]
+        return str(value, 'utf-8') if self.binary else value
+    
+    def position_at(self, index: int) -> Tuple[int, int]:
+        """(linha, coluna) do token na posição index"""
+        return self.index.position(self.starts[index])
+    
+    def symbol_at(self, index: int) -> Optional[int]:
+        """Id de símbolo do token na posição index, ou None"""
+        if self.symbols is None or self.symbols[index] == NO_SYMBOL:
+            return None
+        return self.symbol_table.ids[self.symbols[index]]
+    
+    def attach_symbols(self, table: SymbolTable):
+        """Interna os valores de identificadores e literais em table"""
+        source = self.source
+        intern = table.intern_bytes if self.binary else table.intern
+        symbol_type_ids = _SYMBOL_TYPE_IDS
+        self.symbols = array('I', [
+            intern(source[start:start + length]) if type_id in symbol_type_ids else NO_SYMBOL
+            for type_id, start, length in zip(self.type_ids, self.starts, self.lengths)
+        ])
+        self.symbol_table = table
+    
+    def __len__(self) -> int:
+        return len(self.type_ids)
+    
+    @classmethod
+    def from_arrays(cls, source: Source, arrays: Tuple[array, ...],
+                    index: Optional[LineIndex] = None) -> 'TokenBuffer':
+        """Cria um buffer a partir das colunas, na ordem de arrays()"""
+        buffer = cls(source, index)
+        buffer.type_ids, buffer.starts, buffer.lengths = arrays
+        return buffer
+    
+    def arrays(self) -> Tuple[array, ...]:
+        """Colunas do buffer: ids de tipo, inícios e tamanhos"""
+        return (self.type_ids, self.starts, self.lengths)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            sliced = TokenBuffer.from_arrays(self.source, tuple(data[index] for data in self.arrays()),
+                                             self.index)
+            if self.symbols is not None:
+                sliced.symbols = self.symbols[index]
+                sliced.symbol_table = self.symbol_table
+            return sliced
+        
+        if index < 0:
+            index += len(self)
+        return Token(
+            TOKEN_TYPES[self.type_ids[index]],
+            self.value_at(index),
+            None,
+            None,
+            self.symbol_at(index),
+            self.starts[index],
+            self.index,
+        )
+    
+    def __iter__(self) -> Iterator[Token]:
+        if self.symbols is not None:
+            yield from self._iter_symbols()
+            return
+        source = self.source
+        binary = self.binary
+        index = self.index
+        types = TOKEN_TYPES
+        for type_id, start, length in zip(self.type_ids, self.starts, self.lengths):
+            value = source[start:start + length]
+            if binary:
+                value = str(value, 'utf-8')
+            yield Token(types[type_id], value, None, None, None, start, index)
+    
+    def _iter_symbols(self) -> Iterator[Token]:
+        source = self.source
+        binary = self.binary
+        index = self.index
+        types = TOKEN_TYPES
+        values = self.symbol_table.values
+        ids = self.symbol_table.ids
+        for type_id, start, length, symbol in zip(self.type_ids, self.starts, self.lengths, self.symbols):
+            if symbol != NO_SYMBOL:
+                yield Token(types[type_id], values[symbol], None, None, ids[symbol], start, index)
+                continue
+            value = source[start:start + length]
+            if binary:
+                value = str(value, 'utf-8')
+            yield Token(types[type_id], value, None, None, None, start, index)
+    
+    def __repr__(self) -> str:
+        return f"<TokenBuffer: {len(self)} tokens>"
+
+
+def _fill_buffer(buffer: TokenBuffer, raw: Iterator[Tuple[TokenType, int, int]], base: int = 0):
+    """Acrescenta ao buffer as tuplas geradas por um engine, deslocadas de base"""
+    type_ids, starts, lengths = buffer.type_ids, buffer.starts, buffer.lengths
+    ids = TOKEN_TYPE_IDS
+    for token_type, start, end in raw:
+        type_ids.append(ids[token_type])
+        starts.append(start + base)
+        lengths.append(end - start)
+
+
+def _intern_tokens(tokens: List[Token], table: SymbolTable):
+    """Troca os valores de identificadores e literais pelos da tabela"""
+    intern = table.intern
+    values = table.values
+    symbol_types = SYMBOL_TYPES
+    for token in tokens:
+        if token.type in symbol_types:
+            symbol = intern(token.value)
+            token.value = values[symbol]
+            token.symbol = symbol
+
+
 class LexerError(Exception):
     """Exceção para erros do analisador léxico"""
-    def __init__(self, message: str, line: int, column: int):
+    def __init__(self, message: str, line: int, column: int, offset: Optional[int] = None):
         self.message = message
         self.line = line
         self.column = column
+        self.offset = offset
         super().__init__(f"Erro léxico na linha {line}, coluna {column}: {message}")
 
 
-class Lexer:
-    """Analisador léxico para uma linguagem simples"""
+_CONTINUATION_BYTES = bytes(range(0x80, 0xC0))
+
+
+def _continuation_bytes(data: Source, start: int, end: int) -> int:
+    """Conta os bytes de continuação UTF-8 em data[start:end]"""
+    chunk = bytes(data[start:end])
+    if chunk.isascii():
+        return 0
+    return len(chunk) - len(chunk.translate(None, _CONTINUATION_BYTES))
+
+
+def _char_at(data: Source, pos: int) -> str:
+    """Decodifica o caractere que começa em data[pos] (str ou bytes-like)"""
+    if isinstance(data, str):
+        return data[pos]
+    return str(bytes(data[pos:pos + 4]), 'utf-8', 'replace')[0]
+
+
+def _resolve_in_order(tokens: Iterator[Token], data: Source) -> Iterator[Token]:
+    """
+    Resolve linha e coluna de tokens em ordem crescente de deslocamento
+    sobre um texto bytes-like, acompanhando a linha corrente: só o trecho
+    entre um token e o seguinte é percorrido, sem o LineIndex do texto
+    inteiro, e a memória não cresce com o tamanho do texto.
+    """
+    line = 1
+    line_start = 0
+    # Até onde as quebras de linha e os bytes de continuação da linha
+    # corrente já foram contados
+    scanned = 0
+    counted = 0
+    continuation = 0
+    for token in tokens:
+        offset = token.offset
+        last = data.rfind(b'\n', scanned, offset)
+        if last != -1:
+            line += bytes(data[scanned:last + 1]).count(b'\n')
+            line_start = counted = last + 1
+            continuation = 0
+        scanned = offset
+        continuation += _continuation_bytes(data, counted, offset)
+        counted = offset
+        token._line = line
+        token._column = offset - line_start + 1 - continuation
+        token._index = None
+        yield token
+
+
+@lru_cache(maxsize=None)
+def _compile_master(patterns: Tuple[Tuple[str, TokenType], ...],
+                    binary: bool = False) -> Tuple["re.Pattern", List[Optional[TokenType]]]:
+    """
+    Compila todos os padrões em uma única alternância com grupos nomeados.
+    
+    A alternância do módulo re é ordenada, então a primeira alternativa que
+    casa vence - a mesma precedência do loop sobre TOKEN_PATTERNS. Retorna a
+    regex e uma tabela que mapeia o índice do grupo externo (m.lastindex)
+    para o tipo de token. Com binary=True a regex é compilada para bytes.
+    """
+    source = '|'.join(
+        f'(?P<T{i}>{pattern})' for i, (pattern, _) in enumerate(patterns)
+    )
+    regex = re.compile(source.encode('utf-8') if binary else source)
+    group_types: List[Optional[TokenType]] = [None] * (regex.groups + 1)
+    for name, index in regex.groupindex.items():
+        group_types[index] = patterns[int(name[1:])][1]
+    return regex, group_types
+
+
+@lru_cache(maxsize=None)
+def _master_tables(patterns: Tuple[Tuple[str, TokenType], ...], delimited: Tuple[Tuple[str, str], ...],
+                   dead: frozenset, binary: bool):
+    """
+    Regex mestre sem os padrões em dead e, para cada grupo que pode casar no
+    início de um padrão delimitado vivo de maior precedência, esses padrões
+    com seus delimitadores iniciais. A chave None lista todos os
+    delimitados vivos, para posições em que nada casa.
+    """
+    live = tuple(item for item in patterns if item[0] not in dead)
+    regex, group_types = _compile_master(live, binary)
+    openers = dict(delimited)
+    suspects: Dict[Optional[int], Tuple[Tuple[Source, str], ...]] = {}
+    earlier: List[Tuple[Source, str]] = []
+    for i, (pattern, _) in enumerate(live):
+        opener = openers.get(pattern)
+        if opener is not None:
+            earlier.append((opener.encode('utf-8') if binary else opener, pattern))
+            continue
+        candidates = tuple(item for item in earlier
+                           if re.match(pattern, item[0].decode('utf-8') if binary else item[0]))
+        if candidates:
+            suspects[regex.groupindex[f'T{i}']] = candidates
+    suspects[None] = tuple(earlier)
+    return regex, group_types, suspects
+
+
+@lru_cache(maxsize=None)
+def _string_prefix(quote: str, binary: bool) -> "re.Pattern":
+    """Regex do trecho que uma string iniciada em quote percorre antes de fechar ou falhar"""
+    source = _string_prefix_pattern(quote)
+    return re.compile(source.encode('utf-8') if binary else source)
+
+
+def _string_prefix_pattern(quote: str) -> str:
+    body = f'[^{_class_literal(quote)}\\\\]*'
+    return f'{_literal(quote)}{body}(?:\\\\.{body})*'
+
+
+def _failed_openers(text: Source, pos: int, candidates) -> frozenset:
+    """Padrões delimitados cujo delimitador inicial está em pos (e que não casaram)"""
+    return frozenset(pattern for opener, pattern in candidates
+                     if text[pos:pos + len(opener)] == opener)
+
+
+def _next_char(text: Source, pos: int) -> int:
+    """Início do caractere seguinte ao de pos (em bytes-like, pula a continuação UTF-8)"""
+    pos += 1
+    if not isinstance(text, str):
+        end = len(text)
+        while pos < end and 0x80 <= text[pos] < 0xC0:
+            pos += 1
+    return pos
+
+
+# Classes (\d, \w, \s, \b) que, em uma regex bytes, só reconhecem ASCII
+_UNICODE_CLASSES = re.compile(r'(?<!\\)(?:\\\\)*\\[dDwWsSbB]')
+_HIGH_BYTE = re.compile(b'[\x80-\xff]')
+# Comentários e strings casam byte a byte, sem depender dessas classes
+_DELIMITED_TYPES = frozenset((TokenType.COMMENT, TokenType.STRING_LITERAL))
+# Bytes decodificados de cada vez para casar a regex str (cresce se o
+# token chegar ao fim do trecho)
+_DECODED_WINDOW = 64
+
+
+class _DecodedMatch:
+    """Resultado da regex str sobre um trecho decodificado, em deslocamentos de bytes"""
+    
+    __slots__ = ('lastindex', '_end', '_value')
+    
+    def __init__(self, lastindex: int, end: int, value: bytes):
+        self.lastindex = lastindex
+        self._end = end
+        self._value = value
+    
+    def end(self) -> int:
+        return self._end
+    
+    def group(self) -> bytes:
+        return self._value
+
+
+def _match_decoded(regex: "re.Pattern", data: Source, pos: int) -> Optional[_DecodedMatch]:
+    """
+    Casa a regex mestre str no texto bytes-like a partir de pos, decodificando
+    só o necessário. None se nada casa ou se o trecho não é UTF-8 válido.
+    """
+    end = len(data)
+    size = _DECODED_WINDOW
+    while True:
+        stop = min(pos + size, end)
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            # Um caractere cortado no fim do trecho fica no decodificador
+            window = decoder.decode(bytes(data[pos:stop]), final=stop == end)
+        except UnicodeDecodeError:
+            return None
+        m = regex.match(window)
+        if m is None:
+            return None
+        if m.end() < len(window) or stop == end:
+            value = m.group().encode('utf-8')
+            return _DecodedMatch(m.lastindex, pos + len(value), value)
+        size *= 4
+
+
+@lru_cache(maxsize=None)
+def _spec_fingerprint(key: tuple) -> str:
+    import hashlib
+    spec = repr((key, [token_type.name for token_type in TOKEN_TYPES]))
+    return hashlib.sha256(spec.encode('utf-8')).hexdigest()
+
+
+_REGEX_SPECIAL = frozenset('.^$*+?{}[]\\|()')
+
+
+def _literal(text: str) -> str:
+    """Padrão que casa text literalmente"""
+    return ''.join('\\' + char if char in _REGEX_SPECIAL else char for char in text)
+
+
+def _class_literal(char: str) -> str:
+    """Escapa um caractere para uso dentro de uma classe [...]"""
+    return '\\' + char if char in '\\]^-[' else char
+
+
+@lru_cache(maxsize=None)
+def _loop_table(patterns: Tuple[Tuple[str, TokenType], ...], delimited: Tuple[Tuple[str, str], ...]):
+    """Padrões compilados um a um, com o delimitador inicial dos delimitados"""
+    openers = dict(delimited)
+    return tuple((pattern, re.compile(pattern), token_type, openers.get(pattern))
+                 for pattern, token_type in patterns)
+
+
+class CompiledSpec(NamedTuple):
+    """
+    Forma compilada e imutável de um LexerSpec. Especificações iguais
+    compartilham a mesma instância (ver LexerSpec.compile).
+    """
+    patterns: Tuple[Tuple[str, TokenType], ...]
+    keywords: Mapping[str, TokenType]
+    keywords_bytes: Mapping[bytes, TokenType]
+    delimited: Tuple[Tuple[str, str], ...]
+    line_comments: Tuple[str, ...]
+    block_comments: Tuple[Tuple[str, str], ...]
+    strings: Tuple[str, ...]
+    key: tuple
+    # Padrão de cada tipo de string -> aspa
+    quotes: Mapping[str, str]
+    # Algum padrão usa classes que, compiladas para bytes, só reconhecem ASCII
+    unicode_classes: bool
+    
+    def tables(self, dead: frozenset = frozenset(), binary: bool = False):
+        """Regex mestre e tabelas sem os padrões delimitados em dead"""
+        return _master_tables(self.patterns, self.delimited, dead, binary)
+    
+    def loop_table(self):
+        """Tuplas (padrão, regex, tipo, delimitador inicial) para o engine 'loop'"""
+        return _loop_table(self.patterns, self.delimited)
+    
+    def revival(self, pattern: str, text: Source, pos: int) -> int:
+        """
+        Posição a partir da qual um padrão delimitado que falhou em pos pode
+        voltar a casar (len(text) se ele falha em todo o resto do texto).
+        
+        Um comentário de bloco só falha sem o fechamento, e então falha em
+        qualquer posição seguinte. Uma string também falha em um '\\' seguido
+        de quebra de linha (o escape não a inclui): qualquer string da mesma
+        aspa que comece antes desse ponto para nele, mas uma depois dele pode
+        casar.
+        """
+        quote = self.quotes.get(pattern)
+        end = len(text)
+        if quote is None:
+            return end
+        stop = _string_prefix(quote, not isinstance(text, str)).match(text, pos).end()
+        # Em stop está o '\' da falha; sem ele (fim do texto) não há fechamento
+        return stop + 1 if stop + 1 < end else end
+    
+    def fingerprint(self) -> str:
+        """Hash da especificação, usado nas chaves do cache de tokens"""
+        return _spec_fingerprint(self.key)
+
+
+_SPEC_FIELDS = ('keywords', 'operators', 'literals', 'strings', 'line_comments',
+                'block_comments', 'identifier', 'whitespace')
+
+
+class LexerSpec:
+    """
+    Descrição de um dialeto da linguagem: palavras-chave, operadores, regras
+    de literais e estilos de comentário e de string.
+    
+    Os padrões são gerados nesta ordem de precedência: comentários de linha,
+    comentários de bloco, strings, literais (na ordem dada), operadores (os
+    mais longos primeiro), identificadores, whitespace e quebra de linha.
+    Os tipos de token são os de TokenType.
+    """
+    
+    def __init__(self, keywords: Mapping[str, TokenType] = (),
+                 operators: Sequence[Tuple[str, TokenType]] = (),
+                 literals: Sequence[Tuple[str, TokenType]] = (),
+                 strings: Sequence[str] = (),
+                 line_comments: Sequence[str] = (),
+                 block_comments: Sequence[Tuple[str, str]] = (),
+                 identifier: str = r'[a-zA-Z_][a-zA-Z0-9_]*',
+                 whitespace: str = r'[ \t]+'):
+        """
+        Args:
+            keywords: Palavras reservadas e seus tipos; são reconhecidas
+                como identificadores e então reclassificadas
+            operators: Operadores e pontuação, como texto literal
+            literals: Regras (regex, tipo) para literais como números
+            strings: Caracteres de aspas; '\\' escapa o caractere seguinte
+            line_comments: Delimitadores de comentário até o fim da linha
+            block_comments: Pares (abertura, fechamento) de comentários de bloco
+            identifier: Regex dos identificadores
+            whitespace: Regex do whitespace (sem a quebra de linha)
+        """
+        self.keywords = MappingProxyType(dict(keywords))
+        self.operators = tuple(sorted(((text, token_type) for text, token_type in operators),
+                                      key=lambda item: -len(item[0])))
+        self.literals = tuple((pattern, token_type) for pattern, token_type in literals)
+        self.strings = tuple(strings)
+        self.line_comments = tuple(line_comments)
+        self.block_comments = tuple((opener, closer) for opener, closer in block_comments)
+        self.identifier = identifier
+        self.whitespace = whitespace
+        
+        token_types = [*self.keywords.values(), *(t for _, t in self.operators), *(t for _, t in self.literals)]
+        for token_type in token_types:
+            if not isinstance(token_type, TokenType):
+                raise ValueError(f"Tipo de token inválido: {token_type!r}")
+        delimiters = [text for text, _ in self.operators] + list(self.line_comments)
+        delimiters += [text for pair in self.block_comments for text in pair]
+        if not all(delimiters):
+            raise ValueError("Operadores e delimitadores de comentário não podem ser vazios")
+        for quote in self.strings:
+            if len(quote) != 1 or quote == '\\':
+                raise ValueError(f"Aspas devem ser um único caractere diferente de '\\': {quote!r}")
+        
+        self.key = (
+            tuple(sorted((word, token_type.name) for word, token_type in self.keywords.items())),
+            tuple((text, token_type.name) for text, token_type in self.operators),
+            tuple((pattern, token_type.name) for pattern, token_type in self.literals),
+            self.strings, self.line_comments, self.block_comments, identifier, whitespace,
+        )
+        self._compiled: Optional[CompiledSpec] = None
+    
+    def __eq__(self, other):
+        if not isinstance(other, LexerSpec):
+            return NotImplemented
+        return self.key == other.key
+    
+    def __hash__(self):
+        return hash(self.key)
+    
+    def __reduce__(self):
+        # Enviada a processos (tokenização paralela) pela forma em JSON; a
+        # compilação é refeita, e memorizada, em cada processo
+        return type(self).from_dict, (self.to_dict(),)
+    
+    def __repr__(self):
+        return (f"LexerSpec({len(self.keywords)} palavras-chave, "
+                f"{len(self.operators)} operadores, {len(self.literals)} literais)")
+    
+    # Padrões delimitados na forma "desenrolada": cada caractere do corpo é
+    # consumido por uma classe sem alternância nem quantificador preguiçoso,
+    # então o match (ou a falha, sem o fechamento) é linear no tamanho do
+    # trecho e várias vezes mais rápido em strings e comentários longos
+    
+    def _string_pattern(self, quote: str) -> str:
+        return _string_prefix_pattern(quote) + _literal(quote)
+    
+    def _block_pattern(self, opener: str, closer: str) -> str:
+        first, rest = closer[0], closer[1:]
+        body = f'[^{_class_literal(first)}]*'
+        # Um primeiro caractere do fechamento que não o completa é corpo
+        inner = f'(?:{_literal(first)}(?!{_literal(rest)}){body})*' if rest else ''
+        return f'{_literal(opener)}{body}{inner}{_literal(closer)}'
+    
+    def patterns(self) -> List[Tuple[str, TokenType]]:
+        """Padrões (regex, tipo) em ordem de precedência"""
+        patterns = [(_literal(opener) + '.*', TokenType.COMMENT) for opener in self.line_comments]
+        patterns += [(self._block_pattern(opener, closer), TokenType.COMMENT)
+                     for opener, closer in self.block_comments]
+        patterns += [(self._string_pattern(quote), TokenType.STRING_LITERAL) for quote in self.strings]
+        patterns += self.literals
+        patterns += [(_literal(text), token_type) for text, token_type in self.operators]
+        patterns += [
+            (self.identifier, TokenType.IDENTIFIER),
+            (self.whitespace, TokenType.WHITESPACE),
+            (r'\n', TokenType.NEWLINE),
+        ]
+        return patterns
+    
+    def delimited(self) -> List[Tuple[str, str]]:
+        """
+        Padrões delimitados e seus delimitadores iniciais. Sem o delimitador
+        final, a regex percorre o resto do texto antes de falhar; como ela
+        também falha nas posições seguintes até o ponto da falha (ver
+        CompiledSpec.revival), o padrão é descartado até ali em vez de
+        reexaminar o texto a cada ocorrência.
+        """
+        delimited = [(self._block_pattern(opener, closer), opener) for opener, closer in self.block_comments]
+        delimited += [(self._string_pattern(quote), quote) for quote in self.strings]
+        return delimited
+    
+    def compile(self) -> CompiledSpec:
+        """
+        Gera os padrões e as tabelas usadas pelos engines. O resultado é
+        memorizado pelo hash da especificação: especificações iguais (mesmo
+        que carregadas separadamente) compartilham a mesma compilação, e a
+        regex mestre de cada uma é compilada uma única vez por processo.
+        """
+        compiled = self._compiled
+        if compiled is None:
+            compiled = self._compiled = _compile_spec(self)
+        return compiled
     
-    KEYWORDS = {
+    def fingerprint(self) -> str:
+        """Hash da especificação, usado nas chaves do cache de tokens"""
+        return _spec_fingerprint(self.key)
+    
+    def to_dict(self) -> Dict:
+        """Representação em tipos JSON, com os tipos de token pelo nome"""
+        return {
+            'keywords': {word: token_type.name for word, token_type in self.keywords.items()},
+            'operators': {text: token_type.name for text, token_type in self.operators},
+            'literals': [[pattern, token_type.name] for pattern, token_type in self.literals],
+            'strings': list(self.strings),
+            'line_comments': list(self.line_comments),
+            'block_comments': [list(pair) for pair in self.block_comments],
+            'identifier': self.identifier,
+            'whitespace': self.whitespace,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "LexerSpec":
+        """
+        Cria uma especificação a partir de um dicionário no formato de
+        to_dict(). Campos ausentes mantêm os valores da especificação padrão.
+        """
+        unknown = sorted(set(data) - set(_SPEC_FIELDS))
+        if unknown:
+            raise ValueError(f"Campos desconhecidos na especificação: {', '.join(unknown)}")
+        fields = DEFAULT_SPEC.to_dict()
+        fields.update(data)
+        
+        def token_type(name) -> TokenType:
+            try:
+                return TokenType[name]
+            except (KeyError, TypeError):
+                raise ValueError(f"Tipo de token desconhecido: {name!r}") from None
+        
+        try:
+            return cls(
+                keywords={word: token_type(name) for word, name in fields['keywords'].items()},
+                operators=[(text, token_type(name)) for text, name in fields['operators'].items()],
+                literals=[(pattern, token_type(name)) for pattern, name in fields['literals']],
+                strings=fields['strings'],
+                line_comments=fields['line_comments'],
+                block_comments=fields['block_comments'],
+                identifier=fields['identifier'],
+                whitespace=fields['whitespace'],
+            )
+        except (AttributeError, TypeError) as e:
+            raise ValueError(f"Especificação malformada: {e}") from None
+    
+    @classmethod
+    def from_file(cls, path) -> "LexerSpec":
+        """Carrega uma especificação de um arquivo JSON (ver from_dict)"""
+        import json
+        with open(path, 'r', encoding='utf-8') as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}: JSON inválido: {e}") from None
+        if not isinstance(data, dict):
+            raise ValueError(f"{path}: a especificação deve ser um objeto JSON")
+        return cls.from_dict(data)
+
+
+@lru_cache(maxsize=None)
+def _compile_spec(spec: LexerSpec) -> CompiledSpec:
+    patterns = tuple(spec.patterns())
+    for pattern, _ in patterns:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Padrão inválido {pattern!r}: {e}") from None
+    keywords = dict(spec.keywords)
+    return CompiledSpec(
+        patterns=patterns,
+        keywords=MappingProxyType(keywords),
+        keywords_bytes=MappingProxyType({word.encode('utf-8'): t for word, t in keywords.items()}),
+        delimited=tuple(spec.delimited()),
+        line_comments=spec.line_comments,
+        block_comments=spec.block_comments,
+        strings=spec.strings,
+        key=spec.key,
+        quotes=MappingProxyType({spec._string_pattern(quote): quote for quote in spec.strings}),
+        unicode_classes=any(_UNICODE_CLASSES.search(pattern) for pattern, _ in patterns),
+    )
+
+
+DEFAULT_SPEC = LexerSpec(
+    keywords={
         'int': TokenType.INT,
         'float': TokenType.FLOAT,
         'string': TokenType.STRING,
@@ -99,118 +968,1004 @@ class Lexer:
         'and': TokenType.AND,
         'or': TokenType.OR,
         'not': TokenType.NOT,
-    }
-    
-    TOKEN_PATTERNS = [
-        (r'//.*', TokenType.COMMENT),
-        (r'/\*[\s\S]*?\*/', TokenType.COMMENT),
+    },
+    operators=[
+        ('==', TokenType.EQUAL),
+        ('!=', TokenType.NOT_EQUAL),
+        ('<=', TokenType.LESS_EQUAL),
+        ('>=', TokenType.GREATER_EQUAL),
+        ('<', TokenType.LESS_THAN),
+        ('>', TokenType.GREATER_THAN),
         
-        (r'"([^"\\]|\\.)*"', TokenType.STRING_LITERAL),
-        (r"'([^'\\]|\\.)*'", TokenType.STRING_LITERAL),
+        ('=', TokenType.ASSIGN),
+        ('+', TokenType.PLUS),
+        ('-', TokenType.MINUS),
+        ('*', TokenType.MULTIPLY),
+        ('/', TokenType.DIVIDE),
+        ('%', TokenType.MODULO),
         
+        (';', TokenType.SEMICOLON),
+        (',', TokenType.COMMA),
+        ('(', TokenType.LEFT_PAREN),
+        (')', TokenType.RIGHT_PAREN),
+        ('{', TokenType.LEFT_BRACE),
+        ('}', TokenType.RIGHT_BRACE),
+        ('[', TokenType.LEFT_BRACKET),
+        (']', TokenType.RIGHT_BRACKET),
+    ],
+    literals=[
         (r'\d+\.\d+', TokenType.NUMBER),
         (r'\d+', TokenType.NUMBER),
-        
-        (r'==', TokenType.EQUAL),
-        (r'!=', TokenType.NOT_EQUAL),
-        (r'<=', TokenType.LESS_EQUAL),
-        (r'>=', TokenType.GREATER_EQUAL),
-        (r'<', TokenType.LESS_THAN),
-        (r'>', TokenType.GREATER_THAN),
-        
-        (r'=', TokenType.ASSIGN),
-        (r'\+', TokenType.PLUS),
-        (r'-', TokenType.MINUS),
-        (r'\*', TokenType.MULTIPLY),
-        (r'/', TokenType.DIVIDE),
-        (r'%', TokenType.MODULO),
-        
-        (r';', TokenType.SEMICOLON),
-        (r',', TokenType.COMMA),
-        (r'\(', TokenType.LEFT_PAREN),
-        (r'\)', TokenType.RIGHT_PAREN),
-        (r'\{', TokenType.LEFT_BRACE),
-        (r'\}', TokenType.RIGHT_BRACE),
-        (r'\[', TokenType.LEFT_BRACKET),
-        (r'\]', TokenType.RIGHT_BRACKET),
-        
-        (r'[a-zA-Z_][a-zA-Z0-9_]*', TokenType.IDENTIFIER),
-        
-        (r'[ \t]+', TokenType.WHITESPACE),
-        (r'\n', TokenType.NEWLINE),
-    ]
-    
-    def __init__(self, text: str):
+    ],
+    strings=('"', "'"),
+    line_comments=('//',),
+    block_comments=(('/*', '*/'),),
+)
+
+
+@lru_cache(maxsize=None)
+def _generated_scanners() -> Mapping[str, object]:
+    """
+    Scanners gerados por src.codegen (src/_generated_scanner.py), pela
+    chave da especificação; vazio se o módulo não foi gerado
+    """
+    try:
+        from src._generated_scanner import SCANNERS
+    except ImportError:
+        return {}
+    return SCANNERS
+
+
+class Lexer:
+    """Analisador léxico para uma linguagem simples"""
+    
+    # Especificação usada quando nenhuma é passada ao construtor
+    SPEC = DEFAULT_SPEC
+    
+    # Palavras-chave e padrões da especificação padrão, em ordem de
+    # precedência (a especificação em uso fica em self.compiled)
+    KEYWORDS = dict(DEFAULT_SPEC.keywords)
+    TOKEN_PATTERNS = list(DEFAULT_SPEC.patterns())
+    DELIMITED_PATTERNS = dict(DEFAULT_SPEC.delimited())
+    
+    ENGINES = ('master', 'loop')
+    
+    # Se True, o engine 'master' usa o scanner gerado por src.codegen para
+    # a especificação em uso, quando existe, em textos str
+    GENERATED = True
+    
+    def __init__(self, text: Source, engine: str = 'master', cache=None,
+                 symbols: Optional[SymbolTable] = None, recover: bool = False,
+                 max_errors: int = 100, spec: Optional[LexerSpec] = None):
+        """
+        Args:
+            text: O código fonte para analisar. Pode ser str ou um objeto
+                bytes-like em UTF-8 (bytes, memoryview, mmap.mmap); nesse caso
+                o texto não é copiado nem decodificado, e só os valores dos
+                tokens emitidos são decodificados
+            engine: 'master' usa uma única regex pré-compilada com todos os
+                padrões; 'loop' testa os padrões um a um (implementação de
+                referência)
+            cache: TokenCache (ou o caminho do diretório de um) onde
+                tokenize() procura e guarda os resultados, indexados pelo
+                hash do texto
+            symbols: SymbolTable onde os valores de identificadores e
+                literais são internados; os tokens recebem o id em symbol
+            recover: Se True, trechos não reconhecidos viram tokens ERROR e
+                a análise continua; os erros ficam em self.errors (até
+                max_errors) e o total em self.error_count
+            spec: LexerSpec do dialeto a analisar (padrão: self.SPEC). A
+                compilação é compartilhada entre instâncias com a mesma
+                especificação
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Engine desconhecido: {engine!r} (opções: {', '.join(self.ENGINES)})")
+        self.binary = not isinstance(text, str)
+        if self.binary and engine != 'master':
+            raise ValueError(f"Engine {engine!r} não suporta entrada binária")
         self.text = text
+        self.engine = engine
         self.position = 0
-        self.line = 1
-        self.column = 1
+        self.index = LineIndex(text)
         self.tokens: List[Token] = []
+        if cache is not None and not hasattr(cache, 'get'):
+            from src.cache import TokenCache
+            cache = TokenCache.open(cache)
+        self.cache = cache
+        self.symbols = symbols
+        self.recover = recover
+        self.max_errors = max_errors
+        self.errors: List[LexerError] = []
+        self.error_count = 0
+        self.spec = spec if spec is not None else self.SPEC
+        self.compiled = self.spec.compile()
     
-    def tokenize(self, skip_whitespace: bool = True, skip_comments: bool = True) -> List[Token]:
+    @property
+    def line(self) -> int:
+        """Linha da posição atual (self.position)"""
+        return self.index.line_of(self.position)
+    
+    @property
+    def column(self) -> int:
+        """Coluna da posição atual (self.position)"""
+        return self.index.position(self.position)[1]
+    
+    # Tamanho mínimo de cada região na tokenização paralela; abaixo disso o
+    # custo de iniciar processos supera o ganho
+    PARALLEL_MIN_REGION = 1 << 18
+    
+    def tokenize(self, skip_whitespace: bool = True, skip_comments: bool = True,
+                 as_buffer: bool = False, parallel: int = 0,
+                 profile=None) -> Union[List[Token], TokenBuffer]:
         """
         Analisa o texto e retorna uma lista de tokens
         
         Args:
             skip_whitespace: Se True, remove tokens de whitespace da saída
             skip_comments: Se True, remove tokens de comentário da saída
+            as_buffer: Se True, retorna um TokenBuffer compacto em vez de uma
+                lista de Token
+            parallel: Se maior que 1, divide o texto em até parallel regiões
+                (em quebras de linha fora de comentários e strings) e as
+                tokeniza em processos separados. O resultado é idêntico ao
+                da tokenização sequencial.
+            profile: Um LexerProfile (src.profiling) que recebe contagens por
+                padrão e tempos por tipo de token e por região. A
+                tokenização instrumentada é sequencial e ignora o cache.
+        
+        No modo de recuperação (recover=True) a tokenização também é
+        sequencial e não usa o cache.
         """
-        self.tokens = []
+        if profile is not None or self.recover:
+            result = self._tokenize(skip_whitespace, skip_comments, as_buffer, 0, profile)
+        elif self.cache is not None:
+            result = self._tokenize_cached(skip_whitespace, skip_comments, as_buffer, parallel)
+        else:
+            result = self._tokenize(skip_whitespace, skip_comments, as_buffer, parallel)
+        
+        if self.symbols is not None:
+            if as_buffer:
+                result.attach_symbols(self.symbols)
+            else:
+                _intern_tokens(result, self.symbols)
+        return result
+    
+    def _tokenize(self, skip_whitespace: bool, skip_comments: bool, as_buffer: bool,
+                  parallel: int, profile=None) -> Union[List[Token], TokenBuffer]:
         self.position = 0
-        self.line = 1
-        self.column = 1
+        self.errors = []
+        self.error_count = 0
+        text = self.text
+        index = self.index
+        skipped = self._skipped_types(skip_whitespace, skip_comments)
+        
+        regions = 1
+        if parallel > 1 and not self.binary and not self.recover:
+            regions = min(parallel, len(text) // self.PARALLEL_MIN_REGION)
+        
+        if profile is not None:
+            raw = profile.scan(self, skipped)
+        else:
+            raw = self._scan_raw(skipped)
+        
+        if regions > 1:
+            buffer = self._tokenize_parallel(regions, skip_whitespace, skip_comments)
+        elif as_buffer:
+            buffer = TokenBuffer(text, index)
+            _fill_buffer(buffer, raw)
+        else:
+            buffer = None
+        
+        if buffer is not None:
+            buffer.append(TokenType.EOF, len(text), len(text))
+            self.tokens = buffer if as_buffer else list(buffer)
+            return self.tokens
+        
+        if self.binary:
+            self.tokens = [Token(token_type, str(text[start:end], 'utf-8'), None, None, None, start, index)
+                           for token_type, start, end in raw]
+        else:
+            self.tokens = [Token(token_type, text[start:end], None, None, None, start, index)
+                           for token_type, start, end in raw]
+        self.tokens.append(Token(TokenType.EOF, "", None, None, None, len(text), index))
+        return self.tokens
+    
+    def _tokenize_cached(self, skip_whitespace: bool, skip_comments: bool, as_buffer: bool,
+                         parallel: int) -> Union[List[Token], TokenBuffer]:
+        """Consulta o cache antes de tokenizar e guarda o resultado (ou o erro)"""
+        from src.cache import CacheEntry
+        
+        cache = self.cache
+        key = cache.make_key(self.text, self.compiled.fingerprint(), self.binary,
+                             skip_whitespace, skip_comments)
+        entry = cache.get(key)
+        if entry is not None:
+            if entry.error is not None:
+                message, line, column, self.position = entry.error
+                raise LexerError(message, line, column, self.position)
+            self.position = len(self.text)
+            buffer = TokenBuffer.from_arrays(self.text, entry.arrays, self.index)
+            self.tokens = buffer if as_buffer else list(buffer)
+            return self.tokens
+        
+        try:
+            buffer = self._tokenize(skip_whitespace, skip_comments, True, parallel)
+        except LexerError as e:
+            cache.put(key, CacheEntry(error=(e.message, e.line, e.column, e.offset)))
+            raise
+        cache.put(key, CacheEntry(buffer.arrays()))
+        if not as_buffer:
+            self.tokens = list(buffer)
+        return self.tokens
+    
+    @classmethod
+    def spec_fingerprint(cls) -> str:
+        """Hash da especificação léxica padrão da classe (cls.SPEC)"""
+        return cls.SPEC.fingerprint()
+    
+    def _tokenize_parallel(self, regions: int, skip_whitespace: bool, skip_comments: bool) -> TokenBuffer:
+        """
+        Tokeniza regiões independentes do texto em um pool de processos e
+        junta os resultados.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from itertools import repeat
+        
+        text = self.text
+        starts = _BoundaryScanner(self.compiled).split_points(text, regions)
+        bounds = list(zip(starts, starts[1:] + [len(text)]))
+        buffer = TokenBuffer(text, self.index)
+        
+        with ProcessPoolExecutor(max_workers=len(bounds)) as executor:
+            results = executor.map(
+                _lex_region, repeat(type(self)), repeat(self.spec), repeat(self.engine),
+                (text[start:end] for start, end in bounds),
+                (start for start, _ in bounds),
+                repeat(skip_whitespace), repeat(skip_comments),
+            )
+            for error, columns in results:
+                if error is not None:
+                    message, self.position = error
+                    raise LexerError(message, *self.index.position(self.position), self.position)
+                
+                type_ids, offsets, lengths = columns
+                buffer.type_ids.extend(type_ids)
+                buffer.starts.extend(offsets)
+                buffer.lengths.extend(lengths)
+        
+        self.position = len(text)
+        return buffer
+    
+    def iter_tokens(self, skip_whitespace: bool = True, skip_comments: bool = True) -> Iterator[Token]:
+        """
+        Gera os tokens sob demanda, na mesma ordem de tokenize(), terminando
+        com o token EOF. Não guarda os tokens em self.tokens.
+        """
+        self.position = 0
+        self.errors = []
+        self.error_count = 0
+        yield from self._scan(skip_whitespace, skip_comments)
+        yield Token(TokenType.EOF, "", None, None, None, len(self.text), self.index)
+    
+    @classmethod
+    def iter_file(cls, path, chunk_size: int = 1 << 20, skip_whitespace: bool = True,
+                  skip_comments: bool = True, engine: str = 'master',
+                  encoding: str = 'utf-8', recover: bool = False,
+                  spec: Optional[LexerSpec] = None) -> Iterator[Token]:
+        """
+        Tokeniza um arquivo lendo blocos de até chunk_size caracteres, sem
+        carregar o arquivo inteiro na memória.
+        
+        Cada bloco é cortado na última quebra de linha que não está dentro de
+        um comentário ou string; o trecho até ali é tokenizado e o restante
+        fica pendente até o próximo bloco. Assim tokens que cruzam a fronteira
+        entre blocos (comentários /* */, strings, operadores como <=) são
+        reconhecidos exatamente como em tokenize(). A memória usada depende do
+        tamanho do bloco e da maior linha/comentário/string, não do arquivo.
+        Um comentário ou string ainda aberto após STREAM_LIMIT caracteres é
+        tratado como sem fechamento (como '/*' sem '*/' em tokenize()), para
+        que um delimitador solto não obrigue a ler o arquivo inteiro.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size deve ser positivo")
+        
+        with open(path, 'r', encoding=encoding) as f:
+            chunks = iter(lambda: f.read(chunk_size), '')
+            yield from cls.iter_chunks(chunks, skip_whitespace, skip_comments, engine, recover, spec)
+    
+    @classmethod
+    def iter_chunks(cls, chunks: Iterable[str], skip_whitespace: bool = True,
+                    skip_comments: bool = True, engine: str = 'master', recover: bool = False,
+                    spec: Optional[LexerSpec] = None) -> Iterator[Token]:
+        """
+        Tokeniza o texto formado pelos blocos de chunks, gerando os tokens de
+        cada trecho assim que ele termina em um ponto de corte seguro (ver
+        iter_file), com as mesmas posições de tokenize() sobre o texto todo.
+        Cada bloco só é pedido a chunks quando os tokens anteriores acabam.
+        """
+        stream = _ChunkedTokenizer(cls, engine, skip_whitespace, skip_comments, recover, spec)
+        for chunk in chunks:
+            yield from stream.feed(chunk)
+        yield from stream.finish()
+    
+    @classmethod
+    def iter_mapped_file(cls, path, skip_whitespace: bool = True,
+                         skip_comments: bool = True, cache=None,
+                         recover: bool = False, spec: Optional[LexerSpec] = None) -> Iterator[Token]:
+        """
+        Tokeniza um arquivo mapeado em memória (mmap), sem ler nem decodificar
+        o arquivo inteiro: o sistema operacional carrega as páginas sob
+        demanda e só os valores dos tokens emitidos são decodificados.
+        
+        O arquivo é tratado como bytes UTF-8 brutos, sem a tradução de
+        quebras de linha do modo texto. Com um cache, o arquivo é
+        tokenizado de uma vez através dele. Linha e coluna de cada token
+        são resolvidas antes de ele ser emitido, pois o mapeamento é
+        fechado ao final, acompanhando a linha corrente em vez de indexar
+        o arquivo inteiro: a memória usada não cresce com o arquivo.
+        """
+        with open(path, 'rb') as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Arquivos vazios não podem ser mapeados
+                data = b''
+            try:
+                if cache is not None and not recover:
+                    tokens = cls(data, cache=cache, spec=spec).tokenize(skip_whitespace, skip_comments,
+                                                                         as_buffer=True)
+                else:
+                    tokens = cls(data, recover=recover, spec=spec).iter_tokens(skip_whitespace, skip_comments)
+                yield from _resolve_in_order(tokens, data)
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+    
+    def _skipped_types(self, skip_whitespace: bool, skip_comments: bool) -> frozenset:
+        """Conjunto de tipos de token que não devem ser emitidos"""
+        skipped = set()
+        if skip_whitespace:
+            skipped.add(TokenType.WHITESPACE)
+        if skip_comments:
+            skipped.add(TokenType.COMMENT)
+        return frozenset(skipped)
+    
+    def _scan(self, skip_whitespace: bool, skip_comments: bool) -> Iterator[Token]:
+        """Gera os tokens a partir de self.position, sem o EOF"""
+        text = self.text
+        binary = self.binary
+        index = self.index
+        symbols = self.symbols
+        for token_type, start, end in self._scan_raw(self._skipped_types(skip_whitespace, skip_comments)):
+            if symbols is not None and token_type in SYMBOL_TYPES:
+                symbol = symbols.intern_bytes(text[start:end]) if binary else symbols.intern(text[start:end])
+                yield Token(token_type, symbols.values[symbol], None, None, symbol, start, index)
+                continue
+            value = text[start:end]
+            if binary:
+                value = str(value, 'utf-8')
+            yield Token(token_type, value, None, None, None, start, index)
+    
+    def iter_raw(self, skip_whitespace: bool = True,
+                 skip_comments: bool = True) -> Iterator[Tuple[TokenType, int, int]]:
+        """
+        Gera tuplas (tipo, início, fim) em vez de objetos Token, sem o EOF.
+        Os valores são text[início:fim]; linha e coluna vêm de self.index.
+        """
+        return self._scan_raw(self._skipped_types(skip_whitespace, skip_comments))
+    
+    def _scan_raw(self, skipped: frozenset) -> Iterator[Tuple[TokenType, int, int]]:
+        """
+        Gera tuplas (tipo, início, fim) a partir de self.position, sem o
+        EOF. Os tipos em skipped são consumidos mas não emitidos. Linha e
+        coluna não são acompanhadas: vêm de self.index quando pedidas.
+        """
+        if self.engine == 'master':
+            if self.GENERATED and not self.binary:
+                scan = _generated_scanners().get(self.spec.key)
+                if scan is not None:
+                    return self._scan_generated(scan, skipped)
+            return self._scan_master(skipped)
+        return self._scan_loop(skipped)
+    
+    def _scan_generated(self, scan, skipped: frozenset) -> Iterator[Tuple[TokenType, int, int]]:
+        """
+        Percorre o texto com o scanner gerado; onde ele para antes do fim
+        (erro, delimitado sem fechamento) a regex mestre assume o resto
+        """
+        self.position = yield from scan(self.text, self.position, skipped)
+        if self.position < len(self.text):
+            yield from self._scan_master(skipped)
+    
+    def _unexpected(self, pos: int) -> LexerError:
+        """Erro para um caractere que nenhum padrão reconhece"""
+        self.position = pos
+        line, column = self.index.position(pos)
+        return LexerError(f"Caractere inesperado: '{_char_at(self.text, pos)}'", line, column, pos)
+    
+    def _error_token(self, start: int, end: int) -> Tuple[TokenType, int, int]:
+        """Registra um trecho não reconhecido (modo de recuperação)"""
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            run = self.text[start:end]
+            if self.binary:
+                run = str(run, 'utf-8', 'replace')
+            if len(run) > 20:
+                run = run[:20] + '...'
+            message = f"Caractere inesperado: '{run}'" if end - start == 1 else f"Caracteres inesperados: '{run}'"
+            self.errors.append(LexerError(message, *self.index.position(start), start))
+        return TokenType.ERROR, start, end
+    
+    def _scan_master(self, skipped: frozenset) -> Iterator[Tuple[TokenType, int, int]]:
+        """Percorre o texto com a regex mestre, um único match por token"""
+        compiled = self.compiled
+        binary = self.binary
+        dead = frozenset()
+        regex, group_types, suspects = compiled.tables(dead, binary)
+        match = regex.match
+        keywords = compiled.keywords_bytes if binary else compiled.keywords
+        text = self.text
+        end = len(text)
+        recover = self.recover
         
+        pos = self.position
+        error_start = -1
+        # Padrões descartados que voltam a ser tentados a partir de uma
+        # posição, e a menor delas
+        revive: Dict[str, int] = {}
+        next_revive = end
+        # Em bytes, \d e afins só reconhecem ASCII: perto de um byte não
+        # ASCII (o próximo a partir de onde o último match parou) a regex str
+        # decide, para que bytes e str produzam os mesmos tokens
+        decode = binary and compiled.unicode_classes
+        next_high = -1
+        while pos < end:
+            if pos >= next_revive:
+                expired = frozenset(pattern for pattern, at in revive.items() if at <= pos)
+                for pattern in expired:
+                    del revive[pattern]
+                next_revive = min(revive.values(), default=end)
+                dead -= expired
+                regex, group_types, suspects = compiled.tables(dead, binary)
+                match = regex.match
+            
+            m = match(text, pos)
+            if decode:
+                stop = pos if m is None else m.end()
+                if next_high < stop:
+                    high = _HIGH_BYTE.search(text, stop)
+                    next_high = end if high is None else high.start()
+                # O byte não ASCII é o próximo caractere ou o seguinte (ex.: '1.٣')
+                if next_high <= stop + 1 and (m is None or group_types[m.lastindex] not in _DELIMITED_TYPES):
+                    m = _match_decoded(compiled.tables(dead)[0], text, pos)
+            if m is None:
+                if not recover:
+                    raise self._unexpected(pos)
+                failed = _failed_openers(text, pos, suspects[None])
+                if failed:
+                    dead |= failed
+                    next_revive = self._revive_at(failed, pos, revive, next_revive)
+                    regex, group_types, suspects = compiled.tables(dead, binary)
+                    match = regex.match
+                if error_start < 0:
+                    error_start = pos
+                pos = _next_char(text, pos)
+                continue
+            
+            if error_start >= 0:
+                yield self._error_token(error_start, pos)
+                error_start = -1
+            
+            group = m.lastindex
+            token_type = group_types[group]
+            if group in suspects:
+                # Um padrão de maior precedência casaria aqui se não tivesse
+                # falhado: é um delimitado sem fechamento
+                failed = _failed_openers(text, pos, suspects[group])
+                if failed:
+                    dead |= failed
+                    next_revive = self._revive_at(failed, pos, revive, next_revive)
+                    regex, group_types, suspects = compiled.tables(dead, binary)
+                    match = regex.match
+            
+            token_end = m.end()
+            if token_type is TokenType.IDENTIFIER:
+                token_type = keywords.get(m.group(), token_type)
+            
+            if token_type not in skipped:
+                yield token_type, pos, token_end
+            pos = token_end
+        
+        if error_start >= 0:
+            yield self._error_token(error_start, pos)
+        self.position = pos
+    
+    def _revive_at(self, failed: frozenset, pos: int, revive: Dict[str, int], next_revive: int) -> int:
+        """Registra em revive quando cada padrão que falhou em pos volta; retorna a menor posição"""
+        end = len(self.text)
+        for pattern in failed:
+            at = self.compiled.revival(pattern, self.text, pos)
+            if at < end:
+                revive[pattern] = at
+                next_revive = min(next_revive, at)
+        return next_revive
+    
+    def _scan_loop(self, skipped: frozenset) -> Iterator[Tuple[TokenType, int, int]]:
+        """Testa cada padrão da especificação em ordem a cada posição"""
+        table = self.compiled.loop_table()
+        keywords = self.compiled.keywords
+        # Padrão descartado -> posição a partir da qual volta a ser tentado
+        dead: Dict[str, int] = {}
+        error_start = -1
         while self.position < len(self.text):
             match_found = False
             
-            for pattern, token_type in self.TOKEN_PATTERNS:
-                regex = re.compile(pattern)
+            for pattern, regex, token_type, opener in table:
+                if dead.get(pattern, -1) > self.position:
+                    continue
                 match = regex.match(self.text, self.position)
                 
                 if match:
                     value = match.group(0)
                     
-                    if token_type == TokenType.IDENTIFIER and value in self.KEYWORDS:
-                        token_type = self.KEYWORDS[value]
-                    
-                    token = Token(token_type, value, self.line, self.column)
+                    if token_type == TokenType.IDENTIFIER and value in keywords:
+                        token_type = keywords[value]
                     
-                    if not (skip_whitespace and token_type == TokenType.WHITESPACE) and \
-                       not (skip_comments and token_type == TokenType.COMMENT):
-                        self.tokens.append(token)
+                    if error_start >= 0:
+                        yield self._error_token(error_start, self.position)
+                        error_start = -1
                     
+                    start = self.position
                     self.position = match.end()
                     
-                    if token_type == TokenType.NEWLINE:
-                        self.line += 1
-                        self.column = 1
-                    else:
-                        self.column += len(value)
+                    if token_type not in skipped:
+                        yield token_type, start, self.position
                     
                     match_found = True
                     break
+                
+                if opener is not None and self.text.startswith(opener, self.position):
+                    dead[pattern] = self.compiled.revival(pattern, self.text, self.position)
             
             if not match_found:
-                char = self.text[self.position]
-                raise LexerError(f"Caractere inesperado: '{char}'", self.line, self.column)
+                if not self.recover:
+                    raise self._unexpected(self.position)
+                if error_start < 0:
+                    error_start = self.position
+                self.position += 1
         
-        self.tokens.append(Token(TokenType.EOF, "", self.line, self.column))
-        return self.tokens
+        if error_start >= 0:
+            yield self._error_token(error_start, self.position)
     
     def get_tokens_as_strings(self) -> List[str]:
         """Retorna os tokens como uma lista de strings para compatibilidade com o exemplo"""
         return [str(token) for token in self.tokens if token.type != TokenType.EOF]
 
 
-def analyze_code(code: str, verbose: bool = False) -> List[Token]:
+# Maior trecho, em caracteres, que a tokenização em blocos espera pelo
+# fechamento de um comentário ou string antes de tratá-lo como sem
+# fechamento (ver _BoundaryScanner)
+STREAM_LIMIT = 1 << 18
+
+
+@lru_cache(maxsize=None)
+def _boundary_tables(line_comments: Tuple[str, ...], block_comments: Tuple[Tuple[str, str], ...],
+                     strings: Tuple[str, ...]):
+    """
+    Tabelas do _BoundaryScanner: regex dos caracteres que podem iniciar um
+    comentário ou string (None se não houver nenhum), os delimitadores
+    iniciais (os mais longos primeiro) e a regex de parada de cada aspa
+    """
+    openers = [(opener, _BoundaryScanner.LINE_COMMENT, '\n') for opener in line_comments]
+    openers += [(opener, _BoundaryScanner.BLOCK_COMMENT, closer) for opener, closer in block_comments]
+    openers += [(quote, _BoundaryScanner.STRING, quote) for quote in strings]
+    openers.sort(key=lambda item: -len(item[0]))
+    first = sorted({opener[0] for opener, _, _ in openers})
+    code_stop = re.compile('|'.join(_literal(char) for char in first)) if first else None
+    string_stops = {quote: re.compile(f'{_literal(quote)}|\\\\') for quote in strings}
+    return code_stop, tuple(openers), string_stops
+
+
+class _BoundaryScanner:
+    """
+    Acompanha, de forma incremental, se o texto lido até agora termina dentro
+    de um comentário ou de uma string.
+    
+    Uma quebra de linha encontrada fora de comentários e strings é um ponto de
+    corte seguro: nenhum token atravessa essa quebra, então o texto antes e
+    depois dela pode ser tokenizado separadamente. Os delimitadores vêm da
+    especificação compilada (a padrão se nenhuma for dada).
+    
+    Com recover=True, uma string que para em um '\\' seguido de quebra de
+    linha falha como na recuperação de erros do lexer: o texto desde a aspa
+    volta a ser código e a aspa não abre strings até o '\\'. Com um limit, um
+    comentário ou string que continua aberto por mais de limit caracteres é
+    tratado como sem fechamento, se isso der um ponto de corte (o trecho até
+    ele também não tem o fechamento, e o lexer o trata da mesma forma).
+    
+    As posições guardadas entre chamadas são absolutas: origin, em scan, é a
+    posição do início do texto recebido.
+    """
+    CODE, LINE_COMMENT, BLOCK_COMMENT, STRING = range(4)
+    
+    def __init__(self, compiled: Optional[CompiledSpec] = None, recover: bool = False,
+                 limit: Optional[int] = None):
+        if compiled is None:
+            compiled = DEFAULT_SPEC.compile()
+        self.compiled = compiled
+        self._code_stop, self._openers, self._string_stops = _boundary_tables(
+            compiled.line_comments, compiled.block_comments, compiled.strings)
+        self.recover = recover
+        self.limit = limit
+        self.state = self.CODE
+        # Delimitador que encerra o comentário de bloco ou a string atual
+        self.closer = ''
+        # Delimitador inicial do comentário ou string atual e sua posição
+        self.opener = ''
+        self.opened = 0
+        # Delimitador inicial -> posição até a qual ele não abre nada
+        self.dead: Dict[str, int] = {}
+        # Tamanho a partir do qual o delimitado aberto é testado contra limit
+        self._limit_at = limit
+        # O último scan parou porque precisa do texto desde o último corte
+        # (o delimitado atual começou antes do texto recebido)
+        self.needs_history = False
+    
+    def scan(self, text: str, pos: int = 0, final: bool = False,
+             end: Optional[int] = None, origin: int = 0) -> Tuple[int, int]:
+        """
+        Avança o estado sobre text[pos:end].
+        
+        Retorna (corte, parada): corte é o índice logo após a última quebra de
+        linha segura (-1 se não houver) e parada é onde o scan parou. Quando
+        final é False, o scan pode parar antes do fim se precisar ver os
+        próximos caracteres (o início de um delimitador ou um '\\' no fim do
+        texto); text[parada:] deve ser reenviado junto com o próximo bloco.
+        Se needs_history ficar True, o scan deve ser repetido a partir da
+        parada sobre o texto desde o último corte.
+        """
+        if end is None:
+            end = len(text)
+        self.needs_history = False
+        cut = -1
+        code_stop = self._code_stop.search if self._code_stop is not None else None
+        dead = self.dead
+        
+        while pos < end:
+            state = self.state
+            if state == self.CODE:
+                # Toda quebra de linha entre pos e o próximo possível início
+                # de comentário ou string é segura; basta a última
+                m = code_stop(text, pos, end) if code_stop is not None else None
+                i = end if m is None else m.start()
+                newline = text.rfind('\n', pos, i)
+                if newline != -1:
+                    cut = newline + 1
+                if m is None:
+                    pos = end
+                    break
+                pos = i + 1
+                for opener, state, closer in self._openers:
+                    if text.startswith(opener, i, end):
+                        if dead and dead.get(opener, -1) > origin + i:
+                            continue
+                        self.state = state
+                        self.closer = closer
+                        self.opener = opener
+                        self.opened = origin + i
+                        self._limit_at = self.limit
+                        pos = i + len(opener)
+                        break
+                    if end - i < len(opener) and opener.startswith(text[i:end]):
+                        # O delimitador pode continuar no próximo bloco
+                        if not final:
+                            return cut, i
+            elif state == self.LINE_COMMENT:
+                i = text.find('\n', pos, end)
+                if i == -1:
+                    pos = end
+                else:
+                    self.state = self.CODE
+                    pos = i
+            elif state == self.BLOCK_COMMENT:
+                closer = self.closer
+                i = text.find(closer, pos, end)
+                if i == -1:
+                    # O fim do texto pode ser o início do fechamento
+                    if not final:
+                        for size in range(min(len(closer) - 1, end - pos), 0, -1):
+                            if text.endswith(closer[:size], pos, end):
+                                return cut, end - size
+                    pos = end
+                else:
+                    self.state = self.CODE
+                    pos = i + len(closer)
+            else:
+                m = self._string_stops[self.closer].search(text, pos, end)
+                if m is None:
+                    pos = end
+                elif text[m.start()] == '\\':
+                    i = m.start()
+                    if i + 1 == end and not final:
+                        return cut, i
+                    if self.recover and text.startswith('\n', i + 1):
+                        # A string falha aqui: o texto desde a aspa volta a
+                        # ser código e a aspa só abre strings depois do '\\'
+                        start = self.opened - origin
+                        if start < 0:
+                            self.needs_history = True
+                            return cut, i
+                        self.state = self.CODE
+                        dead[self.opener] = origin + i + 1
+                        pos = start + 1
+                    else:
+                        pos = i + 2
+                else:
+                    self.state = self.CODE
+                    pos = m.start() + 1
+        
+        pos = min(pos, end)
+        if self.limit is not None and self.state in (self.BLOCK_COMMENT, self.STRING) \
+                and origin + pos - self.opened > self._limit_at:
+            return self._give_up(text, cut, pos, origin)
+        return cut, pos
+    
+    def _give_up(self, text: str, cut: int, stop: int, origin: int) -> Tuple[int, int]:
+        """
+        Trata o delimitado aberto além do limite como sem fechamento, se o
+        texto até stop tiver um ponto de corte nesse caso; o scan recomeça do
+        zero no corte. Sem corte, espera o dobro do tamanho atual.
+        """
+        start = self.opened - origin
+        if start < 0:
+            self.needs_history = True
+            return cut, stop
+        trial = _BoundaryScanner(self.compiled, self.recover)
+        trial.dead = dict(self.dead)
+        trial.dead[self.opener] = origin + stop
+        trial_cut, _ = trial.scan(text, start + 1, end=stop, origin=origin)
+        if trial_cut == -1:
+            self._limit_at = 2 * (origin + stop - self.opened)
+            return cut, stop
+        self.state = self.CODE
+        self.dead = {}
+        return trial_cut, trial_cut
+    
+    def split_points(self, text: str, parts: int) -> List[int]:
+        """
+        Escolhe até parts - 1 pontos de corte seguros em text, cada um na
+        última quebra de linha segura antes de uma fração igual do texto.
+        Retorna os índices de início de cada região, começando em 0.
+        """
+        size = len(text)
+        starts = [0]
+        pos = 0
+        for k in range(1, parts):
+            target = size * k // parts
+            if target <= pos:
+                continue
+            cut, pos = self.scan(text, pos, end=target)
+            if cut > starts[-1]:
+                starts.append(cut)
+        return starts
+
+
+class _ChunkedTokenizer:
+    """
+    Tokeniza texto recebido em blocos, emitindo os tokens de cada trecho
+    assim que ele termina em um ponto de corte seguro.
+    
+    Os trechos sempre começam logo após uma quebra de linha; cada um tem seu
+    LineIndex, que começa na linha e no deslocamento absolutos do trecho.
+    """
+    
+    def __init__(self, lexer_class, engine: str, skip_whitespace: bool, skip_comments: bool,
+                 recover: bool = False, spec: Optional[LexerSpec] = None):
+        self.lexer_class = lexer_class
+        self.engine = engine
+        self.recover = recover
+        self.spec = spec if spec is not None else lexer_class.SPEC
+        self.skip_whitespace = skip_whitespace
+        self.skip_comments = skip_comments
+        self.scanner = _BoundaryScanner(self.spec.compile(), recover, STREAM_LIMIT)
+        # Texto desde o último corte, já percorrido pelo scanner, e seu tamanho
+        self.parts: List[str] = []
+        self.size = 0
+        self.tail = ''
+        self.offset = 0
+        self.line = 1
+        self.index = LineIndex('')
+    
+    def feed(self, chunk: str) -> Iterator[Token]:
+        """Recebe mais um bloco e gera os tokens que já podem ser emitidos"""
+        window = self.tail + chunk
+        scanner = self.scanner
+        cut, stop = scanner.scan(window, origin=self.offset + self.size)
+        if scanner.needs_history:
+            # O comentário ou string em questão começou em um bloco anterior:
+            # o scan continua sobre todo o texto desde o último corte
+            earlier = cut + self.size if cut != -1 else -1
+            stop += self.size
+            window = ''.join(self.parts) + window
+            self.parts = []
+            self.size = 0
+            cut, stop = scanner.scan(window, stop, origin=self.offset)
+            cut = max(cut, earlier)
+        self.tail = window[stop:]
+        if cut == -1:
+            self.parts.append(window[:stop])
+            self.size += stop
+            return
+        
+        self.parts.append(window[:cut])
+        piece = ''.join(self.parts)
+        self.parts = [window[cut:stop]]
+        self.size = stop - cut
+        yield from self._lex(piece)
+    
+    def finish(self) -> Iterator[Token]:
+        """Tokeniza o que restou pendente e gera o token EOF"""
+        self.parts.append(self.tail)
+        piece = ''.join(self.parts)
+        self.parts = []
+        self.size = 0
+        self.tail = ''
+        yield from self._lex(piece)
+        yield Token(TokenType.EOF, "", None, None, None, self.offset, self.index)
+    
+    def _lex(self, piece: str) -> Iterator[Token]:
+        base = self.offset
+        index = self.index = LineIndex(piece, base, self.line)
+        lexer = self.lexer_class(piece, engine=self.engine, recover=self.recover, spec=self.spec)
+        skipped = lexer._skipped_types(self.skip_whitespace, self.skip_comments)
+        try:
+            for token_type, start, end in lexer._scan_raw(skipped):
+                yield Token(token_type, piece[start:end], None, None, None, base + start, index)
+        except LexerError as e:
+            offset = base + e.offset
+            raise LexerError(e.message, *index.position(offset), offset) from None
+        self.offset = base + len(piece)
+        self.line += piece.count('\n')
+
+
+def _lex_region(lexer_class, spec: LexerSpec, engine: str, text: str, base: int,
+                skip_whitespace: bool, skip_comments: bool):
+    """
+    Tokeniza uma região do texto em um processo do pool. Retorna as colunas
+    do buffer (sem o EOF, com deslocamentos absolutos), ou a mensagem e o
+    deslocamento absoluto do primeiro erro léxico.
+    """
+    lexer = lexer_class(text, engine=engine, spec=spec)
+    buffer = TokenBuffer(text)
+    try:
+        _fill_buffer(buffer, lexer._scan_raw(lexer._skipped_types(skip_whitespace, skip_comments)), base)
+    except LexerError as e:
+        return (e.message, base + e.offset), None
+    return None, buffer.arrays()
+
+
+def iter_file_tokens(path, engine: str = 'master', chunk_size: int = 1 << 20,
+                     skip_whitespace: bool = True, skip_comments: bool = True,
+                     cache=None, recover: bool = False,
+                     spec: Optional[LexerSpec] = None) -> Iterator[Token]:
+    """
+    Tokeniza um arquivo da forma mais barata disponível.
+    
+    Arquivos com quebras de linha LF são mapeados em memória e lidos como
+    bytes, sem cópia nem decodificação prévia. Arquivos com CR (ex.: CRLF) ou
+    um engine sem suporte a entrada binária são lidos em blocos no modo
+    texto, que normaliza as quebras de linha.
+    
+    Com um cache (TokenCache ou diretório), o arquivo é tokenizado de uma
+    vez e o resultado é guardado ou lido do cache. Com recover=True, erros
+    léxicos viram tokens ERROR (sem cache).
+    """
+    mappable = False
+    if engine == 'master':
+        try:
+            with open(path, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                mappable = data.find(b'\r') == -1
+        except (ValueError, OSError):
+            mappable = False
+    
+    if mappable:
+        return Lexer.iter_mapped_file(path, skip_whitespace=skip_whitespace,
+                                      skip_comments=skip_comments, cache=cache, recover=recover,
+                                      spec=spec)
+    if cache is not None and not recover:
+        return _iter_cached_file(path, engine, skip_whitespace, skip_comments, cache, spec)
+    
+    return Lexer.iter_file(
+        path, chunk_size=chunk_size, skip_whitespace=skip_whitespace,
+        skip_comments=skip_comments, engine=engine, recover=recover, spec=spec
+    )
+
+
+def _iter_cached_file(path, engine: str, skip_whitespace: bool, skip_comments: bool,
+                      cache, spec: Optional[LexerSpec] = None) -> Iterator[Token]:
+    """Lê o arquivo no modo texto e o tokeniza através do cache"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    yield from Lexer(text, engine=engine, cache=cache, spec=spec).tokenize(
+        skip_whitespace, skip_comments, as_buffer=True)
+
+
+async def alex(reader, chunk_size: int = 1 << 16, skip_whitespace: bool = True,
+               skip_comments: bool = True, engine: str = 'master', encoding: str = 'utf-8',
+               recover: bool = False, spec: Optional[LexerSpec] = None,
+               yield_every: int = 1024):
+    """
+    Tokeniza, em um gerador assíncrono, o código recebido de um
+    asyncio.StreamReader (ou qualquer objeto com um read(n) assíncrono) ou de
+    um iterador assíncrono de blocos bytes (ou str):
+    
+        async for token in alex(reader):
+            ...
+    
+    Os blocos são decodificados de forma incremental e tokenizados à medida
+    que chegam, como em Lexer.iter_file, sem guardar a entrada inteira. O
+    próximo bloco só é lido quando o consumidor pede tokens além dos já
+    disponíveis, então um consumidor lento deixa o buffer do StreamReader
+    encher e o transporte para de ler do socket (contrapressão). A cada
+    yield_every tokens o gerador devolve o controle ao loop de eventos, para
+    que um texto longo não o bloqueie. Cancelar a tarefa consumidora
+    interrompe a leitura e a tokenização; o reader não é fechado.
+    
+    O resultado é o mesmo de Lexer(texto).tokenize() sobre o texto
+    decodificado (as quebras de linha não são traduzidas), terminando no
+    token EOF. Erros léxicos levantam LexerError com a posição absoluta, e
+    bytes inválidos na codificação, UnicodeDecodeError.
+    """
+    import asyncio
+    import codecs
+    
+    if chunk_size < 1:
+        raise ValueError("chunk_size deve ser positivo")
+    if yield_every < 1:
+        raise ValueError("yield_every deve ser positivo")
+    decoder = codecs.getincrementaldecoder(encoding)()
+    stream = _ChunkedTokenizer(Lexer, engine, skip_whitespace, skip_comments, recover, spec)
+    
+    async def blocks():
+        """Blocos de texto decodificados e, no fim da entrada, None"""
+        if hasattr(reader, 'read'):
+            while True:
+                data = await reader.read(chunk_size)
+                if not data:
+                    break
+                yield data if isinstance(data, str) else decoder.decode(data)
+        else:
+            async for data in reader:
+                yield data if isinstance(data, str) else decoder.decode(data)
+        yield decoder.decode(b'', final=True)
+        yield None
+    
+    pending = 0
+    async for text in blocks():
+        for token in stream.finish() if text is None else stream.feed(text):
+            yield token
+            pending += 1
+            if pending >= yield_every:
+                pending = 0
+                await asyncio.sleep(0)
+
+
+def analyze_code(code: str, verbose: bool = False, engine: str = 'master',
+                 cache_dir=None, symbols: Optional[SymbolTable] = None,
+                 spec: Optional[LexerSpec] = None) -> List[Token]:
     """
     Função utilitária para analisar código e retornar tokens
     
     Args:
         code: O código fonte para analisar
         verbose: Se True, inclui whitespace e comentários
+        engine: Engine de tokenização ('master' ou 'loop')
+        cache_dir: Diretório de um cache de tokens em disco (opcional)
+        symbols: SymbolTable para internar identificadores e literais (opcional)
+        spec: LexerSpec do dialeto (opcional)
     """
-    lexer = Lexer(code)
+    lexer = Lexer(code, engine=engine, cache=cache_dir, symbols=symbols, spec=spec)
     return lexer.tokenize(skip_whitespace=not verbose, skip_comments=not verbose)
 
 
@@ -1,15 +1,324 @@
 """
 Analisador Léxico - Arquivo principal
+
+Só os módulos usados por toda execução são importados aqui; lote, cache,
+perfil, servidor e formato binário são carregados quando a opção é usada,
+já que para entradas curtas o tempo de inicialização domina o da análise.
 """
 
+import time
+_STARTED = time.perf_counter()
+
+import os
 import sys
 import argparse
-from pathlib import Path
-from src.lexer import Lexer, LexerError, analyze_code
+from src.lexer import Lexer, LexerError, LexerSpec, iter_file_tokens
+from src.writers import TokenStats, make_writer
+
+_IMPORTED = time.perf_counter()
+
+
+class _Timings:
+    """Tempo de cada etapa da CLI, para --timings"""
+    
+    def __init__(self):
+        self.phases = [("Importação", _IMPORTED - _STARTED)]
+        self.last = time.perf_counter()
+    
+    def mark(self, name: str):
+        """Encerra a etapa atual, registrando o tempo desde a anterior"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+    
+    def report(self) -> str:
+        total = sum(seconds for _, seconds in self.phases)
+        lines = ["Tempos:"]
+        for name, seconds in self.phases + [("Total", total)]:
+            lines.append(f"  {name + ':':<12} {seconds * 1000:8.2f} ms")
+        return '\n'.join(lines)
+
+
+def _may_be_batch(value: str) -> bool:
+    """Teste barato que evita importar src.batch para entradas comuns"""
+    return os.path.isdir(value) or any(char in value for char in '*?[')
+
+
+def run_batch_cli(args):
+    """Analisa vários arquivos em paralelo e imprime um relatório agregado"""
+    from src.batch import expand_paths, format_result, format_summary, run_batch
+    
+    out = sys.stdout
+    if args.output:
+        try:
+            out = open(args.output, 'w', encoding='utf-8')
+        except OSError as e:
+            print(f"Erro ao abrir arquivo de saída: {e}", file=sys.stderr)
+            sys.exit(1)
+    
+    errors = []
+    
+    def on_result(result):
+        if result.error is not None:
+            errors.append(result)
+        print(format_result(result), file=out, flush=True)
+    
+    skip = not args.verbose
+    try:
+        summary = run_batch(
+            expand_paths(args.input), jobs=args.jobs, engine=args.engine,
+            skip_whitespace=skip, skip_comments=skip, on_result=on_result,
+            cache_dir=args.cache_dir, cache_size=args.cache_size, spec=args.spec
+        )
+        print('\n'.join(format_summary(summary, errors)), file=out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+            print(f"Resultado salvo em: {args.output}")
+    
+    if errors:
+        sys.exit(1)
+
+
+def serve_cli(argv):
+    """Subcomando 'serve': roda o servidor em um socket Unix até SIGINT/SIGTERM"""
+    import asyncio
+    from src.server import DEFAULT_MAX_PENDING, serve
+    
+    parser = argparse.ArgumentParser(
+        prog='lexer serve',
+        description='Mantém o lexer carregado e atende pedidos em um socket Unix'
+    )
+    parser.add_argument('--socket', required=True, help='Caminho do socket Unix')
+    parser.add_argument(
+        '--workers', '-j',
+        type=int,
+        help='Número de processos de tokenização (padrão: número de CPUs)'
+    )
+    parser.add_argument(
+        '--max-pending',
+        type=int,
+        default=DEFAULT_MAX_PENDING,
+        help=f'Pedidos em andamento por conexão antes de parar de ler dela (padrão: {DEFAULT_MAX_PENDING})'
+    )
+    args = parser.parse_args(argv)
+    
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers deve ser pelo menos 1")
+    if args.max_pending < 1:
+        parser.error("--max-pending deve ser pelo menos 1")
+    
+    def ready(server):
+        print(f"Servidor ouvindo em {server.socket_path} ({server.workers} workers)", flush=True)
+    
+    try:
+        asyncio.run(serve(args.socket, args.workers, args.max_pending, ready))
+    except OSError as e:
+        print(f"Erro ao iniciar o servidor: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def stats_cli(argv):
+    """Subcomando 'stats': métricas agregadas de um corpus de arquivos"""
+    from src.analytics import DEFAULT_TOP, analyze_corpus, format_report
+    from src.batch import expand_paths
+    
+    parser = argparse.ArgumentParser(
+        prog='lexer stats',
+        description='Contagens por tipo de token, identificadores e literais mais frequentes, '
+                    'proporção de comentários e distribuições de tamanho de tokens e linhas'
+    )
+    parser.add_argument('input', nargs='+', help='Arquivos, diretórios ou globs')
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        help='Número de processos (padrão: número de CPUs)'
+    )
+    parser.add_argument(
+        '--top',
+        type=int,
+        default=DEFAULT_TOP,
+        help=f'Quantos identificadores e literais listar (padrão: {DEFAULT_TOP})'
+    )
+    parser.add_argument(
+        '--format',
+        choices=['text', 'json'],
+        default='text',
+        help='Formato do relatório'
+    )
+    parser.add_argument(
+        '--recover',
+        action='store_true',
+        help='Conta trechos não reconhecidos como ERROR em vez de descartar o arquivo'
+    )
+    parser.add_argument(
+        '--spec',
+        help='Especificação léxica em JSON (como na análise simples)'
+    )
+    args = parser.parse_args(argv)
+    
+    if args.spec is not None:
+        try:
+            args.spec = LexerSpec.from_file(args.spec)
+        except (OSError, ValueError) as e:
+            parser.error(f"--spec: {e}")
+    
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs deve ser pelo menos 1")
+    if args.top < 1:
+        parser.error("--top deve ser pelo menos 1")
+    
+    stats = analyze_corpus(expand_paths(args.input), jobs=args.jobs, spec=args.spec,
+                           recover=args.recover, top=args.top)
+    if args.format == 'json':
+        import json
+        print(json.dumps(stats.to_dict(args.top), indent=2, ensure_ascii=False))
+    else:
+        print('\n'.join(format_report(stats, args.top)))
+    if stats.failed:
+        sys.exit(1)
+
+
+def watch_cli(argv):
+    """Subcomando 'watch': re-tokeniza os arquivos que mudam até SIGINT/SIGTERM"""
+    import json
+    import signal
+    from src.watch import DEFAULT_INTERVAL, EventBroadcaster, Watcher, format_event
+    
+    parser = argparse.ArgumentParser(
+        prog='lexer watch',
+        description='Mantém a análise léxica de uma árvore de arquivos em memória e '
+                    'informa os erros e estatísticas dos arquivos que mudam'
+    )
+    parser.add_argument('input', nargs='+', help='Diretórios ou arquivos a observar')
+    parser.add_argument(
+        '--interval',
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help=f'Segundos entre verificações (padrão: {DEFAULT_INTERVAL})'
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=1,
+        help='Processos usados quando muitos arquivos mudam de uma vez (padrão: 1)'
+    )
+    parser.add_argument(
+        '--format',
+        choices=['text', 'ndjson'],
+        default='text',
+        help='Formato dos eventos na saída padrão'
+    )
+    parser.add_argument(
+        '--socket',
+        help='Também envia os eventos, como mensagens do servidor, a quem se conectar a este socket Unix'
+    )
+    parser.add_argument(
+        '--once',
+        action='store_true',
+        help='Faz uma única verificação e termina'
+    )
+    parser.add_argument(
+        '--recover',
+        action='store_true',
+        help='Lista todos os erros de cada arquivo, não só o primeiro'
+    )
+    parser.add_argument(
+        '--max-errors',
+        type=int,
+        default=100,
+        help='Com --recover, máximo de erros guardados por arquivo (padrão: 100)'
+    )
+    parser.add_argument(
+        '--spec',
+        help='Especificação léxica em JSON (como na análise simples)'
+    )
+    args = parser.parse_args(argv)
+    
+    if args.interval <= 0:
+        parser.error("--interval deve ser positivo")
+    if args.jobs < 1:
+        parser.error("--jobs deve ser pelo menos 1")
+    if args.max_errors < 1:
+        parser.error("--max-errors deve ser pelo menos 1")
+    if args.spec is not None:
+        try:
+            args.spec = LexerSpec.from_file(args.spec)
+        except (OSError, ValueError) as e:
+            parser.error(f"--spec: {e}")
+    
+    def emit(events):
+        for event in events:
+            if args.format == 'ndjson':
+                print(json.dumps(event, ensure_ascii=False))
+            else:
+                for line in format_event(event):
+                    print(line)
+        sys.stdout.flush()
+    
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    broadcaster = None
+    with Watcher(args.input, spec=args.spec, recover=args.recover,
+                 max_errors=args.max_errors, jobs=args.jobs) as watcher:
+        try:
+            if args.socket:
+                try:
+                    broadcaster = EventBroadcaster(args.socket)
+                except OSError as e:
+                    print(f"Erro ao abrir o socket: {e}", file=sys.stderr)
+                    sys.exit(1)
+            while True:
+                events = watcher.poll()
+                emit(events)
+                if broadcaster is not None:
+                    broadcaster.send(events)
+                    broadcaster.accept(watcher.snapshot())
+                if args.once or stopping:
+                    break
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if broadcaster is not None:
+                broadcaster.close()
+    
+    if args.once and watcher.failed:
+        sys.exit(1)
+
+
+def _preview(code: str, limit: int = 200) -> str:
+    """repr() do código, truncado em limit caracteres"""
+    if len(code) <= limit:
+        return repr(code)
+    return f"{code[:limit]!r}... ({len(code)} caracteres)"
+
+
+def _iter_cached(lexer, skip):
+    """Tokeniza através do cache do lexer, adiando o trabalho até a iteração"""
+    yield from lexer.tokenize(skip, skip, as_buffer=True)
+
+
+def _iter_profiled(lexer, skip, profile):
+    """Tokeniza com instrumentação, adiando o trabalho até a iteração"""
+    yield from lexer.tokenize(skip, skip, as_buffer=True, profile=profile)
+
+
+def _iter_preprocessed(process, source):
+    """Pré-processa a entrada, adiando o trabalho até a iteração"""
+    yield from process(source)
 
 
-def main():
+def main(argv=None):
     """Função principal do programa"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['serve']:
+        return serve_cli(argv[1:])
+    if argv[:1] == ['stats']:
+        return stats_cli(argv[1:])
+    if argv[:1] == ['watch']:
+        return watch_cli(argv[1:])
+    
     parser = argparse.ArgumentParser(
         description='Analisador Léxico para uma linguagem simples',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -18,12 +327,18 @@ Exemplos de uso:
   python -m src.main "int x = 10 + 5;"
   python -m src.main arquivo.txt
   python -m src.main --verbose "int x = 10;"
+  python -m src.main --jobs 4 exemplos/ "outros/**/*.txt"
+  python -m src.main serve --socket /tmp/lexer.sock
+  python -m src.main stats --top 20 exemplos/
+  python -m src.main watch src/
         '''
     )
     
     parser.add_argument(
         'input',
-        help='Código para analisar ou arquivo contendo o código'
+        nargs='+',
+        help='Código para analisar, arquivo contendo o código, ou vários '
+             'arquivos, diretórios e globs (modo em lote)'
     )
     
     parser.add_argument(
@@ -39,86 +354,264 @@ Exemplos de uso:
     
     parser.add_argument(
         '--format',
-        choices=['simple', 'detailed', 'json'],
+        choices=['simple', 'detailed', 'json', 'ndjson', 'csv', 'binary'],
         default='simple',
-        help='Formato de saída dos tokens'
+        help='Formato de saída dos tokens (binary requer --output). Com ndjson e csv na '
+             'saída padrão, mensagens e estatísticas vão para stderr'
+    )
+    
+    parser.add_argument(
+        '--quiet', '-q',
+        action='store_true',
+        help='Não lista os tokens, só as estatísticas'
+    )
+    
+    parser.add_argument(
+        '--engine',
+        choices=list(Lexer.ENGINES),
+        default='master',
+        help='Engine de tokenização (padrão: master)'
+    )
+    
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=1 << 20,
+        help='Tamanho dos blocos ao ler arquivos no modo texto, em caracteres (padrão: 1048576)'
+    )
+    
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        help='Analisa as entradas em lote com N processos (padrão no modo em lote: número de CPUs)'
+    )
+    
+    parser.add_argument(
+        '--cache-dir',
+        help='Diretório de um cache de tokens em disco, reaproveitado entre execuções'
+    )
+    
+    parser.add_argument(
+        '--cache-size',
+        default='1G',
+        help='Tamanho máximo do cache, ex.: 512M, 2G (padrão: 1G)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Mostra tentativas e falhas por padrão, tempo por tipo de token '
+             'e as regiões mais lentas da entrada'
+    )
+    
+    parser.add_argument(
+        '--spec',
+        metavar='ARQUIVO',
+        help='Especificação léxica em JSON (palavras-chave, operadores, literais, '
+             'comentários) para analisar outro dialeto'
+    )
+    
+    parser.add_argument(
+        '--preprocess',
+        action='store_true',
+        help='Expande as diretivas include "arquivo" e define NOME valor antes de listar os tokens'
+    )
+    
+    parser.add_argument(
+        '--include-dir', '-I',
+        action='append',
+        default=[],
+        metavar='DIR',
+        help='Diretório onde procurar os arquivos incluídos (pode ser repetido)'
+    )
+    
+    parser.add_argument(
+        '--recover',
+        action='store_true',
+        help='Continua após erros léxicos, emitindo tokens ERROR, e lista todos os erros'
+    )
+    
+    parser.add_argument(
+        '--max-errors',
+        type=int,
+        default=100,
+        help='Número máximo de erros listados com --recover (padrão: 100)'
+    )
+    
+    parser.add_argument(
+        '--timings',
+        action='store_true',
+        help='Mostra em stderr o tempo de importação, preparação, análise e saída'
     )
     
-    args = parser.parse_args()
+    timings = _Timings() if '--timings' in argv else None
+    args = parser.parse_args(argv)
+    
+    cache = None
+    if args.cache_dir:
+        from src.cache import TokenCache, parse_size
+        try:
+            args.cache_size = parse_size(args.cache_size)
+            cache = TokenCache.open(args.cache_dir, args.cache_size)
+        except ValueError as e:
+            parser.error(f"--cache-size: {e}")
+        except OSError as e:
+            parser.error(f"--cache-dir: {e}")
+    
+    if args.spec is not None:
+        try:
+            args.spec = LexerSpec.from_file(args.spec)
+        except (OSError, ValueError) as e:
+            parser.error(f"--spec: {e}")
+    
+    if args.max_errors < 1:
+        parser.error("--max-errors deve ser pelo menos 1")
+    
+    if args.format == 'binary' and not args.output:
+        parser.error("--format binary requer --output")
+    if args.quiet and args.output:
+        parser.error("--quiet não lista tokens; não use com --output")
+    
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs deve ser pelo menos 1")
+    
+    if args.include_dir and not args.preprocess:
+        parser.error("--include-dir requer --preprocess")
+    if args.preprocess:
+        for option, used in (('--profile', args.profile), ('--recover', args.recover),
+                             ('--cache-dir', cache is not None), ('--jobs', args.jobs is not None)):
+            if used:
+                parser.error(f"{option} não é suportado com --preprocess")
+        if len(args.input) > 1:
+            parser.error("--preprocess analisa uma única entrada")
+    elif args.jobs is not None or len(args.input) > 1 or _may_be_batch(args.input[0]):
+        from src.batch import is_batch_input
+        if args.jobs is not None or len(args.input) > 1 or is_batch_input(args.input[0]):
+            if args.profile:
+                parser.error("--profile não é suportado no modo em lote")
+            if args.timings:
+                parser.error("--timings não é suportado no modo em lote")
+            if args.recover:
+                parser.error("--recover não é suportado no modo em lote")
+            return run_batch_cli(args)
+    
+    profile = None
+    if args.profile:
+        from src.profiling import LexerProfile
+        profile = LexerProfile()
     
-    input_path = Path(args.input)
-    if input_path.exists() and input_path.is_file():
+    args.input = args.input[0]
+    skip = not args.verbose
+    input_path = args.input
+    options = {'engine': args.engine, 'recover': args.recover, 'spec': args.spec}
+    if args.quiet:
+        writer = make_writer(args.format, None)
+    elif args.output:
         try:
+            if args.format == 'binary':
+                out = open(args.output, 'wb')
+            else:
+                out = open(args.output, 'w', encoding='utf-8', newline='')
+        except OSError as e:
+            print(f"Erro ao abrir arquivo de saída: {e}", file=sys.stderr)
+            sys.exit(1)
+        writer = make_writer(args.format, out)
+    else:
+        writer = make_writer(args.format, sys.stdout)
+    # Com tokens legíveis por programas na saída padrão, as mensagens vão
+    # para stderr
+    info = sys.stderr if writer.machine_readable and writer.out is sys.stdout else sys.stdout
+    
+    if args.preprocess:
+        from src.preprocessor import Preprocessor
+        preprocessor = Preprocessor(args.include_dir, spec=args.spec, engine=args.engine,
+                                    skip_whitespace=skip, skip_comments=skip)
+    
+    if os.path.isfile(input_path):
+        if args.preprocess:
+            tokens = _iter_preprocessed(preprocessor.process_file, input_path)
+        elif profile is not None:
             with open(input_path, 'r', encoding='utf-8') as f:
                 code = f.read()
-            print(f"Analisando arquivo: {input_path}")
-        except Exception as e:
-            print(f"Erro ao ler arquivo: {e}", file=sys.stderr)
-            sys.exit(1)
+            tokens = _iter_profiled(Lexer(code, **options), skip, profile)
+        else:
+            tokens = iter_file_tokens(input_path, chunk_size=args.chunk_size, skip_whitespace=skip,
+                                      skip_comments=skip, cache=cache, **options)
+        print(f"Analisando arquivo: {input_path}", file=info)
     else:
         code = args.input
-        print("Analisando código fornecido:")
+        if args.preprocess:
+            tokens = _iter_preprocessed(preprocessor.process, code)
+        elif profile is not None:
+            tokens = _iter_profiled(Lexer(code, **options), skip, profile)
+        elif cache is not None:
+            tokens = _iter_cached(Lexer(code, cache=cache, **options), skip)
+        else:
+            tokens = Lexer(code, **options).iter_tokens(skip_whitespace=skip, skip_comments=skip)
+        print("Analisando código fornecido:", file=info)
+        print(f"Código: {_preview(code)}", file=info)
     
-    print(f"Código: {repr(code)}")
-    print("-" * 50)
+    print("-" * 50, file=info)
     
     try:
-        lexer = Lexer(code)
-        tokens = lexer.tokenize(skip_whitespace=not args.verbose, skip_comments=not args.verbose)
-        
-        output_lines = []
-        
-        if args.format == 'simple':
-            output_lines.append("Tokens:")
-            for token in tokens:
-                if token.type.value != 'EOF':
-                    output_lines.append(f"  {token}")
+        if timings is not None:
+            # Os tokens são gerados sob demanda; para separar a análise da
+            # saída, são materializados antes
+            timings.mark("Preparação")
+            tokens = list(tokens)
+            timings.mark("Análise")
         
-        elif args.format == 'detailed':
-            output_lines.append("Análise detalhada:")
-            output_lines.append(f"{'Tipo':<20} {'Valor':<15} {'Linha':<6} {'Coluna':<6}")
-            output_lines.append("-" * 50)
-            for token in tokens:
-                if token.type.value != 'EOF':
-                    output_lines.append(
-                        f"{token.type.value:<20} {repr(token.value):<15} "
-                        f"{token.line:<6} {token.column:<6}"
-                    )
-        
-        elif args.format == 'json':
-            import json
-            token_data = []
+        stats = TokenStats(args.max_errors)
+        try:
+            writer.begin()
             for token in tokens:
+                stats.add(token)
                 if token.type.value != 'EOF':
-                    token_data.append({
-                        'type': token.type.value,
-                        'value': token.value,
-                        'line': token.line,
-                        'column': token.column
-                    })
-            output_lines.append(json.dumps(token_data, indent=2, ensure_ascii=False))
-        
-        non_eof_tokens = [t for t in tokens if t.type.value != 'EOF']
-        output_lines.append(f"\nEstatísticas:")
-        output_lines.append(f"  Total de tokens: {len(non_eof_tokens)}")
-        output_lines.append(f"  Linhas processadas: {max(t.line for t in tokens) if tokens else 0}")
+                    writer.write(token)
+            writer.end()
+            
+            report = ["Estatísticas:",
+                      f"  Total de tokens: {stats.tokens}",
+                      f"  Linhas processadas: {stats.lines}"]
+            if args.recover:
+                report.append(f"  Erros léxicos: {stats.error_count}")
+            if cache is not None:
+                report.append(f"  Cache: {cache.hits} acertos, {cache.misses} falhas")
+            if profile is not None:
+                report.extend(profile.report())
+            
+            # Nos formatos de texto as estatísticas seguem os tokens na mesma saída
+            if writer.out is not None and not writer.machine_readable:
+                writer.out.write('\n' + '\n'.join(report) + '\n')
+            else:
+                print('\n'.join(report), file=info)
+        finally:
+            if args.output:
+                writer.out.close()
+        if args.output:
+            print(f"Resultado salvo em: {args.output}")
         
-        result = '\n'.join(output_lines)
+        if timings is not None:
+            sys.stdout.flush()
+            timings.mark("Saída")
+            print(timings.report(), file=sys.stderr)
         
-        if args.output:
-            try:
-                with open(args.output, 'w', encoding='utf-8') as f:
-                    f.write(result)
-                print(f"Resultado salvo em: {args.output}")
-            except Exception as e:
-                print(f"Erro ao salvar arquivo: {e}", file=sys.stderr)
-                print(result)
-        else:
-            print(result)
+        if stats.error_count:
+            sys.stdout.flush()
+            print(f"Erros de análise léxica ({stats.error_count}):", file=sys.stderr)
+            for token in stats.errors:
+                print(f"  Linha {token.line}, coluna {token.column}: "
+                      f"trecho não reconhecido {token.value!r}", file=sys.stderr)
+            if stats.error_count > len(stats.errors):
+                print(f"  ... e mais {stats.error_count - len(stats.errors)} erros", file=sys.stderr)
+            sys.exit(1)
     
     except LexerError as e:
         print(f"Erro de análise léxica: {e}", file=sys.stderr)
         sys.exit(1)
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Erro ao ler arquivo: {e}", file=sys.stderr)
+        sys.exit(1)
     except Exception as e:
         print(f"Erro inesperado: {e}", file=sys.stderr)
         sys.exit(1)
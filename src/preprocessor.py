@@ -0,0 +1,287 @@
+"""
+Pré-processador: inclusão de arquivos e macros simples
+
+Diretivas, cada uma no início de uma linha:
+
+    include "comum/cabecalho.txt";
+    define LIMITE 100
+
+include é substituída pelos tokens do arquivo, pré-processado com as macros
+definidas até ali (o ';' final é opcional). O caminho é procurado a partir
+do diretório do arquivo que inclui e depois nos diretórios de inclusão.
+define cria uma macro de objeto: cada ocorrência seguinte do identificador
+é trocada pelos tokens do resto da linha, expandidos por sua vez (uma macro
+não se expande dentro da própria expansão). Macros definidas em um arquivo
+incluído continuam valendo depois do include.
+
+Cada arquivo é tokenizado uma vez por processo: os tokens ficam em um
+IncludeCache indexado pelo caminho e pelo hash do conteúdo, e são
+reaproveitados por todos os arquivos que o incluem. Os tokens emitidos
+guardam o arquivo de origem em Token.file.
+"""
+
+import hashlib
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.lexer import Lexer, LexerError, LexerSpec, Token, TokenType
+
+INCLUDE = 'include'
+DEFINE = 'define'
+
+# Tipos que não contam para reconhecer uma diretiva no início da linha
+_BLANK = frozenset((TokenType.WHITESPACE, TokenType.COMMENT))
+_LINE_END = frozenset((TokenType.NEWLINE, TokenType.EOF))
+
+_ESCAPE = re.compile(r'\\(.)', re.DOTALL)
+
+
+class PreprocessorError(LexerError):
+    """Erro em uma diretiva ou na análise léxica de um arquivo incluído"""
+
+    def __init__(self, message: str, line: int, column: int, offset: Optional[int] = None,
+                 path: Optional[str] = None):
+        super().__init__(message, line, column, offset)
+        self.path = path
+        if path is not None:
+            self.args = (f"Erro em {path}, linha {line}, coluna {column}: {message}",)
+
+
+class IncludeCache:
+    """
+    Tokens de cada arquivo, indexados pelo caminho, pelo hash do conteúdo e
+    pelas opções de análise. Um arquivo alterado tem outro hash e é
+    tokenizado de novo; o conteúdo lido a cada inclusão só é hasheado.
+
+    Os tokens são compartilhados entre todas as inclusões do arquivo e não
+    devem ser modificados.
+    """
+
+    def __init__(self):
+        self._entries: Dict[tuple, List[Token]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def tokens(self, path: str, spec: LexerSpec, engine: str,
+               skip_whitespace: bool, skip_comments: bool) -> List[Token]:
+        """Tokens do arquivo, até o EOF, tokenizando-o só na primeira vez"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        key = (path, digest, spec.key, skip_whitespace, skip_comments)
+        tokens = self._entries.get(key)
+        if tokens is not None:
+            self.hits += 1
+            return tokens
+
+        self.misses += 1
+        # Mesma normalização de quebras de linha do modo texto
+        text = data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+        lexer = Lexer(text, engine=engine, spec=spec)
+        lexer.index.path = path
+        try:
+            tokens = lexer.tokenize(skip_whitespace, skip_comments)
+        except LexerError as e:
+            raise PreprocessorError(e.message, e.line, e.column, e.offset, path) from None
+        self._entries[key] = tokens
+        return tokens
+
+
+# Cache compartilhado pelos pré-processadores do processo
+_SHARED_CACHE = IncludeCache()
+
+
+def clear_cache():
+    """Descarta os tokens memorizados de todos os arquivos"""
+    _SHARED_CACHE.clear()
+
+
+class Preprocessor:
+    """Expande diretivas include e define em uma sequência de tokens"""
+
+    def __init__(self, include_dirs: Sequence[str] = (), spec: Optional[LexerSpec] = None,
+                 engine: str = 'master', skip_whitespace: bool = True,
+                 skip_comments: bool = True, cache: Optional[IncludeCache] = None):
+        """
+        Args:
+            include_dirs: Diretórios onde procurar os arquivos incluídos
+                depois do diretório de quem inclui
+            spec: LexerSpec do dialeto (padrão: a de Lexer)
+            engine: Engine de tokenização
+            skip_whitespace: Se True, remove tokens de whitespace da saída
+            skip_comments: Se True, remove tokens de comentário da saída
+            cache: IncludeCache dos tokens por arquivo (padrão: o
+                compartilhado pelo processo)
+        """
+        self.include_dirs = list(include_dirs)
+        self.spec = spec if spec is not None else Lexer.SPEC
+        self.engine = engine
+        self.skip_whitespace = skip_whitespace
+        self.skip_comments = skip_comments
+        self.cache = cache if cache is not None else _SHARED_CACHE
+        self.macros: Dict[str, List[Token]] = {}
+        # Arquivos sendo incluídos, do mais externo ao atual
+        self._stack: List[str] = []
+
+    def process_file(self, path) -> List[Token]:
+        """Tokens do arquivo com as diretivas expandidas, terminando no EOF"""
+        path = os.path.realpath(path)
+        tokens = self.cache.tokens(path, self.spec, self.engine, self.skip_whitespace, self.skip_comments)
+        self._stack.append(path)
+        try:
+            output = list(self._expand(tokens, path))
+        finally:
+            self._stack.pop()
+        output.append(tokens[-1])
+        return output
+
+    def process(self, text: str, path: Optional[str] = None) -> List[Token]:
+        """
+        Tokens de um texto com as diretivas expandidas. path é o arquivo de
+        onde o texto veio; sem ele, os includes são procurados a partir do
+        diretório atual.
+        """
+        if path is not None:
+            path = os.path.realpath(path)
+        lexer = Lexer(text, engine=self.engine, spec=self.spec)
+        lexer.index.path = path
+        tokens = lexer.tokenize(self.skip_whitespace, self.skip_comments)
+        if path is not None:
+            self._stack.append(path)
+        try:
+            output = list(self._expand(tokens, path))
+        finally:
+            if path is not None:
+                self._stack.pop()
+        output.append(tokens[-1])
+        return output
+
+    def _expand_file(self, path: str) -> Iterator[Token]:
+        tokens = self.cache.tokens(path, self.spec, self.engine, self.skip_whitespace, self.skip_comments)
+        self._stack.append(path)
+        try:
+            yield from self._expand(tokens, path)
+        finally:
+            self._stack.pop()
+
+    def _expand(self, tokens: List[Token], path: Optional[str]) -> Iterator[Token]:
+        """Tokens de um arquivo, sem o EOF, com as diretivas expandidas"""
+        count = len(tokens) - 1
+        i = 0
+        line_start = True
+        while i < count:
+            token = tokens[i]
+            token_type = token.type
+            if token_type in _BLANK:
+                yield token
+                i += 1
+                continue
+            if line_start and token_type is TokenType.IDENTIFIER and token.value in (INCLUDE, DEFINE):
+                directive = self._directive(tokens, i, path)
+                if directive is not None:
+                    i, target = directive
+                    if target is not None:
+                        yield from self._include(target, token, path)
+                    line_start = False
+                    continue
+            line_start = token_type is TokenType.NEWLINE
+            if token_type is TokenType.IDENTIFIER and token.value in self.macros:
+                yield from self._expand_macro(token.value, frozenset())
+            else:
+                yield token
+            i += 1
+
+    def _directive(self, tokens: List[Token], i: int,
+                   path: Optional[str]) -> Optional[Tuple[int, Optional[str]]]:
+        """
+        Interpreta a diretiva em tokens[i]. Retorna o índice do fim da linha
+        e, para include, o arquivo a incluir; None se a linha não é uma
+        diretiva (ex.: 'include = 1;').
+        """
+        operand = self._next(tokens, i + 1)
+        if tokens[i].value == INCLUDE:
+            if tokens[operand].type is not TokenType.STRING_LITERAL:
+                return None
+            end = self._next(tokens, operand + 1)
+            if tokens[end].type is TokenType.SEMICOLON:
+                end = self._next(tokens, end + 1)
+            if tokens[end].type not in _LINE_END:
+                raise self._error(f"Texto inesperado após {INCLUDE}: '{tokens[end].value}'",
+                                  tokens[end], path)
+            return end, self._resolve(tokens[operand], path)
+
+        if tokens[operand].type is not TokenType.IDENTIFIER:
+            return None
+        end = operand + 1
+        while tokens[end].type not in _LINE_END:
+            end += 1
+        body = tokens[operand + 1:end]
+        while body and body[0].type in _BLANK:
+            del body[0]
+        while body and body[-1].type in _BLANK:
+            del body[-1]
+        self.macros[tokens[operand].value] = body
+        return end, None
+
+    @staticmethod
+    def _next(tokens: List[Token], i: int) -> int:
+        """Índice do próximo token que não é whitespace nem comentário (no máximo o EOF)"""
+        while tokens[i].type in _BLANK:
+            i += 1
+        return i
+
+    def _resolve(self, token: Token, path: Optional[str]) -> str:
+        """Caminho real do arquivo nomeado pelo literal de um include"""
+        name = _ESCAPE.sub(r'\1', token.value[1:-1])
+        if os.path.isabs(name):
+            candidates = [name]
+        else:
+            base = os.path.dirname(path) if path is not None else os.getcwd()
+            candidates = [os.path.join(directory, name) for directory in [base, *self.include_dirs]]
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                return os.path.realpath(candidate)
+        raise self._error(f"Arquivo incluído não encontrado: '{name}'", token, path)
+
+    def _include(self, target: str, token: Token, path: Optional[str]) -> Iterator[Token]:
+        if target in self._stack:
+            chain = self._stack[self._stack.index(target):] + [target]
+            raise self._error("Inclusão cíclica: " + ' -> '.join(os.path.basename(p) for p in chain),
+                              token, path)
+        try:
+            yield from self._expand_file(target)
+        except OSError as e:
+            raise self._error(f"Erro ao ler arquivo incluído: {e}", token, path) from None
+        except UnicodeDecodeError as e:
+            raise self._error(f"Arquivo incluído não está em UTF-8: {target} ({e.reason})",
+                              token, path) from None
+
+    def _expand_macro(self, name: str, active: frozenset) -> Iterator[Token]:
+        active = active | {name}
+        for token in self.macros[name]:
+            if token.type is TokenType.IDENTIFIER and token.value in self.macros \
+                    and token.value not in active:
+                yield from self._expand_macro(token.value, active)
+            else:
+                yield token
+
+    @staticmethod
+    def _error(message: str, token: Token, path: Optional[str]) -> PreprocessorError:
+        return PreprocessorError(message, token.line, token.column, token.offset, path)
+
+
+def preprocess_file(path, include_dirs: Sequence[str] = (), spec: Optional[LexerSpec] = None,
+                    engine: str = 'master', skip_whitespace: bool = True,
+                    skip_comments: bool = True) -> List[Token]:
+    """Tokeniza um arquivo expandindo includes e macros (ver Preprocessor)"""
+    preprocessor = Preprocessor(include_dirs, spec=spec, engine=engine,
+                                skip_whitespace=skip_whitespace, skip_comments=skip_comments)
+    return preprocessor.process_file(path)
@@ -0,0 +1,164 @@
+"""
+Instrumentação opcional da tokenização: padrões, tipos de token e regiões lentas
+"""
+
+import re
+import time
+from typing import Dict, Iterator, List, Tuple
+
+from src.lexer import LexerError, TokenType
+
+
+class LexerProfile:
+    """
+    Estatísticas coletadas por Lexer.tokenize(profile=...).
+
+    Para cada padrão de TOKEN_PATTERNS conta as tentativas e as falhas:
+    como os padrões são testados em ordem, um token reconhecido pelo padrão
+    i representa uma tentativa de cada padrão até i, com falha em todos os
+    anteriores. Também acumula o tempo gasto pelo engine em cada tipo de
+    token e em cada faixa de region_lines linhas.
+
+    Um mesmo objeto pode ser passado a várias tokenizações e soma todas.
+    """
+
+    def __init__(self, region_lines: int = 100):
+        if region_lines < 1:
+            raise ValueError("region_lines deve ser positivo")
+        self.region_lines = region_lines
+        self.patterns: List[Tuple[str, TokenType]] = []
+        self.matches: List[int] = []
+        self.errors = 0
+        self.type_counts: Dict[TokenType, int] = {}
+        self.type_ns: Dict[TokenType, int] = {}
+        self.region_ns: Dict[int, int] = {}
+        self.tokens = 0
+        self.bytes = 0
+        self.engine_ns = 0
+        self._compiled: List = []
+        self._keywords: Dict[str, TokenType] = {}
+        self._pattern_cache: Dict[Tuple[TokenType, str], int] = {}
+
+    @property
+    def attempts(self) -> List[int]:
+        # O padrão i é tentado em toda posição reconhecida por i ou por um
+        # padrão posterior, e em toda posição com erro
+        attempts = []
+        total = self.errors
+        for matches in reversed(self.matches):
+            total += matches
+            attempts.append(total)
+        return attempts[::-1]
+
+    @property
+    def failures(self) -> List[int]:
+        return [attempts - matches for attempts, matches in zip(self.attempts, self.matches)]
+
+    @property
+    def seconds(self) -> float:
+        """Tempo gasto pelo engine, sem o custo da própria instrumentação"""
+        return self.engine_ns / 1e9
+
+    def scan(self, lexer, skipped: frozenset) -> Iterator[Tuple[TokenType, int, int]]:
+        """Envolve o _scan_raw do lexer, medindo cada token gerado"""
+        self._bind(lexer)
+        text = lexer.text
+        if lexer.binary:
+            self.bytes += len(text)
+        else:
+            self.bytes += len(text) if text.isascii() else len(text.encode('utf-8'))
+
+        raw = lexer._scan_raw(frozenset())
+        clock = time.perf_counter_ns
+        binary = lexer.binary
+        line_of = lexer.index.line_of
+        matches, type_counts, type_ns, region_ns = self.matches, self.type_counts, self.type_ns, self.region_ns
+        region_lines = self.region_lines
+
+        while True:
+            started = clock()
+            try:
+                token = next(raw)
+            except StopIteration:
+                self.engine_ns += clock() - started
+                return
+            except LexerError:
+                self.engine_ns += clock() - started
+                self.errors += 1
+                raise
+            elapsed = clock() - started
+
+            token_type, start, end = token
+            if token_type is TokenType.ERROR:
+                # Trecho em que nenhum padrão casou (modo de recuperação)
+                self.errors += 1
+            else:
+                value = text[start:end]
+                index = self._pattern_index(token_type, str(value, 'utf-8') if binary else value)
+                matches[index] += 1
+
+            self.tokens += 1
+            self.engine_ns += elapsed
+            type_counts[token_type] = type_counts.get(token_type, 0) + 1
+            type_ns[token_type] = type_ns.get(token_type, 0) + elapsed
+            region = (line_of(start) - 1) // region_lines
+            region_ns[region] = region_ns.get(region, 0) + elapsed
+
+            if token_type not in skipped:
+                yield token
+
+    def _bind(self, lexer):
+        patterns = list(lexer.compiled.patterns)
+        if not self.patterns:
+            self.patterns = patterns
+            self.matches = [0] * len(patterns)
+            self._compiled = [re.compile(pattern) for pattern, _ in patterns]
+            self._keywords = lexer.compiled.keywords
+        elif patterns != self.patterns:
+            raise ValueError("LexerProfile já usado com outra lista de padrões")
+
+    def _pattern_index(self, token_type: TokenType, value: str) -> int:
+        """
+        Índice do padrão que reconheceu o token: o primeiro que casa o valor
+        inteiro (um anterior que casasse teria vencido na alternância)
+        """
+        key = (token_type, value)
+        index = self._pattern_cache.get(key)
+        if index is None:
+            if token_type is not TokenType.IDENTIFIER and value in self._keywords:
+                token_type = TokenType.IDENTIFIER
+            for index, (regex, (_, pattern_type)) in enumerate(zip(self._compiled, self.patterns)):
+                if pattern_type is token_type and regex.fullmatch(value):
+                    break
+            self._pattern_cache[key] = index
+        return index
+
+    def slowest_regions(self, count: int = 5) -> List[Tuple[int, int, float]]:
+        """As count faixas de linhas mais lentas: (primeira, última, segundos)"""
+        ranked = sorted(self.region_ns.items(), key=lambda item: item[1], reverse=True)[:count]
+        return [(region * self.region_lines + 1, (region + 1) * self.region_lines, ns / 1e9)
+                for region, ns in ranked]
+
+    def report(self) -> List[str]:
+        """Relatório legível para a CLI"""
+        seconds = self.seconds or 1e-9
+        lines = [
+            "\nPerfil da tokenização:",
+            f"  Tempo do engine: {self.seconds * 1000:.2f} ms",
+            f"  Vazão: {self.tokens / seconds:,.0f} tokens/s, {self.bytes / seconds / 1e6:.2f} MB/s",
+            "\n  Padrões (tentativas / falhas / casamentos):",
+        ]
+        for (pattern, token_type), attempts, failures, matches in zip(
+                self.patterns, self.attempts, self.failures, self.matches):
+            lines.append(f"    {pattern:<28} {token_type.value:<16} {attempts:>9} {failures:>9} {matches:>9}")
+
+        lines.append("\n  Tempo por tipo de token:")
+        for token_type, ns in sorted(self.type_ns.items(), key=lambda item: item[1], reverse=True):
+            lines.append(f"    {token_type.value:<16} {self.type_counts[token_type]:>9} tokens "
+                         f"{ns / 1e6:>10.3f} ms {ns / 1e9 / seconds:>7.1%}")
+
+        lines.append("\n  Regiões mais lentas:")
+        for first, last, region_seconds in self.slowest_regions():
+            lines.append(f"    linhas {first}-{last}: {region_seconds * 1000:.3f} ms "
+                         f"({region_seconds / seconds:.1%})")
+        return lines
@@ -0,0 +1,395 @@
+"""
+Servidor de análise léxica em um socket Unix, para evitar o custo de iniciar
+o interpretador a cada chamada
+
+Protocolo: cada mensagem é um JSON em UTF-8 precedido do seu tamanho (u32
+big-endian). Pedidos:
+
+    {"id": 1, "op": "lex", "text": "int x;", "format": "json",
+     "options": {"skip_whitespace": true, "skip_comments": true, "engine": "master"}}
+    {"id": 2, "op": "lex", "path": "arquivo.txt"}
+    {"id": 3, "op": "health"}
+    {"id": 4, "op": "stats"}
+
+Cada resposta traz o id do pedido e "ok". Um cliente pode enviar vários
+pedidos sem esperar as respostas, que chegam na ordem em que ficam prontas.
+"""
+
+import asyncio
+import json
+import math
+import os
+import socket
+import struct
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from src.lexer import Lexer, LexerError, iter_file_tokens
+
+_FRAME = struct.Struct('>I')
+
+FORMATS = ('json', 'simple', 'count')
+DEFAULT_MAX_PENDING = 64
+DEFAULT_MAX_REQUEST = 64 << 20
+# Número de latências recentes usadas nos percentis
+LATENCY_WINDOW = 10000
+
+
+class ProtocolError(Exception):
+    """Mensagem fora do protocolo do servidor"""
+    pass
+
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    """Serializa uma mensagem com o prefixo de tamanho"""
+    body = json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return _FRAME.pack(len(body)) + body
+
+
+def decode_body(body: bytes) -> Dict[str, Any]:
+    try:
+        message = json.loads(body)
+    except ValueError as e:
+        raise ProtocolError(f"JSON inválido: {e}")
+    if not isinstance(message, dict):
+        raise ProtocolError("A mensagem deve ser um objeto JSON")
+    return message
+
+
+async def read_frame(reader: asyncio.StreamReader,
+                     max_size: int = DEFAULT_MAX_REQUEST) -> Optional[bytes]:
+    """Lê o corpo de uma mensagem; None no fim da conexão"""
+    try:
+        header = await reader.readexactly(_FRAME.size)
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise ProtocolError("Conexão encerrada no meio de uma mensagem")
+        return None
+    size, = _FRAME.unpack(header)
+    if size > max_size:
+        raise ProtocolError(f"Mensagem de {size} bytes excede o limite de {max_size}")
+    try:
+        return await reader.readexactly(size)
+    except asyncio.IncompleteReadError:
+        raise ProtocolError("Conexão encerrada no meio de uma mensagem")
+
+
+def _warm_worker():
+    """Compila a regex mestre uma vez em cada processo do pool"""
+    Lexer("").tokenize()
+
+
+def lex_request(text: Optional[str], path: Optional[str], engine: str,
+                skip_whitespace: bool, skip_comments: bool, output: str) -> Dict[str, Any]:
+    """Executa um pedido de tokenização (nos workers) e monta a resposta"""
+    try:
+        if path is not None:
+            tokens = iter_file_tokens(path, engine, skip_whitespace=skip_whitespace,
+                                      skip_comments=skip_comments)
+        else:
+            tokens = Lexer(text, engine=engine).tokenize(skip_whitespace, skip_comments, as_buffer=True)
+
+        result: List[Any] = []
+        count = 0
+        for token in tokens:
+            count += 1
+            if output == 'json':
+                result.append({'type': token.type.value, 'value': token.value,
+                               'line': token.line, 'column': token.column})
+            elif output == 'simple':
+                result.append(str(token))
+        # O último token é o EOF, que está na última linha
+        response = {'ok': True, 'count': count - 1, 'lines': token.line}
+        if output != 'count':
+            response['tokens'] = result[:-1]
+        return response
+    except LexerError as e:
+        return {'ok': False, 'error': {'type': 'lexer', 'message': e.message,
+                                       'line': e.line, 'column': e.column}}
+    except (OSError, UnicodeDecodeError) as e:
+        return {'ok': False, 'error': {'type': 'io', 'message': f"Erro ao ler arquivo: {e}"}}
+
+
+def _parse_lex_request(request: Dict[str, Any]) -> tuple:
+    """Valida um pedido 'lex' e retorna os argumentos de lex_request"""
+    text, path = request.get('text'), request.get('path')
+    if (text is None) == (path is None):
+        raise ProtocolError("Informe exatamente um de 'text' ou 'path'")
+    if not isinstance(text if path is None else path, str):
+        raise ProtocolError("'text' e 'path' devem ser strings")
+
+    options = request.get('options') or {}
+    if not isinstance(options, dict):
+        raise ProtocolError("'options' deve ser um objeto")
+    unknown = set(options) - {'skip_whitespace', 'skip_comments', 'engine'}
+    if unknown:
+        raise ProtocolError(f"Opções desconhecidas: {', '.join(sorted(unknown))}")
+    engine = options.get('engine', 'master')
+    if engine not in Lexer.ENGINES:
+        raise ProtocolError(f"Engine desconhecido: {engine!r}")
+
+    output = request.get('format', 'json')
+    if output not in FORMATS:
+        raise ProtocolError(f"Formato desconhecido: {output!r} (opções: {', '.join(FORMATS)})")
+    return (text, path, engine, bool(options.get('skip_whitespace', True)),
+            bool(options.get('skip_comments', True)), output)
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    """Percentil pelo método do posto mais próximo"""
+    if not ordered:
+        return 0.0
+    rank = math.ceil(fraction * len(ordered))
+    return ordered[max(rank, 1) - 1]
+
+
+class LexerServer:
+    """
+    Servidor asyncio que recebe pedidos em um socket Unix e tokeniza em um
+    pool de processos, mantendo o lexer compilado entre pedidos.
+
+    O laço de eventos só lê, valida e responde; a tokenização roda no pool.
+    Cada conexão pode ter até max_pending pedidos em andamento: depois disso
+    o servidor para de ler dela até alguma resposta ser enviada, e o
+    cliente que continua escrevendo é contido pelo próprio socket.
+    """
+
+    def __init__(self, socket_path, workers: Optional[int] = None,
+                 max_pending: int = DEFAULT_MAX_PENDING,
+                 max_request_size: int = DEFAULT_MAX_REQUEST):
+        if max_pending < 1:
+            raise ValueError("max_pending deve ser positivo")
+        self.socket_path = os.fspath(socket_path)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.max_request_size = max_request_size
+        self.requests = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.connections = 0
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self._started = time.monotonic()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._tasks: set = set()
+
+    async def start(self):
+        """Cria o pool e passa a aceitar conexões"""
+        _remove_stale_socket(self.socket_path)
+        self._executor = ProcessPoolExecutor(self.workers, initializer=_warm_worker)
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        self._started = time.monotonic()
+
+    async def close(self):
+        """Para de aceitar conexões, espera os pedidos em andamento e encerra o pool"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        try:
+            os.remove(self.socket_path)
+        except OSError:
+            pass
+
+    async def __aenter__(self) -> 'LexerServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores e percentis de latência (em ms) dos pedidos recentes"""
+        ordered = sorted(self.latencies)
+        return {
+            'uptime': round(time.monotonic() - self._started, 3),
+            'workers': self.workers,
+            'connections': self.connections,
+            'requests': self.requests,
+            'failed': self.failed,
+            'in_flight': self.in_flight,
+            'latency_ms': {
+                'p50': round(_percentile(ordered, 0.50) * 1000, 3),
+                'p90': round(_percentile(ordered, 0.90) * 1000, 3),
+                'p99': round(_percentile(ordered, 0.99) * 1000, 3),
+                'max': round(ordered[-1] * 1000, 3) if ordered else 0.0,
+            },
+        }
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        pending = asyncio.Semaphore(self.max_pending)
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                await pending.acquire()
+                try:
+                    body = await read_frame(reader, self.max_request_size)
+                except ProtocolError as e:
+                    # Depois de uma mensagem malformada não há como
+                    # reencontrar o início da próxima
+                    await self._send(writer, write_lock, {'id': None, 'ok': False, 'error': {
+                        'type': 'protocol', 'message': str(e)}})
+                    break
+                except ConnectionError:
+                    break
+                if body is None:
+                    break
+                task = asyncio.ensure_future(self._respond(body, writer, write_lock, pending))
+                tasks.add(task)
+                self._tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(self._tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            self.connections -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _respond(self, body: bytes, writer: asyncio.StreamWriter,
+                       write_lock: asyncio.Lock, pending: asyncio.Semaphore):
+        started = time.perf_counter()
+        self.in_flight += 1
+        request_id = None
+        try:
+            request = decode_body(body)
+            request_id = request.get('id')
+            response = await self._dispatch(request)
+        except ProtocolError as e:
+            response = {'ok': False, 'error': {'type': 'request', 'message': str(e)}}
+        except Exception as e:
+            response = {'ok': False, 'error': {'type': 'internal', 'message': f"Erro inesperado: {e}"}}
+        finally:
+            self.in_flight -= 1
+        response['id'] = request_id
+
+        try:
+            await self._send(writer, write_lock, response)
+        except ConnectionError:
+            pass
+        finally:
+            pending.release()
+            self.requests += 1
+            if not response['ok']:
+                self.failed += 1
+            self.latencies.append(time.perf_counter() - started)
+
+    async def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get('op', 'lex')
+        if op == 'lex':
+            args = _parse_lex_request(request)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, lex_request, *args)
+        if op == 'health':
+            return {'ok': True, 'status': 'ok'}
+        if op == 'stats':
+            return {'ok': True, 'stats': self.stats()}
+        raise ProtocolError(f"Operação desconhecida: {op!r}")
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, write_lock: asyncio.Lock, message: Dict[str, Any]):
+        async with write_lock:
+            writer.write(encode_frame(message))
+            await writer.drain()
+
+
+def _remove_stale_socket(path: str):
+    """Remove um socket deixado por um servidor que não está mais rodando"""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.remove(path)
+    else:
+        raise OSError(f"Já existe um servidor ouvindo em {path}")
+    finally:
+        probe.close()
+
+
+class LexerClient:
+    """
+    Cliente síncrono do servidor. send()/receive() permitem enviar vários
+    pedidos antes de ler as respostas; request() faz os dois.
+    """
+
+    def __init__(self, socket_path, timeout: Optional[float] = None):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(os.fspath(socket_path))
+        self._file = self._socket.makefile('rb')
+        self._next_id = 0
+        self._responses: Dict[Any, Dict[str, Any]] = {}
+
+    def send(self, op: str = 'lex', **fields) -> int:
+        """Envia um pedido e retorna seu id"""
+        self._next_id += 1
+        message = dict(fields, id=self._next_id, op=op)
+        self._socket.sendall(encode_frame(message))
+        return self._next_id
+
+    def receive(self, request_id: int) -> Dict[str, Any]:
+        """Espera a resposta do pedido request_id"""
+        while request_id not in self._responses:
+            header = self._file.read(_FRAME.size)
+            if len(header) < _FRAME.size:
+                raise ConnectionError("Conexão encerrada pelo servidor")
+            size, = _FRAME.unpack(header)
+            response = decode_body(self._file.read(size))
+            self._responses[response.get('id')] = response
+        return self._responses.pop(request_id)
+
+    def request(self, op: str = 'lex', **fields) -> Dict[str, Any]:
+        return self.receive(self.send(op, **fields))
+
+    def lex(self, text: Optional[str] = None, path: Optional[str] = None,
+            format: str = 'json', **options) -> Dict[str, Any]:
+        """Tokeniza um texto ou arquivo; options vai no campo 'options'"""
+        fields = {'format': format, 'options': options}
+        if path is not None:
+            fields['path'] = os.fspath(path)
+        else:
+            fields['text'] = text
+        return self.request('lex', **fields)
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self) -> 'LexerClient':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def serve(socket_path, workers: Optional[int] = None,
+                max_pending: int = DEFAULT_MAX_PENDING, ready=None):
+    """Roda o servidor até receber SIGINT ou SIGTERM"""
+    import signal
+
+    server = LexerServer(socket_path, workers, max_pending)
+    await server.start()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    if ready is not None:
+        ready(server)
+    try:
+        await stop.wait()
+    finally:
+        await server.close()
@@ -0,0 +1,181 @@
+"""
+Cursor de tokens sob demanda para analisadores sintáticos
+"""
+
+from typing import Iterable, Iterator, List, Optional
+
+from src.lexer import Lexer, Token, TokenType, iter_file_tokens
+
+
+class UnexpectedTokenError(Exception):
+    """Token diferente do esperado por TokenStream.expect()"""
+
+    def __init__(self, token: Token, expected: TokenType, value: Optional[str] = None):
+        self.token = token
+        self.expected = expected
+        self.value = value
+        self.line = token.line
+        self.column = token.column
+        wanted = expected.value if value is None else f"{expected.value}({value})"
+        super().__init__(f"Erro sintático na linha {self.line}, coluna {self.column}: "
+                         f"esperado {wanted}, encontrado {token}")
+
+
+class TokenStream:
+    """
+    Cursor sobre uma sequência de tokens terminada em EOF, lida sob demanda
+    à medida que o analisador sintático consome os tokens.
+
+    Os tokens já lidos e ainda necessários ficam em um buffer circular: os
+    que ainda não foram consumidos (lookahead de peek) e, enquanto houver
+    marcas ativas, os posteriores à marca mais antiga. A memória depende da
+    profundidade do lookahead e do retrocesso, não do tamanho da entrada.
+    Depois do EOF, next() e peek() continuam retornando o EOF.
+    """
+
+    def __init__(self, tokens: Iterable[Token], capacity: int = 8):
+        self._source: Iterator[Token] = iter(tokens)
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._ring: List[Optional[Token]] = [None] * size
+        self._mask = size - 1
+        # Posições absolutas: _pos é o próximo token a consumir e
+        # [_start, _end) são os tokens guardados no buffer
+        self._start = 0
+        self._pos = 0
+        self._end = 0
+        self._marks: List[int] = []
+        self._eof: Optional[Token] = None
+
+    @classmethod
+    def from_text(cls, text, skip_whitespace: bool = True, skip_comments: bool = True,
+                  **options) -> "TokenStream":
+        """Stream de um texto; options são repassadas ao Lexer (engine, spec, recover...)"""
+        return cls(Lexer(text, **options).iter_tokens(skip_whitespace, skip_comments))
+
+    @classmethod
+    def from_file(cls, path, skip_whitespace: bool = True, skip_comments: bool = True,
+                  **options) -> "TokenStream":
+        """Stream de um arquivo lido em blocos ou mapeado (ver iter_file_tokens)"""
+        return cls(iter_file_tokens(path, skip_whitespace=skip_whitespace,
+                                    skip_comments=skip_comments, **options))
+
+    @property
+    def position(self) -> int:
+        """Número de tokens consumidos"""
+        return self._pos
+
+    @property
+    def at_end(self) -> bool:
+        """Se o próximo token é o EOF"""
+        return self.peek().type is TokenType.EOF
+
+    def peek(self, k: int = 0) -> Token:
+        """Token k posições à frente do próximo, sem consumi-lo (peek(0) é o próximo)"""
+        if k < 0:
+            raise ValueError("peek() não olha para trás; use mark() e reset()")
+        index = self._pos + k
+        if index >= self._end and not self._fill(index):
+            return self._eof
+        return self._ring[index & self._mask]
+
+    def next(self) -> Token:
+        """Consome e retorna o próximo token"""
+        token = self.peek()
+        if self._pos < self._end:
+            self._pos += 1
+            if not self._marks:
+                self._start = self._pos
+        return token
+
+    def expect(self, token_type: TokenType, value: Optional[str] = None) -> Token:
+        """
+        Consome o próximo token se ele for do tipo (e valor) dado; caso
+        contrário levanta UnexpectedTokenError sem consumir nada
+        """
+        token = self.peek()
+        if token.type is not token_type or (value is not None and token.value != value):
+            raise UnexpectedTokenError(token, token_type, value)
+        return self.next()
+
+    def accept(self, token_type: TokenType, value: Optional[str] = None) -> Optional[Token]:
+        """Consome e retorna o próximo token se ele for do tipo (e valor) dado, senão None"""
+        token = self.peek()
+        if token.type is not token_type or (value is not None and token.value != value):
+            return None
+        return self.next()
+
+    def mark(self) -> int:
+        """
+        Marca a posição atual para um retrocesso com reset(). Os tokens a
+        partir da marca ficam no buffer até ela ser liberada por reset() ou
+        release().
+        """
+        self._marks.append(self._pos)
+        return self._pos
+
+    def reset(self, mark: int):
+        """Volta à posição da marca e a libera"""
+        self.release(mark)
+        self._pos = mark
+
+    def release(self, mark: int):
+        """Libera a marca sem mudar a posição (o retrocesso não é mais necessário)"""
+        try:
+            self._marks.remove(mark)
+        except ValueError:
+            raise ValueError(f"Marca inexistente ou já liberada: {mark}") from None
+        self._discard()
+
+    def close(self):
+        """Encerra a fonte de tokens (ex.: fecha o arquivo mapeado)"""
+        close = getattr(self._source, 'close', None)
+        if close is not None:
+            close()
+
+    def __enter__(self) -> "TokenStream":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self) -> Iterator[Token]:
+        """Consome os tokens restantes, até o EOF inclusive"""
+        while True:
+            token = self.next()
+            yield token
+            if token.type is TokenType.EOF:
+                return
+
+    def _discard(self):
+        """Descarta os tokens anteriores à posição atual e à marca mais antiga"""
+        self._start = min([self._pos, *self._marks])
+
+    def _fill(self, index: int) -> bool:
+        """Lê tokens da fonte até guardar o de posição index; False se a fonte acabou antes"""
+        while self._end <= index:
+            if self._eof is not None:
+                return False
+            token = next(self._source, None)
+            if token is None:
+                # Fonte sem EOF: sintetiza um logo após o último token
+                last = self._ring[(self._end - 1) & self._mask] if self._end else None
+                token = Token(TokenType.EOF, "", last.line if last else 1,
+                              last.column + len(last.value) if last else 1)
+            if token.type is TokenType.EOF:
+                self._eof = token
+            if self._end - self._start == len(self._ring):
+                self._grow()
+            self._ring[self._end & self._mask] = token
+            self._end += 1
+        return True
+
+    def _grow(self):
+        """Dobra o buffer, mantendo cada token na posição absoluta & máscara"""
+        old, old_mask = self._ring, self._mask
+        size = len(old) * 2
+        ring: List[Optional[Token]] = [None] * size
+        for index in range(self._start, self._end):
+            ring[index & (size - 1)] = old[index & old_mask]
+        self._ring, self._mask = ring, size - 1
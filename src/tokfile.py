@@ -0,0 +1,257 @@
+"""
+Formato binário de tokens e leitor com acesso aleatório via mmap
+
+Layout (inteiros little-endian):
+    cabeçalho   magic 'LXTK', versão, flags, nº de tokens, nº de tipos,
+                nº de strings e os deslocamentos das seções
+    registros   um por token, de largura fixa: id do tipo, índice do valor na
+                tabela de strings, linha e coluna (4 x u32)
+    tipos       índice na tabela de strings do nome de cada id de tipo
+    strings     (n + 1) deslocamentos u64 seguidos dos valores em UTF-8
+
+Os valores são internados, então cada identificador, literal ou operador
+aparece uma única vez na tabela de strings.
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+from src.lexer import Token, TokenType
+
+MAGIC = b'LXTK'
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('<4sHHQIIQQQ')
+_RECORD = struct.Struct('<IIII')
+_NATIVE_LITTLE = sys.byteorder == 'little' and array('I').itemsize == 4
+
+
+class TokenFileError(Exception):
+    """Arquivo de tokens inválido ou de versão não suportada"""
+    pass
+
+
+# Registros acumulados antes de cada gravação no modo de streaming
+_FLUSH_RECORDS = 1 << 14
+
+
+class TokenFileWriter:
+    """
+    Acumula tokens em registros compactos e os grava no formato binário.
+
+    Com out (um arquivo binário novo, com seek), os registros são gravados
+    à medida que chegam e só a tabela de valores distintos fica em memória;
+    finish() grava as tabelas e então o cabeçalho no início do arquivo.
+    """
+
+    def __init__(self, out: Optional[BinaryIO] = None):
+        self._records = array('I')
+        self._strings: Dict[str, int] = {}
+        self._types: Dict[TokenType, int] = {}
+        self._count = 0
+        self._out = out
+        if out is not None:
+            out.write(bytes(_HEADER.size))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, token: Token):
+        """Acrescenta um token"""
+        type_id = self._types.get(token.type)
+        if type_id is None:
+            type_id = self._types[token.type] = len(self._types)
+        string_id = self._strings.get(token.value)
+        if string_id is None:
+            string_id = self._strings[token.value] = len(self._strings)
+        self._records.extend((type_id, string_id, token.line, token.column))
+        self._count += 1
+        if self._out is not None and len(self._records) >= _FLUSH_RECORDS * 4:
+            self._out.write(self._record_bytes())
+            self._records = array('I')
+
+    def extend(self, tokens: Iterable[Token]):
+        for token in tokens:
+            self.add(token)
+
+    def write(self, out: BinaryIO):
+        """Grava o arquivo em um stream binário"""
+        if self._out is not None:
+            raise ValueError("TokenFileWriter com out grava os tokens em finish()")
+        type_ids, strings = self._tables()
+        out.write(self._header(len(type_ids), len(strings)))
+        out.write(self._record_bytes())
+        self._write_tables(out, type_ids, strings)
+
+    def finish(self):
+        """Grava os registros pendentes, as tabelas e o cabeçalho (modo com out)"""
+        out = self._out
+        out.write(self._record_bytes())
+        self._records = array('I')
+        type_ids, strings = self._tables()
+        self._write_tables(out, type_ids, strings)
+        end = out.tell()
+        out.seek(0)
+        out.write(self._header(len(type_ids), len(strings)))
+        out.seek(end)
+
+    def _record_bytes(self) -> bytes:
+        records = self._records
+        if not _NATIVE_LITTLE:
+            records = array('I', records)
+            records.byteswap()
+        return records.tobytes()
+
+    def _tables(self):
+        """Ids dos nomes dos tipos e a tabela de strings (incluindo os nomes)"""
+        strings = list(self._strings)
+        type_ids = array('I')
+        for token_type in self._types:
+            name = token_type.name
+            if name not in self._strings:
+                self._strings[name] = len(strings)
+                strings.append(name)
+            type_ids.append(self._strings[name])
+        return type_ids, strings
+
+    def _header(self, type_count: int, string_count: int) -> bytes:
+        records_offset = _HEADER.size
+        types_offset = records_offset + self._count * _RECORD.size
+        strings_offset = types_offset + type_count * 4
+        return _HEADER.pack(MAGIC, FORMAT_VERSION, 0, self._count, type_count, string_count,
+                            records_offset, types_offset, strings_offset)
+
+    def _write_tables(self, out: BinaryIO, type_ids: array, strings: List[str]):
+        blob = [value.encode('utf-8') for value in strings]
+        offsets = array('Q', [0])
+        for value in blob:
+            offsets.append(offsets[-1] + len(value))
+
+        types = type_ids
+        if not _NATIVE_LITTLE:
+            types, offsets = array('I', types), array('Q', offsets)
+            for data in (types, offsets):
+                data.byteswap()
+
+        out.write(types.tobytes())
+        out.write(offsets.tobytes())
+        for value in blob:
+            out.write(value)
+
+
+def write_token_file(path, tokens: Iterable[Token]) -> int:
+    """Grava os tokens em um arquivo binário e retorna quantos foram gravados"""
+    writer = TokenFileWriter()
+    writer.extend(tokens)
+    with open(path, 'wb') as f:
+        writer.write(f)
+    return len(writer)
+
+
+class TokenFile:
+    """
+    Leitor de um arquivo de tokens mapeado em memória.
+
+    Só o cabeçalho e a tabela de tipos são lidos ao abrir; cada token é
+    decodificado quando acessado, então tokens[i] custa o mesmo em
+    qualquer posição e tamanho de arquivo.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            try:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise TokenFileError("Arquivo de tokens vazio")
+
+        try:
+            self._load_header()
+        except Exception:
+            self._data.close()
+            raise
+        self._values: Dict[int, str] = {}
+
+    def _load_header(self):
+        data = self._data
+        if len(data) < _HEADER.size:
+            raise TokenFileError("Arquivo de tokens truncado")
+        (magic, version, _, self._count, type_count, self._string_count,
+         self._records_offset, types_offset, self._strings_offset) = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise TokenFileError("Não é um arquivo de tokens")
+        if version != FORMAT_VERSION:
+            raise TokenFileError(f"Versão de formato não suportada: {version}")
+
+        self._blob_offset = self._strings_offset + (self._string_count + 1) * 8
+        if self._blob_offset > len(data):
+            raise TokenFileError("Arquivo de tokens truncado")
+        end = self._blob_offset + self._string_offset(self._string_count)
+        if (self._records_offset + self._count * _RECORD.size > types_offset
+                or end > len(data)):
+            raise TokenFileError("Arquivo de tokens truncado")
+
+        self._types: List[TokenType] = []
+        for type_id in range(type_count):
+            index, = struct.unpack_from('<I', data, types_offset + type_id * 4)
+            try:
+                self._types.append(TokenType[self._string(index)])
+            except KeyError:
+                raise TokenFileError(f"Tipo de token desconhecido: {self._string(index)!r}")
+
+    def _string_offset(self, index: int) -> int:
+        return struct.unpack_from('<Q', self._data, self._strings_offset + index * 8)[0]
+
+    def _string(self, index: int) -> str:
+        start = self._string_offset(index)
+        end = self._string_offset(index + 1)
+        base = self._blob_offset
+        return str(self._data[base + start:base + end], 'utf-8')
+
+    def _value(self, index: int) -> str:
+        value = self._values.get(index)
+        if value is None:
+            value = self._values[index] = self._string(index)
+        return value
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Token:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("índice de token fora do intervalo")
+        type_id, string_id, line, column = _RECORD.unpack_from(
+            self._data, self._records_offset + index * _RECORD.size)
+        return Token(self._types[type_id], self._value(string_id), line, column)
+
+    def __iter__(self) -> Iterator[Token]:
+        start = self._records_offset
+        end = start + self._count * _RECORD.size
+        if _NATIVE_LITTLE:
+            records = memoryview(self._data)[start:end].cast('I')
+            try:
+                fields = iter(records)
+                types, value = self._types, self._value
+                for type_id, string_id, line, column in zip(fields, fields, fields, fields):
+                    yield Token(types[type_id], value(string_id), line, column)
+            finally:
+                records.release()
+        else:
+            for index in range(self._count):
+                yield self[index]
+
+    def close(self):
+        self._data.close()
+
+    def __enter__(self) -> 'TokenFile':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"<TokenFile: {len(self)} tokens>"
@@ -0,0 +1,351 @@
+"""
+Modo de observação: mantém em memória o resultado da análise léxica de uma
+árvore de arquivos e re-tokeniza só os que mudaram.
+
+A cada ciclo, diretórios só são relidos se a data de modificação deles
+mudou (entradas criadas ou removidas) e arquivos só são lidos se a data de
+modificação ou o tamanho mudaram; mesmo assim, um arquivo só é
+re-tokenizado se o hash do conteúdo for outro. As mudanças viram eventos
+(dicionários JSON) com o novo resultado e as diferenças nos erros e nas
+contagens, seguidos de um resumo da árvore.
+
+Uso:
+    python -m src.main watch src/ --interval 0.5
+    python -m src.main watch src/ --format ndjson --socket /tmp/lexer-watch.sock
+"""
+
+import hashlib
+import os
+import socket
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.lexer import Lexer, LexerError, LexerSpec, LineIndex
+
+DEFAULT_INTERVAL = 1.0
+
+# Mudanças a partir das quais a re-tokenização usa o pool de processos
+PARALLEL_MIN_FILES = 16
+
+# Um erro: (linha, coluna, mensagem)
+Error = Tuple[int, int, str]
+
+
+@dataclass
+class FileStatus:
+    """Resultado da análise de um arquivo e a assinatura usada para detectar mudanças"""
+    path: str
+    # -1 força a releitura no próximo ciclo (ver Watcher._racy)
+    mtime_ns: int = -1
+    size: int = 0
+    digest: str = ''
+    tokens: int = 0
+    lines: int = 0
+    errors: List[Error] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'path': self.path, 'tokens': self.tokens, 'lines': self.lines,
+                'errors': [_error_dict(error) for error in self.errors]}
+
+
+def _error_dict(error: Error) -> Dict[str, Any]:
+    line, column, message = error
+    return {'line': line, 'column': column, 'message': message}
+
+
+def check_file(path: str, digest: str, spec: Optional[LexerSpec] = None, recover: bool = False,
+               max_errors: int = 100) -> Tuple[str, int, int, str, Optional[FileStatus]]:
+    """
+    Lê o arquivo e, se o hash do conteúdo não for digest, o tokeniza
+    (executado nos workers). Retorna (caminho, mtime, tamanho, hash,
+    resultado), com resultado None se o conteúdo não mudou.
+    """
+    try:
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            data = f.read()
+    except OSError as e:
+        status = FileStatus(path, errors=[(0, 0, f"Erro ao ler arquivo: {e}")])
+        return path, -1, 0, '', status
+
+    new_digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    if new_digest == digest:
+        return path, st.st_mtime_ns, st.st_size, new_digest, None
+
+    status = FileStatus(path, st.st_mtime_ns, st.st_size, new_digest)
+    if data.find(b'\r') != -1:
+        # Mesma normalização de quebras de linha do modo texto
+        data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    lexer = Lexer(data, recover=recover, max_errors=max_errors, spec=spec)
+    try:
+        for _ in lexer._scan_raw(lexer._skipped_types(True, True)):
+            status.tokens += 1
+    except LexerError as e:
+        status.tokens = 0
+        status.errors = [(e.line, e.column, e.message)]
+    else:
+        status.errors = [(e.line, e.column, e.message) for e in lexer.errors]
+    status.lines = len(LineIndex(data))
+    return path, status.mtime_ns, status.size, new_digest, status
+
+
+class Watcher:
+    """
+    Acompanha os arquivos sob roots (arquivos ou diretórios, percorridos
+    recursivamente sem entradas ocultas). Cada chamada a poll() detecta as
+    mudanças desde a anterior e retorna os eventos; a primeira anuncia
+    todos os arquivos como 'added'.
+    """
+
+    def __init__(self, roots: Iterable[str], spec: Optional[LexerSpec] = None,
+                 recover: bool = False, max_errors: int = 100, jobs: int = 1):
+        self.roots = [os.path.normpath(root) for root in roots]
+        self.files: Dict[str, FileStatus] = {}
+        self._check = partial(check_file, spec=spec, recover=recover, max_errors=max_errors)
+        self.jobs = jobs
+        self._pool = None
+        # Diretório -> (mtime, arquivos, subdiretórios) da última leitura
+        self._dirs: Dict[str, Tuple[int, List[str], List[str]]] = {}
+        self.tokens = 0
+        self.lines = 0
+        self.error_count = 0
+        self.failed = 0
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Um ciclo de observação: eventos das mudanças e, se houve alguma, um resumo"""
+        started = time.time_ns()
+        present = self._scan()
+        events = []
+
+        for path in [path for path in self.files if path not in present]:
+            status = self.files.pop(path)
+            self._account(status, -1)
+            events.append(self._event('removed', status, None))
+
+        stale = []
+        for path, (mtime_ns, size) in present.items():
+            status = self.files.get(path)
+            if status is None or status.mtime_ns != mtime_ns or status.size != size:
+                stale.append((path, status.digest if status is not None else ''))
+
+        for path, mtime_ns, size, digest, result in self._run(stale):
+            previous = self.files.get(path)
+            if result is None or (previous is not None and
+                                  (previous.digest, previous.errors) == (result.digest, result.errors)):
+                # Mesmo conteúdo (ex.: touch) ou mesma falha de leitura: só a
+                # assinatura muda
+                status = previous
+            else:
+                if previous is not None:
+                    self._account(previous, -1)
+                self._account(result, 1)
+                self.files[path] = status = result
+                events.append(self._event('changed' if previous is not None else 'added',
+                                          previous, result))
+            status.mtime_ns = -1 if self._racy(mtime_ns, started) else mtime_ns
+            status.size = size
+
+        if events:
+            events.append(self.summary())
+        return events
+
+    def summary(self) -> Dict[str, Any]:
+        return {'event': 'summary', 'files': len(self.files), 'tokens': self.tokens,
+                'lines': self.lines, 'errors': self.error_count, 'failed': self.failed}
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Estado atual como eventos: os arquivos com erro e o resumo"""
+        events = [dict(status.to_dict(), event='error')
+                  for status in sorted(self.files.values(), key=lambda s: s.path) if status.errors]
+        events.append(self.summary())
+        return events
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self) -> 'Watcher':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _racy(mtime_ns: int, started: int) -> bool:
+        """
+        Um arquivo modificado pouco antes da leitura pode mudar de novo sem
+        que a data mude (resolução do sistema de arquivos); sua assinatura
+        não é confiável e ele é relido (e comparado pelo hash) no próximo
+        ciclo.
+        """
+        return mtime_ns >= started - 2_000_000_000
+
+    def _run(self, stale: List[Tuple[str, str]]):
+        if self.jobs > 1 and len(stale) >= PARALLEL_MIN_FILES:
+            if self._pool is None:
+                from multiprocessing import Pool
+                self._pool = Pool(self.jobs)
+            chunksize = max(1, min(64, len(stale) // (self.jobs * 8)))
+            return self._pool.starmap(self._check, stale, chunksize)
+        return [self._check(path, digest) for path, digest in stale]
+
+    def _account(self, status: FileStatus, sign: int):
+        self.tokens += sign * status.tokens
+        self.lines += sign * status.lines
+        self.error_count += sign * len(status.errors)
+        if status.errors:
+            self.failed += sign
+
+    @staticmethod
+    def _event(kind: str, previous: Optional[FileStatus], current: Optional[FileStatus]) -> Dict[str, Any]:
+        event = (current or previous).to_dict()
+        event['event'] = kind
+        if current is None:
+            return event
+        old_errors = set(previous.errors) if previous is not None else set()
+        new_errors = set(current.errors)
+        event['new_errors'] = [_error_dict(error) for error in sorted(new_errors - old_errors)]
+        event['fixed_errors'] = [_error_dict(error) for error in sorted(old_errors - new_errors)]
+        if previous is not None:
+            event['delta'] = {'tokens': current.tokens - previous.tokens,
+                              'lines': current.lines - previous.lines,
+                              'errors': len(current.errors) - len(previous.errors)}
+        return event
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """(mtime, tamanho) de cada arquivo sob as raízes"""
+        present: Dict[str, Tuple[int, int]] = {}
+        seen_dirs = set()
+        pending = []
+        for root in self.roots:
+            if os.path.isdir(root):
+                pending.append(root)
+            else:
+                self._stat_file(root, present)
+
+        while pending:
+            directory = pending.pop()
+            if directory in seen_dirs:
+                continue
+            seen_dirs.add(directory)
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            cached = self._dirs.get(directory)
+            if cached is None or cached[0] != mtime_ns:
+                cached = self._list(directory, mtime_ns)
+            _, files, subdirs = cached
+            for path in files:
+                self._stat_file(path, present)
+            pending.extend(subdirs)
+
+        for directory in [d for d in self._dirs if d not in seen_dirs]:
+            del self._dirs[directory]
+        return present
+
+    def _list(self, directory: str, mtime_ns: int) -> Tuple[int, List[str], List[str]]:
+        files, subdirs = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        files.append(entry.path)
+        except OSError:
+            pass
+        listing = self._dirs[directory] = (mtime_ns, files, subdirs)
+        return listing
+
+    @staticmethod
+    def _stat_file(path: str, present: Dict[str, Tuple[int, int]]):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        present[path] = (st.st_mtime_ns, st.st_size)
+
+
+class EventBroadcaster:
+    """
+    Envia eventos, no formato de mensagens do servidor (src.server), a
+    todos os clientes conectados a um socket Unix. Cada cliente novo recebe
+    primeiro o estado atual; clientes que não aceitam os dados a tempo são
+    desconectados.
+    """
+
+    def __init__(self, socket_path, timeout: float = 1.0):
+        from src.server import _remove_stale_socket
+        self.socket_path = os.fspath(socket_path)
+        _remove_stale_socket(self.socket_path)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.socket_path)
+        self._listener.listen()
+        self._listener.setblocking(False)
+        self.timeout = timeout
+        self.clients: List[socket.socket] = []
+
+    def accept(self, snapshot: List[Dict[str, Any]]):
+        """Aceita as conexões pendentes, enviando snapshot a cada uma"""
+        while True:
+            try:
+                client, _ = self._listener.accept()
+            except BlockingIOError:
+                return
+            client.settimeout(self.timeout)
+            self.clients.append(client)
+            self._send(client, snapshot)
+
+    def send(self, events: List[Dict[str, Any]]):
+        for client in list(self.clients):
+            self._send(client, events)
+
+    def _send(self, client: socket.socket, events: List[Dict[str, Any]]):
+        from src.server import encode_frame
+        try:
+            client.sendall(b''.join(encode_frame(event) for event in events))
+        except OSError:
+            self.clients.remove(client)
+            client.close()
+
+    def close(self):
+        for client in self.clients:
+            client.close()
+        self.clients = []
+        self._listener.close()
+        try:
+            os.remove(self.socket_path)
+        except OSError:
+            pass
+
+
+def format_event(event: Dict[str, Any]) -> List[str]:
+    """Linhas de texto de um evento para a CLI"""
+    kind = event['event']
+    if kind == 'summary':
+        return [f"Arquivos: {event['files']}, tokens: {event['tokens']}, linhas: {event['lines']}, "
+                f"erros: {event['errors']} em {event['failed']} arquivos"]
+    if kind == 'removed':
+        return [f"- {event['path']}"]
+    if kind == 'added' and not event['errors']:
+        # A leitura inicial anuncia todos os arquivos; só os com erro interessam
+        return []
+    mark = {'added': '+', 'changed': '~', 'error': '!'}[kind]
+    line = f"{mark} {event['path']}: {event['tokens']} tokens, {event['lines']} linhas"
+    delta = event.get('delta')
+    if delta is not None and any(delta.values()):
+        line += " (" + ", ".join(f"{value:+d} {name}" for name, value in delta.items() if value) + ")"
+    lines = [line]
+    errors = event.get('new_errors', event['errors'])
+    for error in errors:
+        lines.append(f"  Linha {error['line']}, coluna {error['column']}: {error['message']}")
+    for error in event.get('fixed_errors', ()):
+        lines.append(f"  Corrigido: linha {error['line']}, coluna {error['column']}: {error['message']}")
+    return lines
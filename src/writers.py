@@ -0,0 +1,174 @@
+"""
+Escritores de saída da CLI: cada token é formatado e escrito assim que é
+produzido, sem acumular a saída inteira em memória
+"""
+
+from typing import BinaryIO, Dict, List, Optional, TextIO
+
+from src.lexer import Token, TokenType
+
+
+def token_record(token: Token) -> Dict:
+    """Token como dicionário JSON (tipo, valor, linha e coluna)"""
+    return {
+        'type': token.type.value,
+        'value': token.value,
+        'line': token.line,
+        'column': token.column,
+    }
+
+
+class TokenStats:
+    """Estatísticas acumuladas à medida que os tokens passam"""
+
+    def __init__(self, max_errors: int = 100):
+        self.tokens = 0
+        self.lines = 0
+        self.error_count = 0
+        self.errors: List[Token] = []
+        self.max_errors = max_errors
+
+    def add(self, token: Token):
+        if token.type is TokenType.EOF:
+            # O EOF fica na última linha; os demais só resolvem a posição
+            # se o formato de saída precisar dela
+            self.lines = token.line
+            return
+        self.tokens += 1
+        if token.type is TokenType.ERROR:
+            self.error_count += 1
+            if len(self.errors) < self.max_errors:
+                self.errors.append(token)
+
+
+class TokenWriter:
+    """Base dos escritores: begin(), write(token) para cada token e end()"""
+
+    # Formatos legíveis por programas; mensagens e estatísticas vão para
+    # stderr para não misturá-las aos tokens
+    machine_readable = False
+
+    def __init__(self, out: TextIO):
+        self.out = out
+
+    def begin(self):
+        pass
+
+    def write(self, token: Token):
+        raise NotImplementedError
+
+    def end(self):
+        pass
+
+
+class SimpleWriter(TokenWriter):
+    """Um token por linha, como str(token)"""
+
+    def begin(self):
+        self.out.write("Tokens:\n")
+
+    def write(self, token: Token):
+        self.out.write(f"  {token}\n")
+
+
+class DetailedWriter(TokenWriter):
+    """Tabela com tipo, valor, linha e coluna"""
+
+    def begin(self):
+        self.out.write("Análise detalhada:\n")
+        self.out.write(f"{'Tipo':<20} {'Valor':<15} {'Linha':<6} {'Coluna':<6}\n")
+        self.out.write("-" * 50 + "\n")
+
+    def write(self, token: Token):
+        self.out.write(f"{token.type.value:<20} {repr(token.value):<15} "
+                       f"{token.line:<6} {token.column:<6}\n")
+
+
+class JsonWriter(TokenWriter):
+    """Lista JSON indentada, escrita item a item"""
+
+    def __init__(self, out: TextIO):
+        import json
+        super().__init__(out)
+        self._dumps = json.dumps
+        self._separator = "[\n"
+
+    def write(self, token: Token):
+        item = self._dumps(token_record(token), indent=2, ensure_ascii=False)
+        self.out.write(self._separator + "  " + item.replace("\n", "\n  "))
+        self._separator = ",\n"
+
+    def end(self):
+        self.out.write("[]\n" if self._separator == "[\n" else "\n]\n")
+
+
+class NdjsonWriter(TokenWriter):
+    """Um objeto JSON por linha"""
+
+    machine_readable = True
+
+    def __init__(self, out: TextIO):
+        import json
+        super().__init__(out)
+        self._dumps = json.dumps
+
+    def write(self, token: Token):
+        self.out.write(self._dumps(token_record(token), ensure_ascii=False) + "\n")
+
+
+class CsvWriter(TokenWriter):
+    """CSV com cabeçalho type,value,line,column"""
+
+    machine_readable = True
+
+    def __init__(self, out: TextIO):
+        import csv
+        super().__init__(out)
+        self._writer = csv.writer(out, lineterminator="\n")
+
+    def begin(self):
+        self._writer.writerow(('type', 'value', 'line', 'column'))
+
+    def write(self, token: Token):
+        self._writer.writerow((token.type.value, token.value, token.line, token.column))
+
+
+class BinaryWriter(TokenWriter):
+    """Formato binário de src.tokfile, gravado à medida que os tokens chegam"""
+
+    machine_readable = True
+
+    def __init__(self, out: BinaryIO):
+        from src.tokfile import TokenFileWriter
+        super().__init__(out)
+        self._writer = TokenFileWriter(out)
+
+    def write(self, token: Token):
+        self._writer.add(token)
+
+    def end(self):
+        self._writer.finish()
+
+
+class NullWriter(TokenWriter):
+    """Descarta os tokens (--quiet: só as estatísticas)"""
+
+    def write(self, token: Token):
+        pass
+
+
+WRITERS = {
+    'simple': SimpleWriter,
+    'detailed': DetailedWriter,
+    'json': JsonWriter,
+    'ndjson': NdjsonWriter,
+    'csv': CsvWriter,
+    'binary': BinaryWriter,
+}
+
+
+def make_writer(format: str, out: Optional[TextIO]) -> TokenWriter:
+    """Escritor do formato dado; sem out, um que descarta os tokens"""
+    if out is None:
+        return NullWriter(out)
+    return WRITERS[format](out)
@@ -0,0 +1,152 @@
+import unittest
+import sys
+import os
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analytics import CorpusStats, Histogram, TopK, analyze_corpus, analyze_file
+from src.batch import expand_paths
+from src.lexer import Lexer, TokenType
+
+EXEMPLOS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'exemplos')
+
+
+class TestTopK(unittest.TestCase):
+    """Testes para o contador de frequências com memória limitada"""
+
+    def test_exact_below_capacity(self):
+        """Testa contagens exatas enquanto cabem na tabela"""
+        table = TopK(10)
+        for value in 'abacaba':
+            table.add(value)
+        self.assertEqual(table.most_common(2), [('a', 4), ('b', 2)])
+        self.assertEqual(table.error, 0)
+
+    def test_bounded_memory(self):
+        """Testa que valores raros são descartados e os frequentes sobrevivem"""
+        table = TopK(4)
+        for i in range(1000):
+            table.add('frequente')
+            table.add(f'raro{i}')
+        self.assertLessEqual(len(table), 8)
+        self.assertEqual(table.most_common(1), [('frequente', 1000)])
+        self.assertEqual(table.error, 1)
+
+    def test_merge(self):
+        """Testa a soma das contagens de duas tabelas"""
+        first, second = TopK(10), TopK(10)
+        first.add('x', 3)
+        second.add('x', 2)
+        second.add('y')
+        first.merge(second)
+        self.assertEqual(first.counts, {'x': 5, 'y': 1})
+
+
+class TestHistogram(unittest.TestCase):
+    """Testes para as distribuições em faixas de potências de 2"""
+
+    def test_ranges_and_percentiles(self):
+        """Testa as faixas não vazias, os percentis e a média"""
+        histogram = Histogram()
+        for value in (0, 1, 2, 3, 4, 100):
+            histogram.add(value)
+        self.assertEqual(histogram.ranges(), [(0, 0, 1), (1, 1, 1), (2, 3, 2), (4, 7, 1), (64, 127, 1)])
+        self.assertEqual(histogram.percentile(0.5), 3)
+        self.assertEqual(histogram.percentile(1.0), 100)
+        self.assertAlmostEqual(histogram.mean, 110 / 6)
+
+
+class TestCorpusStats(unittest.TestCase):
+    """Testes para as métricas de corpus"""
+
+    def setUp(self):
+        self.paths = list(expand_paths([EXEMPLOS_DIR]))
+
+    def test_counts_match_lexer(self):
+        """Testa que as contagens por tipo e as frequências batem com a tokenização"""
+        path = os.path.join(EXEMPLOS_DIR, '08_bubble_sort.txt')
+        stats = analyze_file(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        tokens = Lexer(text).tokenize(skip_whitespace=False, skip_comments=False)
+        expected = Counter(token.type for token in tokens)
+        for token_type in TokenType:
+            self.assertEqual(stats.count(token_type), expected[token_type], token_type)
+        identifiers = Counter(t.value for t in tokens if t.type is TokenType.IDENTIFIER)
+        self.assertEqual(stats.identifiers.most_common(1)[0][1], identifiers.most_common(1)[0][1])
+        self.assertEqual(stats.lines, tokens[-1].line)
+        self.assertEqual(stats.line_lengths.max, max(len(line) for line in text.split('\n')))
+        self.assertEqual(stats.comment_bytes, sum(len(t.value.encode('utf-8')) for t in tokens
+                                                  if t.type is TokenType.COMMENT))
+
+    def test_parallel_equals_sequential(self):
+        """Testa que juntar os resultados dos workers dá o mesmo que a análise sequencial"""
+        sequential = analyze_corpus(self.paths, jobs=1).to_dict()
+        parallel = analyze_corpus(self.paths, jobs=2).to_dict()
+        for result in (sequential, parallel):
+            del result['seconds']
+        self.assertEqual(parallel['types'], sequential['types'])
+        self.assertEqual(sorted(map(str, parallel['identifiers'])), sorted(map(str, sequential['identifiers'])))
+        self.assertEqual(parallel['line_lengths'], sequential['line_lengths'])
+        self.assertEqual(parallel['files'], len(self.paths))
+
+    def test_failed_file(self):
+        """Testa que arquivos com erro léxico são contados à parte, ou com ERROR em recover"""
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'erro.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('int x = @;\n')
+            failed = analyze_file(path)
+            recovered = analyze_file(path, recover=True)
+        self.assertEqual((failed.files, failed.failed, failed.tokens), (1, 1, 0))
+        self.assertIn('linha 1, coluna 9', failed.errors[0][1])
+        self.assertEqual(recovered.failed, 0)
+        self.assertEqual(recovered.count(TokenType.ERROR), 1)
+
+    def test_crlf_file(self):
+        """Testa que arquivos com quebras de linha CRLF ou CR são analisados como LF"""
+        import tempfile
+        path = os.path.join(EXEMPLOS_DIR, '08_bubble_sort.txt')
+        with open(path, 'rb') as f:
+            data = f.read()
+        expected = analyze_file(path).to_dict()
+        del expected['seconds']
+        with tempfile.TemporaryDirectory() as tmp:
+            for newline in (b'\r\n', b'\r'):
+                with self.subTest(newline=newline):
+                    converted = os.path.join(tmp, 'convertido.txt')
+                    with open(converted, 'wb') as f:
+                        f.write(data.replace(b'\n', newline))
+                    stats = analyze_file(converted).to_dict()
+                    del stats['seconds']
+                    self.assertEqual(stats, expected)
+
+    def test_unicode_digits(self):
+        """Testa que dígitos não ASCII contam como no texto decodificado"""
+        import tempfile
+        code = 'x = ٣;\ny = 12٣ + 1.٣;\n'
+        tokens = Lexer(code).tokenize(skip_whitespace=False, skip_comments=False)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'digitos.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(code)
+            stats = analyze_file(path)
+        self.assertEqual((stats.failed, stats.errors), (0, []))
+        expected = Counter(token.type for token in tokens)
+        for token_type in TokenType:
+            self.assertEqual(stats.count(token_type), expected[token_type], token_type)
+        self.assertEqual(sorted(value for value, _ in stats.literals.most_common(3)),
+                         sorted(t.value.encode('utf-8') for t in tokens if t.type is TokenType.NUMBER))
+
+    def test_merge_empty(self):
+        """Testa que juntar um resultado vazio não altera as métricas"""
+        stats = analyze_file(self.paths[0])
+        before = stats.to_dict()
+        stats.merge(CorpusStats())
+        self.assertEqual(stats.to_dict(), before)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
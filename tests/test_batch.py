@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.lexer import Lexer
+from src.batch import expand_paths, is_batch_input, lex_file, run_batch
+
+EXEMPLOS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'exemplos')
+
+
+class TestBatch(unittest.TestCase):
+    """Testes para a análise de arquivos em lote"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, 'sub'))
+        os.makedirs(os.path.join(self.root, '.oculto'))
+        self.files = {
+            'a.txt': "int x = 1;\n",
+            os.path.join('sub', 'b.txt'): "while (x < 10) {\n  x = x + 1;\n}\n",
+            os.path.join('sub', 'erro.txt'): "int y = @;\n",
+            os.path.join('.oculto', 'c.txt'): "int z;\n",
+        }
+        for name, code in self.files.items():
+            with open(os.path.join(self.root, name), 'w', encoding='utf-8') as f:
+                f.write(code)
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def test_expand_directory_skips_hidden(self):
+        """Testa que diretórios são percorridos recursivamente sem ocultos"""
+        paths = list(expand_paths([self.root]))
+        self.assertEqual(paths, [self.path('a.txt'), self.path(os.path.join('sub', 'b.txt')),
+                                 self.path(os.path.join('sub', 'erro.txt'))])
+
+    def test_expand_glob_without_duplicates(self):
+        """Testa globs e remoção de caminhos repetidos"""
+        pattern = os.path.join(self.root, '**', 'b.txt')
+        paths = list(expand_paths([pattern, self.path(os.path.join('sub', 'b.txt'))]))
+        self.assertEqual(paths, [self.path(os.path.join('sub', 'b.txt'))])
+        self.assertTrue(is_batch_input(pattern))
+        self.assertTrue(is_batch_input(self.root))
+        self.assertFalse(is_batch_input("a * b;"))
+
+    def test_lex_file(self):
+        """Testa o resumo de um arquivo válido e de um com erro"""
+        result = lex_file(self.path(os.path.join('sub', 'b.txt')))
+        tokens = Lexer(self.files[os.path.join('sub', 'b.txt')]).tokenize()
+        self.assertIsNone(result.error)
+        self.assertEqual(result.tokens, len(tokens) - 1)
+        self.assertEqual(result.lines, tokens[-1].line)
+
+        failed = lex_file(self.path(os.path.join('sub', 'erro.txt')))
+        self.assertIn("Caractere inesperado", failed.error)
+
+    def test_run_batch_streams_results(self):
+        """Testa que cada resultado é entregue e somado no relatório"""
+        paths = list(expand_paths([EXEMPLOS_DIR, self.root]))
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                seen = []
+                summary = run_batch(paths, jobs=jobs, on_result=seen.append)
+                self.assertEqual(sorted(r.path for r in seen), sorted(paths))
+                self.assertEqual(summary.files, len(paths))
+                self.assertEqual(summary.failed, 1)
+                self.assertEqual(summary.tokens, sum(r.tokens for r in seen))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.lexer import Lexer, TokenType
+from src.bench import (ADVERSARIAL, CASES, LINEAR_LIMIT, find_regressions, generate_program,
+                       measure_scaling, run_benchmarks)
+
+
+class TestBench(unittest.TestCase):
+    """Testes para o gerador de corpus e a comparação de benchmarks"""
+
+    def test_generated_program_is_valid(self):
+        """Testa que o programa gerado é tokenizável, variado e determinístico"""
+        code = generate_program(20000, seed=3)
+        self.assertGreaterEqual(len(code), 20000)
+        self.assertLess(len(code), 22000)
+        self.assertEqual(code, generate_program(20000, seed=3))
+        types = {token.type for token in Lexer(code).tokenize(skip_comments=False)}
+        for token_type in (TokenType.FUNCTION, TokenType.WHILE, TokenType.IF, TokenType.COMMENT,
+                           TokenType.STRING_LITERAL, TokenType.NUMBER, TokenType.LESS_EQUAL):
+            self.assertIn(token_type, types)
+
+    def test_pathological_cases(self):
+        """Testa que os casos patológicos têm o tamanho pedido e são válidos"""
+        for name, generate in CASES.items():
+            with self.subTest(name):
+                code = generate(5000, 0)
+                self.assertGreater(len(code), 4000)
+                Lexer(code).tokenize()
+
+    def test_run_benchmarks(self):
+        """Testa as combinações medidas e os campos de cada resultado"""
+        results = run_benchmarks([1024], ['program'], ['master', 'loop'], ['list', 'bytes'],
+                                 repeat=1)
+        combos = [(r['engine'], r['mode']) for r in results]
+        self.assertEqual(combos, [('master', 'list'), ('master', 'bytes'), ('loop', 'list')])
+        for result in results:
+            self.assertGreater(result['tokens'], 100)
+            self.assertGreater(result['tokens_per_sec'], 0)
+            self.assertGreater(result['peak_bytes'], 0)
+
+    def test_find_regressions(self):
+        """Testa a detecção de quedas de vazão acima do limite"""
+        base = {'case': 'program', 'size': 1024, 'engine': 'master', 'mode': 'list',
+                'tokens_per_sec': 1000.0}
+        self.assertEqual(find_regressions([dict(base, tokens_per_sec=950.0)], [base], 0.1), [])
+        regressions = find_regressions([dict(base, tokens_per_sec=800.0)], [base], 0.1)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('program/1024/master/list', regressions[0])
+        self.assertEqual(find_regressions([dict(base, size=2048)], [base], 0.1), [])
+
+
+class TestAdversarial(unittest.TestCase):
+    """Testes de tempo linear com entradas hostis"""
+
+    def test_cases_are_tokenizable(self):
+        """Testa que cada caso tem o tamanho pedido e é tokenizado no modo de recuperação"""
+        for name, generate in ADVERSARIAL.items():
+            with self.subTest(name):
+                code = generate(5000)
+                self.assertGreater(len(code), 4000)
+                for engine in Lexer.ENGINES:
+                    Lexer(code, engine=engine, recover=True).tokenize()
+
+    def test_linear_scaling(self):
+        """Testa que o tempo por byte não cresce com o tamanho da entrada"""
+        for name in ADVERSARIAL:
+            with self.subTest(name):
+                self.assertLess(measure_scaling(name, 2048, repeat=2), LINEAR_LIMIT)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
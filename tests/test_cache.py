@@ -0,0 +1,128 @@
+import unittest
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.lexer import Lexer, LexerError, TokenBuffer, analyze_code, iter_file_tokens
+from src.cache import TokenCache, parse_size
+from src.batch import run_batch
+
+EXEMPLOS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'exemplos')
+
+
+def token_tuples(tokens):
+    """Converte tokens em tuplas comparáveis"""
+    return [(t.type, t.value, t.line, t.column) for t in tokens]
+
+
+class TestTokenCache(unittest.TestCase):
+    """Testes para o cache de tokens em disco"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = TokenCache(os.path.join(self.tmp.name, 'cache'))
+        with open(os.path.join(EXEMPLOS_DIR, '08_bubble_sort.txt'), 'r', encoding='utf-8') as f:
+            self.code = f.read()
+
+    def entry_paths(self):
+        return list(self.cache._entry_paths())
+
+    def test_hit_returns_same_tokens(self):
+        """Testa que a segunda tokenização vem do cache com o mesmo resultado"""
+        expected = token_tuples(Lexer(self.code).tokenize())
+        first = Lexer(self.code, cache=self.cache).tokenize()
+        lexer = Lexer(self.code, cache=self.cache)
+        second = lexer.tokenize()
+        self.assertEqual(token_tuples(first), expected)
+        self.assertEqual(token_tuples(second), expected)
+        self.assertEqual((self.cache.hits, self.cache.misses, self.cache.writes), (1, 1, 1))
+        self.assertEqual((lexer.line, lexer.column), (expected[-1][2], expected[-1][3]))
+
+        buffer = Lexer(self.code, cache=self.cache).tokenize(as_buffer=True)
+        self.assertIsInstance(buffer, TokenBuffer)
+        self.assertEqual(token_tuples(buffer), expected)
+
+    def test_key_depends_on_content_and_options(self):
+        """Testa que conteúdo, opções e tipo de entrada geram entradas distintas"""
+        Lexer(self.code, cache=self.cache).tokenize()
+        Lexer(self.code, cache=self.cache).tokenize(skip_comments=False)
+        Lexer(self.code + " ", cache=self.cache).tokenize()
+        binary = Lexer(self.code.encode('utf-8'), cache=self.cache).tokenize()
+        self.assertEqual(self.cache.hits, 0)
+        self.assertEqual(len(self.entry_paths()), 4)
+        self.assertEqual(token_tuples(binary), token_tuples(Lexer(self.code).tokenize()))
+
+    def test_errors_are_cached(self):
+        """Testa que erros léxicos também são guardados e repetidos"""
+        for _ in range(2):
+            with self.assertRaises(LexerError) as ctx:
+                Lexer("int x = @;", cache=self.cache).tokenize()
+            self.assertEqual((ctx.exception.line, ctx.exception.column), (1, 9))
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_corrupted_entry_is_a_miss(self):
+        """Testa que uma entrada corrompida é descartada e recalculada"""
+        Lexer(self.code, cache=self.cache).tokenize()
+        path, = self.entry_paths()
+        with open(path, 'r+b') as f:
+            f.truncate(20)
+        tokens = Lexer(self.code, cache=self.cache).tokenize()
+        self.assertEqual(token_tuples(tokens), token_tuples(Lexer(self.code).tokenize()))
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 2))
+
+    def test_eviction_removes_least_recently_used(self):
+        """Testa que o limite de tamanho remove as entradas menos usadas"""
+        Lexer(self.code, cache=self.cache).tokenize()
+        entry_size = os.path.getsize(self.entry_paths()[0])
+        self.cache.clear()
+        cache = TokenCache(self.cache.directory, max_size=entry_size * 3)
+        codes = [self.code + " " * i for i in range(5)]
+        for i, code in enumerate(codes):
+            Lexer(code, cache=cache).tokenize()
+            key = cache.make_key(code, Lexer.spec_fingerprint(), False, True, True)
+            os.utime(cache._path(key), (i, i))
+
+        self.assertGreater(cache.evictions, 0)
+        self.assertLessEqual(sum(os.path.getsize(p) for p in self.entry_paths()), cache.max_size)
+        Lexer(codes[-1], cache=cache).tokenize()
+        self.assertEqual(cache.hits, 1)
+        Lexer(codes[0], cache=cache).tokenize()
+        self.assertEqual(cache.hits, 1)
+
+    def test_file_and_analyze_code(self):
+        """Testa o cache na leitura de arquivos e em analyze_code"""
+        path = os.path.join(EXEMPLOS_DIR, '08_bubble_sort.txt')
+        expected = token_tuples(iter_file_tokens(path))
+        for _ in range(2):
+            self.assertEqual(token_tuples(iter_file_tokens(path, cache=self.cache)), expected)
+        self.assertEqual(self.cache.hits, 1)
+
+        directory = os.path.join(self.tmp.name, 'outro')
+        self.assertEqual(token_tuples(analyze_code(self.code, cache_dir=directory)),
+                         token_tuples(analyze_code(self.code)))
+        analyze_code(self.code, cache_dir=directory)
+        self.assertEqual(TokenCache.open(directory).hits, 1)
+
+    def test_batch_shares_cache_between_processes(self):
+        """Testa o cache compartilhado pelos workers do modo em lote"""
+        paths = sorted(os.path.join(EXEMPLOS_DIR, name) for name in os.listdir(EXEMPLOS_DIR))
+        first = run_batch(paths, jobs=2, cache_dir=self.cache.directory)
+        second = run_batch(paths, jobs=2, cache_dir=self.cache.directory)
+        self.assertEqual(first.cache_misses, len(paths))
+        self.assertEqual(second.cache_hits, len(paths))
+        self.assertEqual(first.tokens, second.tokens)
+
+    def test_parse_size(self):
+        """Testa a conversão de tamanhos com sufixo"""
+        self.assertEqual(parse_size('512M'), 512 << 20)
+        self.assertEqual(parse_size('2g'), 2 << 30)
+        self.assertEqual(parse_size('1000'), 1000)
+        with self.assertRaises(ValueError):
+            parse_size('muito')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,128 @@
+import unittest
+import sys
+import os
+import tempfile
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.lexer import DEFAULT_SPEC, Lexer, LexerError, LexerSpec, TokenType
+from src.codegen import UnsupportedSpec, generate, main
+from src import bench
+
+EXEMPLOS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'exemplos')
+
+DIALECT = LexerSpec(
+    keywords={'se': TokenType.IF, 'fim': TokenType.RETURN},
+    operators=[(':=', TokenType.ASSIGN), ('<>', TokenType.NOT_EQUAL), ('<', TokenType.LESS_THAN),
+               ('+', TokenType.PLUS), ('-', TokenType.MINUS), (';', TokenType.SEMICOLON)],
+    literals=[(r'\d+', TokenType.NUMBER)],
+    strings=('`',),
+    line_comments=('#', '--'),
+    block_comments=(('{-', '-}'),),
+    identifier=r'[a-zA-Z$][a-zA-Z0-9$\-]*',
+    whitespace=r'[ \t\f]+',
+)
+
+
+def load(source):
+    """Executa o código gerado como um módulo"""
+    module = types.ModuleType('generated_scanner')
+    exec(compile(source, '<generated>', 'exec'), module.__dict__)
+    return module
+
+
+class Reference(Lexer):
+    """Lexer que sempre usa a regex mestre"""
+    GENERATED = False
+
+
+class TestCodegen(unittest.TestCase):
+    """Testes diferenciais entre o scanner gerado e a regex mestre"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.scanners = load(generate([DEFAULT_SPEC, DIALECT])).SCANNERS
+
+    def lex(self, text, spec=DEFAULT_SPEC, recover=False):
+        """Tokens (ou o erro) com o scanner gerado e com a regex mestre"""
+        scan = self.scanners[spec.key]
+
+        class Generated(Lexer):
+            def _scan_raw(self, skipped):
+                return self._scan_generated(scan, skipped)
+
+        results = []
+        for cls in (Generated, Reference):
+            lexer = cls(text, spec=spec, recover=recover)
+            try:
+                tokens = lexer.tokenize(skip_whitespace=False, skip_comments=False)
+            except LexerError as e:
+                results.append(str(e))
+            else:
+                results.append(([(t.type, t.value, t.line, t.column) for t in tokens], lexer.error_count))
+        return results
+
+    def assertSameTokens(self, text, spec=DEFAULT_SPEC):
+        for recover in (False, True):
+            generated, reference = self.lex(text, spec, recover)
+            self.assertEqual(generated, reference)
+
+    def test_exemplos(self):
+        """Testa os exemplos da linguagem"""
+        for name in sorted(os.listdir(EXEMPLOS_DIR)):
+            with self.subTest(name):
+                with open(os.path.join(EXEMPLOS_DIR, name), 'r', encoding='utf-8') as f:
+                    self.assertSameTokens(f.read())
+
+    def test_generated_program_and_adversarial_cases(self):
+        """Testa o programa do benchmark e os casos adversariais"""
+        self.assertSameTokens(bench.generate_program(20000))
+        for name, make in bench.ADVERSARIAL.items():
+            with self.subTest(name):
+                self.assertSameTokens(make(2048))
+
+    def test_delimited_and_numbers(self):
+        """Testa strings, comentários e números nos limites do scanner gerado"""
+        cases = [
+            '"a\\"b" x', '"a\\\\" "b"', "'\\'' 'x", '"fim\\', '"a\\\nb"', '"sem fim',
+            '/* a * / b */ c', '/* sem fim', '/*/ x */', '// fim', 'a // b\nc', 'x /= y',
+            '1.5 12. .5 3.x', '12٣ 4', '1.٣', '7é', 'a1_ b', '!= ! x',
+            'x\r\ny', 'x @ y', 'é = 1', '', '\n\n', '\t \tx',
+        ]
+        for text in cases:
+            with self.subTest(text):
+                self.assertSameTokens(text)
+
+    def test_dialect(self):
+        """Testa uma especificação com outros delimitadores e classes"""
+        cases = ['se x := 1; fim', 'a-b $c <> d < e', '# nota\n-- outra\n{- bloco -} x',
+                 '`texto \\` aqui` y', '{- sem fim', 'x\fy', '1 + 2 - 3']
+        for text in cases:
+            with self.subTest(text):
+                self.assertSameTokens(text, DIALECT)
+
+    def test_unsupported_patterns(self):
+        """Testa que padrões fora das formas conhecidas são recusados"""
+        specs = [
+            LexerSpec(literals=[(r'0x[0-9a-f]+', TokenType.NUMBER)]),
+            LexerSpec(identifier=r'\w+'),
+            LexerSpec(whitespace=r'[^\n\S]+'),
+        ]
+        for spec in specs:
+            with self.subTest(spec.to_dict()):
+                with self.assertRaises(UnsupportedSpec):
+                    generate([spec])
+
+    def test_main_writes_module(self):
+        """Testa a geração do módulo em um arquivo"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'scanner.py')
+            main(['--output', path])
+            with open(path, 'r', encoding='utf-8') as f:
+                module = load(f.read())
+        self.assertEqual(list(module.SCANNERS), [DEFAULT_SPEC.key])
+
+
+if __name__ == '__main__':
+    unittest.main()
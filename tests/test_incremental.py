@@ -0,0 +1,135 @@
+import unittest
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.lexer import Lexer, LexerError, TokenType
+from src.incremental import IncrementalLexer
+
+EXEMPLOS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'exemplos')
+
+
+def token_tuples(tokens):
+    """Converte tokens em tuplas comparáveis"""
+    return [(t.type, t.value, t.line, t.column) for t in tokens]
+
+
+def full_tokens(text):
+    return token_tuples(Lexer(text).tokenize(skip_whitespace=False, skip_comments=False))
+
+
+class TestIncrementalLexer(unittest.TestCase):
+    """Testes para a re-tokenização incremental"""
+
+    def setUp(self):
+        with open(os.path.join(EXEMPLOS_DIR, '08_bubble_sort.txt'), 'r', encoding='utf-8') as f:
+            self.code = f.read()
+
+    def apply(self, lexer, offset, removed, inserted):
+        """Aplica a edição e confere o resultado contra a tokenização completa"""
+        before = lexer.tokens()
+        edit = lexer.update(offset, removed, inserted)
+        after = lexer.tokens()
+        self.assertEqual(token_tuples(after), full_tokens(lexer.text))
+        rebuilt = before[:edit.index] + edit.inserted + before[edit.index + edit.removed:]
+        self.assertEqual([(t.type, t.value) for t in rebuilt], [(t.type, t.value) for t in after])
+        self.assertEqual(token_tuples(edit.inserted),
+                         token_tuples(after[edit.index:edit.index + len(edit.inserted)]))
+        return edit
+
+    def test_initial_tokens(self):
+        """Testa que os tokens iniciais são os da tokenização completa"""
+        lexer = IncrementalLexer(self.code)
+        self.assertEqual(token_tuples(lexer.tokens()), full_tokens(self.code))
+        self.assertEqual(token_tuples(lexer.tokens(skip_whitespace=True, skip_comments=True)),
+                         token_tuples(Lexer(self.code).tokenize()))
+
+    def test_local_edit_relexes_few_tokens(self):
+        """Testa que editar um identificador re-tokeniza só ele"""
+        lexer = IncrementalLexer(self.code)
+        offset = self.code.index('temp = lista') + 2
+        edit = self.apply(lexer, offset, 0, 'x')
+        self.assertEqual(edit.removed, 1)
+        self.assertEqual([t.value for t in edit.inserted], ['texmp'])
+        self.assertEqual(edit.offset_delta, 1)
+        self.assertEqual(edit.line_delta, 0)
+
+    def test_merging_operators(self):
+        """Testa que inserir '=' após '<' forma '<='"""
+        lexer = IncrementalLexer("a < b;")
+        edit = self.apply(lexer, 3, 0, '=')
+        self.assertIn(TokenType.LESS_EQUAL, [t.type for t in edit.inserted])
+
+    def test_opening_and_closing_block_comment(self):
+        """Testa edições que abrem e fecham um comentário de bloco"""
+        lexer = IncrementalLexer(self.code)
+        offset = self.code.index('function')
+        edit = self.apply(lexer, offset, 0, '/*')
+        self.assertEqual(edit.inserted[0].type, TokenType.COMMENT)
+        self.apply(lexer, offset, 2, '')
+
+    def test_closing_unterminated_comment(self):
+        """Testa '*/' inserido depois de um '/*' sem fechamento"""
+        lexer = IncrementalLexer("a = b /* c\nd = 1;\n")
+        self.assertNotIn(TokenType.COMMENT, [t.type for t in lexer.tokens()])
+        edit = self.apply(lexer, len(lexer.text), 0, '*/')
+        self.assertIn(TokenType.COMMENT, [t.type for t in edit.inserted])
+
+    def test_string_and_line_changes(self):
+        """Testa edições que juntam strings e removem linhas"""
+        lexer = IncrementalLexer('x = "a";\ny = 2;\nz = "b";\nw = 3;\n')
+        edit = self.apply(lexer, 6, len('";\ny = 2;\nz = "'), '')
+        self.assertEqual(edit.line_delta, -2)
+        self.assertEqual([t.value for t in edit.inserted], ['"ab"'])
+        edit = self.apply(lexer, 0, 0, 'y = 1;\n\n')
+        self.assertEqual(edit.line_delta, 2)
+
+    def test_multiline_comment_lines(self):
+        """Testa linhas depois de comentários e strings com quebras de linha"""
+        lexer = IncrementalLexer('a = 1; /* x\ny */\nb = "c\nd";\nc = 2;\n')
+        edit = self.apply(lexer, lexer.text.index('y */'), 0, '\n\n')
+        self.assertEqual(edit.line_delta, 2)
+        self.apply(lexer, lexer.text.index('c\nd'), 3, 'e')
+        self.assertEqual(lexer.tokens()[-2].line, 6)
+
+    def test_error_then_recovery(self):
+        """Testa que um erro léxico é propagado e a próxima edição recupera"""
+        lexer = IncrementalLexer("int x = 1;")
+        with self.assertRaises(LexerError):
+            lexer.update(8, 0, '@')
+        self.assertEqual(lexer.text, "int x = @1;")
+        lexer.update(8, 1, '')
+        self.assertEqual(token_tuples(lexer.tokens()), full_tokens("int x = 1;"))
+
+    def test_invalid_edit(self):
+        """Testa edições fora dos limites"""
+        lexer = IncrementalLexer("abc")
+        with self.assertRaises(ValueError):
+            lexer.update(2, 5, '')
+
+    def test_random_edits(self):
+        """Testa sequências aleatórias de edições contra a tokenização completa"""
+        rng = random.Random(7)
+        pieces = ['/*', '*/', '"', "'", '\n', 'x', '12', '.5', '<', '=', '/', ' ', '*', '// c']
+        for _ in range(20):
+            lexer = IncrementalLexer(self.code)
+            for _ in range(15):
+                text = lexer.text
+                offset = rng.randint(0, len(text))
+                removed = rng.randint(0, min(4, len(text) - offset))
+                inserted = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 2)))
+                new_text = text[:offset] + inserted + text[offset + removed:]
+                try:
+                    expected = full_tokens(new_text)
+                except LexerError:
+                    with self.assertRaises(LexerError):
+                        lexer.update(offset, removed, inserted)
+                    continue
+                lexer.update(offset, removed, inserted)
+                self.assertEqual(token_tuples(lexer.tokens()), expected)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
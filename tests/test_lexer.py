@@ -1,10 +1,43 @@
 import unittest
+import asyncio
 import sys
 import os
+import json
+import mmap
+import tempfile
+from unittest import mock
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.lexer import Lexer, LexerError, TokenType, Token
+from src.lexer import (Lexer, LexerError, LexerSpec, DEFAULT_SPEC, LineIndex, TokenType, Token,
+                       TokenBuffer, SymbolTable, alex, STREAM_LIMIT)
+
+EXEMPLOS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'exemplos')
+
+SAMPLE_CODES = [
+    "int x = 10 + 5;",
+    "123 45.67 0 0.0",
+    "+ - * / % = == != < > <= >=",
+    '"hello world" "string com \\"aspas\\"" \'single quotes\'',
+    "int x = 5; // fim\n/* bloco\n de linhas */ x = x / 2;\n",
+    "while (a<=b) { a = a+1; }\n\tif (x>=1) return true;",
+    "",
+    "   \t\n  ",
+]
+
+
+def load_exemplos():
+    """Retorna o conteúdo de todos os arquivos de exemplos/"""
+    codes = []
+    for name in sorted(os.listdir(EXEMPLOS_DIR)):
+        with open(os.path.join(EXEMPLOS_DIR, name), 'r', encoding='utf-8') as f:
+            codes.append(f.read())
+    return codes
+
+
+def token_tuples(tokens):
+    """Converte tokens em tuplas comparáveis"""
+    return [(t.type, t.value, t.line, t.column) for t in tokens]
 
 
 class TestLexer(unittest.TestCase):
@@ -226,6 +259,784 @@ class TestLexer(unittest.TestCase):
         token_strings = lexer.get_tokens_as_strings()
         expected = ["INT", "IDENTIFIER(x)", "ASSIGN", "NUMBER(10)", "SEMICOLON"]
         self.assertEqual(token_strings, expected)
+    
+    def test_iter_raw(self):
+        """Testa as tuplas (tipo, início, fim) geradas por iter_raw"""
+        code = "x = 1; // c\n"
+        for source in (code, code.encode('utf-8')):
+            with self.subTest(binary=isinstance(source, bytes)):
+                expected = [(token.type, token.offset, token.offset + len(token.value))
+                            for token in Lexer(code).tokenize(False, False)
+                            if token.type != TokenType.EOF]
+                self.assertEqual(list(Lexer(source).iter_raw(False, False)), expected)
+                self.assertEqual([raw[0] for raw in Lexer(source).iter_raw()],
+                                 [TokenType.IDENTIFIER, TokenType.ASSIGN, TokenType.NUMBER,
+                                  TokenType.SEMICOLON, TokenType.NEWLINE])
+
+
+class TestMasterEngine(unittest.TestCase):
+    """Testes diferenciais entre o engine 'master' e o loop de referência"""
+    
+    def assertSameTokens(self, code, **kwargs):
+        loop = Lexer(code, engine='loop').tokenize(**kwargs)
+        master = Lexer(code, engine='master').tokenize(**kwargs)
+        self.assertEqual(token_tuples(master), token_tuples(loop))
+    
+    def test_identical_on_samples(self):
+        """Testa que ambos os engines produzem os mesmos tokens"""
+        for code in SAMPLE_CODES:
+            with self.subTest(code=code):
+                self.assertSameTokens(code)
+                self.assertSameTokens(code, skip_whitespace=False, skip_comments=False)
+    
+    def test_identical_on_exemplos(self):
+        """Testa que ambos os engines concordam nos arquivos de exemplos/"""
+        for code in load_exemplos():
+            self.assertSameTokens(code)
+            self.assertSameTokens(code, skip_whitespace=False, skip_comments=False)
+    
+    def test_same_error_position(self):
+        """Testa que o erro léxico é reportado na mesma posição"""
+        code = "int x = 1;\ny = @;"
+        for engine in Lexer.ENGINES:
+            with self.assertRaises(LexerError) as context:
+                Lexer(code, engine=engine).tokenize()
+            self.assertEqual((context.exception.line, context.exception.column), (2, 5))
+    
+    def test_unknown_engine(self):
+        """Testa que um engine desconhecido é rejeitado"""
+        with self.assertRaises(ValueError):
+            Lexer("x", engine="inexistente")
+
+
+class TestStreaming(unittest.TestCase):
+    """Testes para a tokenização em blocos de arquivos (Lexer.iter_file)"""
+    
+    def write_temp(self, code):
+        handle = tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.txt', delete=False)
+        with handle:
+            handle.write(code)
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+    
+    def assertStreamMatches(self, code, chunk_sizes, recover=False, **kwargs):
+        path = self.write_temp(code)
+        expected = token_tuples(Lexer(code, recover=recover).tokenize(**kwargs))
+        for chunk_size in chunk_sizes:
+            with self.subTest(chunk_size=chunk_size):
+                streamed = Lexer.iter_file(path, chunk_size=chunk_size, recover=recover, **kwargs)
+                self.assertEqual(token_tuples(streamed), expected)
+    
+    def test_tokens_crossing_chunk_boundaries(self):
+        """Testa comentários, strings e operadores cortados entre blocos"""
+        code = (
+            'x <= 10 >= y != z;\n'
+            '/* comentário\n de bloco * / ainda */ a = "texto \\" com\n quebra";\n'
+            "b = 'c' // linha \"\n"
+            'c = 3.14 / 2;\n'
+        )
+        self.assertStreamMatches(code, range(1, 12), skip_whitespace=False, skip_comments=False)
+        self.assertStreamMatches(code, [1, 2, 3, 64])
+    
+    def test_exemplos_streaming(self):
+        """Testa que o streaming concorda com tokenize() nos exemplos"""
+        for code in load_exemplos():
+            self.assertStreamMatches(code, [7, 4096])
+    
+    def test_unterminated_block_comment(self):
+        """Testa '/*' sem fechamento, que é tokenizado como operadores"""
+        self.assertStreamMatches("a = b /* c\nd\n", [1, 3, 100])
+    
+    def test_recover_failed_strings(self):
+        """Testa strings que falham em um '\\' antes da quebra de linha no modo de recuperação"""
+        codes = [
+            '"\\\nx "y\nz"\n',
+            'a "b /* c\\\nd */ e "f\ng" // h "\n',
+            "'\\\n\"x\n\" 'y\n' \"\\\n\"\\\n\"ok\"\n",
+            '"a\\"b\\\\\n"c\\\n' * 3,
+        ]
+        for code in codes:
+            expected = token_tuples(Lexer(code, recover=True).tokenize())
+            self.assertStreamMatches(code, [1, 2, 3, 7, 1 << 20], recover=True)
+            for chunk_size in (1, 4):
+                with self.subTest(code=code, alex=chunk_size):
+                    async def main():
+                        async def blocks():
+                            for i in range(0, len(code), chunk_size):
+                                yield code[i:i + chunk_size]
+                        return [token async for token in alex(blocks(), recover=True)]
+                    self.assertEqual(token_tuples(asyncio.run(main())), expected)
+    
+    def test_stray_block_comment_first_token(self):
+        """Testa que um '/*' solto no início não faz o streaming ler a entrada inteira"""
+        code = '/*\n' + 'x = 1;\n' * 200000
+        chunk_size = 4096
+        blocks_read = 0
+        
+        async def main():
+            nonlocal blocks_read
+            async def blocks():
+                nonlocal blocks_read
+                for i in range(0, len(code), chunk_size):
+                    blocks_read += 1
+                    yield code[i:i + chunk_size]
+            async for token in alex(blocks()):
+                return token, blocks_read
+        
+        token, read_before_first = asyncio.run(main())
+        self.assertEqual(token.type, TokenType.DIVIDE)
+        self.assertLessEqual(read_before_first, STREAM_LIMIT // chunk_size + 2)
+        
+        # Com um limite pequeno, o resultado é o mesmo de tokenize()
+        with mock.patch('src.lexer.STREAM_LIMIT', 64):
+            self.assertStreamMatches('/*\n' + 'x = 1;\n' * 100, [1, 7, 4096])
+            self.assertStreamMatches('a = "b\n' + 'c = 2;\n' * 100, [3, 50], recover=True)
+    
+    def test_iter_chunks(self):
+        """Testa a tokenização de blocos vindos de um iterável qualquer"""
+        code = 'a = "b\nc" /* d\n*/ <= 1.5;\n' * 20
+        expected = token_tuples(Lexer(code).tokenize())
+        for chunk_size in (1, 5, 64):
+            with self.subTest(chunk_size=chunk_size):
+                chunks = (code[i:i + chunk_size] for i in range(0, len(code), chunk_size))
+                self.assertEqual(token_tuples(Lexer.iter_chunks(chunks)), expected)
+    
+    def test_error_position(self):
+        """Testa que erros léxicos têm a mesma posição no modo streaming"""
+        path = self.write_temp("int x = 1;\n" * 50 + "y = @;")
+        with self.assertRaises(LexerError) as context:
+            list(Lexer.iter_file(path, chunk_size=16))
+        self.assertEqual((context.exception.line, context.exception.column), (51, 5))
+    
+    def test_is_lazy(self):
+        """Testa que os primeiros tokens saem antes do arquivo ser lido todo"""
+        path = self.write_temp("int x = 1;\n" * 1000 + "@")
+        stream = Lexer.iter_file(path, chunk_size=32)
+        self.assertEqual(next(stream).type, TokenType.INT)
+
+
+class TestAsyncStreaming(unittest.TestCase):
+    """Testes para a tokenização assíncrona (alex)"""
+    
+    def collect(self, data, chunk_size, **kwargs):
+        """Tokens de alex sobre um StreamReader que recebe data em blocos"""
+        async def main():
+            reader = asyncio.StreamReader()
+            for i in range(0, len(data), chunk_size):
+                reader.feed_data(data[i:i + chunk_size])
+            reader.feed_eof()
+            return [token async for token in alex(reader, chunk_size=chunk_size, **kwargs)]
+        return asyncio.run(main())
+    
+    def test_matches_tokenize(self):
+        """Testa blocos cortados no meio de tokens e de caracteres UTF-8"""
+        code = ('x <= 10; /* ação\n */ s = "olá \\" mundo";\n' * 3 + "// fim é")
+        data = code.encode('utf-8')
+        expected = token_tuples(Lexer(code).tokenize(skip_whitespace=False, skip_comments=False))
+        for chunk_size in (1, 2, 5, 64):
+            with self.subTest(chunk_size=chunk_size):
+                tokens = self.collect(data, chunk_size, skip_whitespace=False, skip_comments=False)
+                self.assertEqual(token_tuples(tokens), expected)
+    
+    def test_async_iterator_of_str(self):
+        """Testa um iterador assíncrono de blocos str"""
+        code = load_exemplos()[-1]
+        
+        async def blocks():
+            for i in range(0, len(code), 10):
+                yield code[i:i + 10]
+        
+        async def main():
+            return [token async for token in alex(blocks(), yield_every=1)]
+        self.assertEqual(token_tuples(asyncio.run(main())), token_tuples(Lexer(code).tokenize()))
+    
+    def test_errors(self):
+        """Testa erros léxicos e bytes inválidos"""
+        with self.assertRaises(LexerError) as context:
+            self.collect(("int x = 1;\n" * 20 + "y = @;").encode('utf-8'), 16)
+        self.assertEqual((context.exception.line, context.exception.column), (21, 5))
+        with self.assertRaises(UnicodeDecodeError):
+            self.collect(b'x = "\xc3', 4)
+    
+    def test_backpressure_and_cancellation(self):
+        """Testa que os blocos são lidos sob demanda e que a leitura pode ser cancelada"""
+        class Reader:
+            reads = 0
+            
+            async def read(self, n):
+                self.reads += 1
+                if self.reads > 3:
+                    await asyncio.Event().wait()
+                return b"int x = 1;\n"
+        
+        async def main():
+            reader = Reader()
+            tokens = alex(reader)
+            first = await tokens.__anext__()
+            reads = reader.reads
+            
+            async def consume():
+                async for _ in tokens:
+                    pass
+            task = asyncio.ensure_future(consume())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return first, reads, reader.reads
+        
+        first, reads, total = asyncio.run(main())
+        self.assertEqual(first.type, TokenType.INT)
+        self.assertLessEqual(reads, 2)
+        self.assertEqual(total, 4)
+    
+    def test_yields_to_event_loop(self):
+        """Testa que um texto longo não bloqueia outras tarefas"""
+        data = b"int x = 1;\n" * 2000
+        
+        async def main():
+            ticks = 0
+            
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0)
+            task = asyncio.ensure_future(ticker())
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            count = 0
+            async for _ in alex(reader, chunk_size=len(data), yield_every=100):
+                count += 1
+            task.cancel()
+            return count, ticks
+        
+        count, ticks = asyncio.run(main())
+        self.assertEqual(count, 2000 * 6 + 1)
+        self.assertGreaterEqual(ticks, count // 100 - 1)
+
+
+class TestTokenBuffer(unittest.TestCase):
+    """Testes para o armazenamento colunar de tokens"""
+    
+    def setUp(self):
+        self.code = load_exemplos()[-1]
+        self.expected = Lexer(self.code).tokenize()
+        self.buffer = Lexer(self.code).tokenize(as_buffer=True)
+    
+    def test_same_tokens_as_list(self):
+        """Testa que o buffer contém os mesmos tokens que a lista"""
+        self.assertIsInstance(self.buffer, TokenBuffer)
+        self.assertEqual(len(self.buffer), len(self.expected))
+        self.assertEqual(token_tuples(self.buffer), token_tuples(self.expected))
+    
+    def test_indexing(self):
+        """Testa acesso por índice, inclusive negativo"""
+        self.assertEqual(self.buffer[3], self.expected[3])
+        self.assertEqual(self.buffer[-1].type, TokenType.EOF)
+        self.assertEqual(self.buffer.type_at(0), self.expected[0].type)
+        self.assertEqual(self.buffer.value_at(1), self.expected[1].value)
+        with self.assertRaises(IndexError):
+            self.buffer[len(self.buffer)]
+    
+    def test_slicing(self):
+        """Testa que fatias retornam um novo TokenBuffer"""
+        sliced = self.buffer[5:20:3]
+        self.assertIsInstance(sliced, TokenBuffer)
+        self.assertEqual(token_tuples(sliced), token_tuples(self.expected[5:20:3]))
+    
+    def test_values_reference_source(self):
+        """Testa que o buffer guarda posições no texto, não cópias dos valores"""
+        self.assertIs(self.buffer.source, self.code)
+        self.assertFalse(hasattr(self.buffer, '__dict__'))
+    
+    def test_token_has_slots(self):
+        """Testa que Token não tem __dict__"""
+        self.assertFalse(hasattr(Token(TokenType.PLUS, "+", 1, 1), '__dict__'))
+    
+    def test_strings_helper(self):
+        """Testa get_tokens_as_strings com buffer"""
+        lexer = Lexer("int x = 10;")
+        lexer.tokenize(as_buffer=True)
+        self.assertEqual(lexer.get_tokens_as_strings(),
+                         ["INT", "IDENTIFIER(x)", "ASSIGN", "NUMBER(10)", "SEMICOLON"])
+
+
+class TestBinaryInput(unittest.TestCase):
+    """Testes para a tokenização sobre bytes, memoryview e mmap"""
+    
+    CODE = '/* ção */ string s = "João" + \'é\'; // fim ü\nfloat y = 3.5;\n'
+    
+    def assertSameAsText(self, source, code, **kwargs):
+        expected = token_tuples(Lexer(code).tokenize(**kwargs))
+        self.assertEqual(token_tuples(Lexer(source).tokenize(**kwargs)), expected)
+        self.assertEqual(token_tuples(Lexer(source).tokenize(as_buffer=True, **kwargs)), expected)
+    
+    def test_bytes_and_memoryview(self):
+        """Testa que bytes e memoryview produzem os mesmos tokens que str"""
+        data = self.CODE.encode('utf-8')
+        for source in (data, memoryview(data)):
+            self.assertSameAsText(source, self.CODE)
+            self.assertSameAsText(source, self.CODE, skip_whitespace=False, skip_comments=False)
+    
+    def test_unicode_digits(self):
+        """Testa que dígitos não ASCII (\\d em str) são reconhecidos também em bytes"""
+        code = 'x = ٣;\ny = 12٣ + 1.٣ + 4.5; z = "٣"٣ /* é */٣\n'
+        data = code.encode('utf-8')
+        self.assertSameAsText(data, code)
+        self.assertSameAsText(data, code, skip_whitespace=False, skip_comments=False)
+        handle = tempfile.NamedTemporaryFile('wb', suffix='.txt', delete=False)
+        with handle:
+            handle.write(data)
+        self.addCleanup(os.remove, handle.name)
+        self.assertEqual(token_tuples(Lexer.iter_mapped_file(handle.name)),
+                         token_tuples(Lexer(code).tokenize()))
+    
+    def test_mmap(self):
+        """Testa a tokenização de um arquivo mapeado em memória"""
+        with tempfile.TemporaryFile() as f:
+            f.write(self.CODE.encode('utf-8'))
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                self.assertSameAsText(data, self.CODE)
+    
+    def test_iter_mapped_file(self):
+        """Testa Lexer.iter_mapped_file, inclusive com arquivo vazio"""
+        for code in load_exemplos() + [""]:
+            handle = tempfile.NamedTemporaryFile('wb', suffix='.txt', delete=False)
+            with handle:
+                handle.write(code.encode('utf-8'))
+            self.addCleanup(os.remove, handle.name)
+            self.assertEqual(token_tuples(Lexer.iter_mapped_file(handle.name)),
+                             token_tuples(Lexer(code).tokenize()))
+    
+    def test_iter_mapped_file_without_line_index(self):
+        """Testa que iter_mapped_file resolve posições sem indexar o arquivo inteiro"""
+        code = 'acao = "ü";\n/* é\n\n ê */ x = 1;  // ô\n\n\tca = "ã\\tb"; "ü"\n'
+        handle = tempfile.NamedTemporaryFile('wb', suffix='.txt', delete=False)
+        with handle:
+            handle.write(code.encode('utf-8'))
+        self.addCleanup(os.remove, handle.name)
+        expected = token_tuples(Lexer(code).tokenize(skip_comments=False))
+        with mock.patch.object(LineIndex, 'starts', new_callable=mock.PropertyMock,
+                               side_effect=AssertionError):
+            tokens = Lexer.iter_mapped_file(handle.name, skip_comments=False)
+            self.assertEqual(token_tuples(tokens), expected)
+    
+    def test_buffer_keeps_byte_offsets(self):
+        """Testa que o buffer guarda deslocamentos em bytes sem decodificar"""
+        data = 'cao = "ü"'.encode('utf-8')
+        buffer = Lexer(data).tokenize(as_buffer=True)
+        self.assertIs(buffer.source, data)
+        self.assertEqual(list(buffer.starts), [0, 4, 6, len(data)])
+        self.assertEqual(buffer.value_at(2), '"ü"')
+    
+    def test_error_character_is_decoded(self):
+        """Testa que o caractere inválido é decodificado na mensagem de erro"""
+        with self.assertRaises(LexerError) as context:
+            Lexer('"é" ç'.encode('utf-8')).tokenize()
+        self.assertIn("'ç'", str(context.exception))
+        self.assertEqual(context.exception.column, 5)
+    
+    def test_loop_engine_rejects_bytes(self):
+        """Testa que o engine de referência só aceita str"""
+        with self.assertRaises(ValueError):
+            Lexer(b"x", engine="loop")
+
+
+class SmallRegionLexer(Lexer):
+    """Lexer que paraleliza mesmo textos pequenos, para os testes"""
+    PARALLEL_MIN_REGION = 16
+
+
+class TestParallel(unittest.TestCase):
+    """Testes para a tokenização paralela de um único texto"""
+    
+    CODE = ''.join(load_exemplos()) + (
+        '/* comentário\nque cruza\nlinhas */ x = "string\ncom quebra";\n'
+        "// linha com 'aspas\ny = x <= 2;\n"
+    ) * 3
+    
+    def test_identical_to_sequential(self):
+        """Testa que o resultado paralelo é idêntico ao sequencial"""
+        for kwargs in ({}, {'skip_whitespace': False, 'skip_comments': False}):
+            expected = token_tuples(Lexer(self.CODE).tokenize(**kwargs))
+            for parallel in (2, 5):
+                with self.subTest(parallel=parallel, **kwargs):
+                    tokens = SmallRegionLexer(self.CODE).tokenize(parallel=parallel, **kwargs)
+                    self.assertEqual(token_tuples(tokens), expected)
+    
+    def test_buffer_offsets(self):
+        """Testa que os deslocamentos do buffer são absolutos"""
+        expected = Lexer(self.CODE).tokenize(as_buffer=True)
+        buffer = SmallRegionLexer(self.CODE).tokenize(as_buffer=True, parallel=4)
+        self.assertEqual(list(buffer.starts), list(expected.starts))
+        self.assertEqual(list(buffer.lengths), list(expected.lengths))
+        self.assertEqual(buffer.position_at(len(buffer) - 1), expected.position_at(len(expected) - 1))
+    
+    def test_split_points_are_safe(self):
+        """Testa que os cortes ficam após quebras de linha fora de comentários e strings"""
+        from src.lexer import _BoundaryScanner
+        starts = _BoundaryScanner().split_points(self.CODE, 8)
+        self.assertEqual(starts[0], 0)
+        self.assertGreater(len(starts), 2)
+        offsets = set()
+        position = 0
+        for token in Lexer(self.CODE).tokenize(skip_whitespace=False, skip_comments=False):
+            position += len(token.value)
+            if token.type == TokenType.NEWLINE:
+                offsets.add(position)
+        for start in starts[1:]:
+            self.assertIn(start, offsets)
+    
+    def test_error_line_is_rebased(self):
+        """Testa que erros em regiões posteriores têm a linha correta"""
+        code = "int x = 1;\n" * 40 + "y = @;\n" + "int z;\n" * 10
+        with self.assertRaises(LexerError) as context:
+            SmallRegionLexer(code).tokenize(parallel=4)
+        self.assertEqual((context.exception.line, context.exception.column), (41, 5))
+    
+    def test_small_input_is_sequential(self):
+        """Testa que textos pequenos não usam processos"""
+        tokens = Lexer("int x = 10;").tokenize(parallel=8)
+        self.assertEqual(len(tokens), 6)
+
+
+class TestSymbolTable(unittest.TestCase):
+    """Testes para a tabela de símbolos"""
+    
+    CODE = 'int total = 0;\ntotal = total + 1.5;\nstring s = "oi";\nbool b = true;\n'
+    
+    def test_interning(self):
+        """Testa ids e valores compartilhados entre tokens e arquivos"""
+        table = SymbolTable()
+        first = Lexer(self.CODE, symbols=table).tokenize()
+        second = Lexer("total = s;", symbols=table).tokenize()
+        totals = [t for t in first + second if t.value == 'total']
+        self.assertEqual(len(totals), 4)
+        self.assertEqual({t.symbol for t in totals}, {table.lookup('total')})
+        self.assertTrue(all(t.value is table[t.symbol] for t in totals))
+        self.assertEqual(second[2].symbol, table.lookup('s'))
+        self.assertEqual(sorted(table.values), sorted(['total', '0', '1.5', 's', '"oi"', 'b', 'true']))
+    
+    def test_keywords_and_operators_have_no_symbol(self):
+        """Testa que palavras-chave e operadores não são internados"""
+        tokens = Lexer(self.CODE, symbols=SymbolTable()).tokenize()
+        for token in tokens:
+            with self.subTest(token=token):
+                if token.type in (TokenType.IDENTIFIER, TokenType.NUMBER,
+                                  TokenType.STRING_LITERAL, TokenType.BOOLEAN_LITERAL):
+                    self.assertIsNotNone(token.symbol)
+                else:
+                    self.assertIsNone(token.symbol)
+    
+    def test_same_symbols_in_every_mode(self):
+        """Testa lista, buffer, streaming e bytes com a mesma tabela"""
+        table = SymbolTable()
+        expected = [(t.type, t.value, t.symbol) for t in Lexer(self.CODE, symbols=table).tokenize()]
+        buffer = Lexer(self.CODE, symbols=table).tokenize(as_buffer=True)
+        streamed = list(Lexer(self.CODE, symbols=table).iter_tokens())
+        binary = Lexer(self.CODE.encode('utf-8'), symbols=table).tokenize(as_buffer=True)
+        for tokens in (buffer, streamed, binary, buffer[2:]):
+            self.assertEqual([(t.type, t.value, t.symbol) for t in tokens], expected[-len(tokens):])
+        self.assertEqual(buffer.symbol_at(0), None)
+        self.assertEqual(buffer.symbol_at(1), table.lookup('total'))
+        self.assertEqual(buffer.value_at(1), 'total')
+    
+    def test_symbol_does_not_affect_equality(self):
+        """Testa que tokens com e sem símbolo são iguais"""
+        self.assertEqual(Lexer(self.CODE, symbols=SymbolTable()).tokenize(), Lexer(self.CODE).tokenize())
+
+
+class TestLineIndex(unittest.TestCase):
+    """Testes para o índice de linhas e as posições calculadas sob demanda"""
+    
+    CODE = 'x = 1; /* a\nb\n */ s = "c\nd";\n\ty = 2;\n'
+    
+    def test_multiline_tokens_advance_lines(self):
+        """Testa que comentários e strings com quebras de linha avançam a linha"""
+        expected = [
+            (TokenType.IDENTIFIER, 1, 1), (TokenType.ASSIGN, 1, 3), (TokenType.NUMBER, 1, 5),
+            (TokenType.SEMICOLON, 1, 6), (TokenType.IDENTIFIER, 3, 5), (TokenType.ASSIGN, 3, 7),
+            (TokenType.STRING_LITERAL, 3, 9), (TokenType.SEMICOLON, 4, 3), (TokenType.NEWLINE, 4, 4),
+            (TokenType.IDENTIFIER, 5, 2), (TokenType.ASSIGN, 5, 4), (TokenType.NUMBER, 5, 6),
+            (TokenType.SEMICOLON, 5, 7), (TokenType.NEWLINE, 5, 8), (TokenType.EOF, 6, 1),
+        ]
+        modes = {
+            'master': Lexer(self.CODE).tokenize(),
+            'loop': Lexer(self.CODE, engine='loop').tokenize(),
+            'buffer': Lexer(self.CODE).tokenize(as_buffer=True),
+            'bytes': Lexer(self.CODE.encode('utf-8')).tokenize(),
+            'stream': list(Lexer(self.CODE).iter_tokens()),
+        }
+        for name, tokens in modes.items():
+            with self.subTest(name):
+                self.assertEqual([(t.type, t.line, t.column) for t in tokens], expected)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'code.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.CODE)
+            for chunk_size in (1, 4, 1 << 20):
+                tokens = Lexer.iter_file(path, chunk_size=chunk_size)
+                self.assertEqual([(t.type, t.line, t.column) for t in tokens], expected)
+    
+    def test_error_position_after_multiline_comment(self):
+        """Testa a posição de um erro depois de um comentário de várias linhas"""
+        for engine in Lexer.ENGINES:
+            with self.subTest(engine):
+                with self.assertRaises(LexerError) as ctx:
+                    Lexer("/* a\n\n */ x @", engine=engine).tokenize()
+                self.assertEqual((ctx.exception.line, ctx.exception.column, ctx.exception.offset),
+                                 (3, 7, 12))
+    
+    def test_columns(self):
+        """Testa colunas em caracteres, com tabs expandidos e em bytes"""
+        text = "a\n\tçã = 1;"
+        offset = text.index('=')
+        for source, start in ((text, offset), (text.encode('utf-8'), len(text[:offset].encode('utf-8')))):
+            index = LineIndex(source)
+            self.assertEqual(len(index), 2)
+            self.assertEqual(index.line_of(start), 2)
+            self.assertEqual(index.line_start(2), 2)
+            self.assertEqual(index.position(start), (2, 5))
+            self.assertEqual(index.column(start), 12)
+            self.assertEqual(index.column(start, tab_width=4), 8)
+            self.assertEqual(index.byte_column(start), 7)
+    
+    def test_byte_columns_in_any_order(self):
+        """Testa colunas de texto bytes-like consultadas em ordem, fora de ordem e entre linhas"""
+        text = 'x = "ação"; ' * 50 + '\ny = "é";'
+        data = text.encode('utf-8')
+        starts = [i for i, char in enumerate(text) if char in 'xy']
+        expected = [LineIndex(text).position(i) for i in starts]
+        offsets = [len(text[:i].encode('utf-8')) for i in starts]
+        index = LineIndex(data)
+        order = list(range(len(starts)))
+        for positions in (order, order[::-1], order[::2] + order[1::2]):
+            self.assertEqual([index.position(offsets[i]) for i in positions],
+                             [expected[i] for i in positions])
+    
+    def test_offset_and_first_line(self):
+        """Testa um índice de um trecho que começa no meio do texto"""
+        index = LineIndex("b = 2;\nc", offset=100, first_line=10)
+        self.assertEqual(index.position(100), (10, 1))
+        self.assertEqual(index.position(107), (11, 1))
+        self.assertEqual(index.line_start(11), 107)
+    
+    def test_positions_are_lazy(self):
+        """Testa que o índice só é construído quando uma posição é pedida"""
+        lexer = Lexer("int x = 1;\nx = 2;")
+        tokens = lexer.tokenize()
+        self.assertIsNone(lexer.index._starts)
+        self.assertEqual(tokens[6].offset, 11)
+        self.assertEqual((tokens[6].line, tokens[6].column), (2, 1))
+        self.assertIsNotNone(lexer.index._starts)
+        self.assertEqual(tokens[6], Token(TokenType.IDENTIFIER, 'x', 2, 1))
+
+
+class TestRecovery(unittest.TestCase):
+    """Testes para o modo de recuperação de erros"""
+    
+    CODE = 'int x = @1; y = $$ 2;\n"abc\nz /* c'
+    
+    EXPECTED = [
+        (TokenType.INT, 'int', 1, 1), (TokenType.IDENTIFIER, 'x', 1, 5), (TokenType.ASSIGN, '=', 1, 7),
+        (TokenType.ERROR, '@', 1, 9), (TokenType.NUMBER, '1', 1, 10), (TokenType.SEMICOLON, ';', 1, 11),
+        (TokenType.IDENTIFIER, 'y', 1, 13), (TokenType.ASSIGN, '=', 1, 15), (TokenType.ERROR, '$$', 1, 17),
+        (TokenType.NUMBER, '2', 1, 20), (TokenType.SEMICOLON, ';', 1, 21), (TokenType.NEWLINE, '\n', 1, 22),
+        (TokenType.ERROR, '"', 2, 1), (TokenType.IDENTIFIER, 'abc', 2, 2), (TokenType.NEWLINE, '\n', 2, 5),
+        (TokenType.IDENTIFIER, 'z', 3, 1), (TokenType.DIVIDE, '/', 3, 3), (TokenType.MULTIPLY, '*', 3, 4),
+        (TokenType.IDENTIFIER, 'c', 3, 6), (TokenType.EOF, '', 3, 7),
+    ]
+    
+    def test_errors_become_tokens(self):
+        """Testa que a análise continua depois de cada trecho não reconhecido"""
+        for engine in Lexer.ENGINES:
+            with self.subTest(engine):
+                lexer = Lexer(self.CODE, engine=engine, recover=True)
+                tokens = lexer.tokenize()
+                self.assertEqual([(t.type, t.value, t.line, t.column) for t in tokens], self.EXPECTED)
+                self.assertEqual(lexer.error_count, 3)
+                self.assertEqual([(e.message, e.line, e.column, e.offset) for e in lexer.errors], [
+                    ("Caractere inesperado: '@'", 1, 9, 8),
+                    ("Caracteres inesperados: '$$'", 1, 17, 16),
+                    ("Caractere inesperado: '\"'", 2, 1, 22),
+                ])
+    
+    def test_string_after_escaped_newline(self):
+        """Testa que uma string que falha em '\\' + quebra de linha não descarta as seguintes"""
+        code = '"\\\nx = "hi";\n\'\\\n\'ok\''
+        expected = [
+            (TokenType.ERROR, '"\\'), (TokenType.NEWLINE, '\n'), (TokenType.IDENTIFIER, 'x'),
+            (TokenType.ASSIGN, '='), (TokenType.STRING_LITERAL, '"hi"'), (TokenType.SEMICOLON, ';'),
+            (TokenType.NEWLINE, '\n'), (TokenType.ERROR, "'\\"), (TokenType.NEWLINE, '\n'),
+            (TokenType.STRING_LITERAL, "'ok'"), (TokenType.EOF, ''),
+        ]
+        for engine in Lexer.ENGINES:
+            for source in (code, code.encode('utf-8')):
+                if engine != 'master' and not isinstance(source, str):
+                    continue
+                with self.subTest(engine=engine, binary=not isinstance(source, str)):
+                    tokens = Lexer(source, engine=engine, recover=True).tokenize()
+                    self.assertEqual([(t.type, t.value) for t in tokens], expected)
+    
+    def test_same_tokens_in_every_mode(self):
+        """Testa o modo de recuperação em buffer, bytes, gerador e arquivos"""
+        modes = {
+            'buffer': Lexer(self.CODE, recover=True).tokenize(as_buffer=True),
+            'bytes': Lexer(self.CODE.encode('utf-8'), recover=True).tokenize(),
+            'stream': list(Lexer(self.CODE, recover=True).iter_tokens()),
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'code.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.CODE)
+            for chunk_size in (1, 5, 1 << 20):
+                modes[f'iter_file {chunk_size}'] = list(Lexer.iter_file(path, chunk_size=chunk_size, recover=True))
+            modes['mmap'] = list(Lexer.iter_mapped_file(path, recover=True))
+        
+        for name, tokens in modes.items():
+            with self.subTest(name):
+                self.assertEqual([(t.type, t.value, t.line, t.column) for t in tokens], self.EXPECTED)
+    
+    def test_max_errors(self):
+        """Testa que só os primeiros max_errors erros são guardados"""
+        lexer = Lexer("a @ b # c $ d", recover=True, max_errors=2)
+        tokens = lexer.tokenize()
+        self.assertEqual(lexer.error_count, 3)
+        self.assertEqual([e.column for e in lexer.errors], [3, 7])
+        self.assertEqual(sum(t.type == TokenType.ERROR for t in tokens), 3)
+    
+    def test_long_error_message_is_truncated(self):
+        """Testa a mensagem de um trecho longo não reconhecido"""
+        lexer = Lexer("x " + "@" * 30, recover=True)
+        lexer.tokenize()
+        self.assertEqual(lexer.errors[0].message, "Caracteres inesperados: '" + "@" * 20 + "...'")
+    
+    def test_without_recover_still_raises(self):
+        """Testa que sem recover o primeiro erro continua interrompendo a análise"""
+        with self.assertRaises(LexerError):
+            Lexer(self.CODE).tokenize()
+    
+    def test_unterminated_delimiters_are_linear(self):
+        """Testa que muitos delimitadores sem fechamento não tornam a análise quadrática"""
+        tokens = Lexer('/* ' * 20000, recover=True).tokenize()
+        self.assertEqual(len(tokens), 40001)
+        
+        # Aspas escapadas nunca fecham a string: tudo vira um único erro
+        for quote in '"\'':
+            with self.subTest(quote):
+                lexer = Lexer((quote + '\\') * 20000, recover=True)
+                self.assertEqual([t.type for t in lexer.tokenize()], [TokenType.ERROR, TokenType.EOF])
+                self.assertEqual(lexer.error_count, 1)
+
+
+class TestLexerSpec(unittest.TestCase):
+    """Testes para especificações léxicas de outros dialetos"""
+    
+    DIALECT = {
+        'keywords': {'inteiro': 'INT', 'se': 'IF', 'retorna': 'RETURN'},
+        'operators': {':=': 'ASSIGN', '=': 'EQUAL', '<>': 'NOT_EQUAL', '<': 'LESS_THAN',
+                      '+': 'PLUS', ';': 'SEMICOLON', '(': 'LEFT_PAREN', ')': 'RIGHT_PAREN'},
+        'literals': [['0x[0-9a-f]+', 'NUMBER'], ['\\d+', 'NUMBER']],
+        'strings': ['`'],
+        'line_comments': ['#'],
+        'block_comments': [['(*', '*)']],
+    }
+    
+    CODE = 'inteiro x := 0x1f; # fim\n(* bloco\n com ; *) se (x <> 2) retorna `a\n#b`;\n'
+    
+    EXPECTED = [
+        (TokenType.INT, 'inteiro', 1, 1), (TokenType.IDENTIFIER, 'x', 1, 9), (TokenType.ASSIGN, ':=', 1, 11),
+        (TokenType.NUMBER, '0x1f', 1, 14), (TokenType.SEMICOLON, ';', 1, 18), (TokenType.NEWLINE, '\n', 1, 25),
+        (TokenType.IF, 'se', 3, 11), (TokenType.LEFT_PAREN, '(', 3, 14), (TokenType.IDENTIFIER, 'x', 3, 15),
+        (TokenType.NOT_EQUAL, '<>', 3, 17), (TokenType.NUMBER, '2', 3, 20), (TokenType.RIGHT_PAREN, ')', 3, 21),
+        (TokenType.RETURN, 'retorna', 3, 23), (TokenType.STRING_LITERAL, '`a\n#b`', 3, 31),
+        (TokenType.SEMICOLON, ';', 4, 4), (TokenType.NEWLINE, '\n', 4, 5), (TokenType.EOF, '', 5, 1),
+    ]
+    
+    def test_default_spec(self):
+        """Testa que a especificação padrão gera os padrões do Lexer"""
+        self.assertEqual(DEFAULT_SPEC.compile().patterns, tuple(Lexer.TOKEN_PATTERNS))
+        self.assertEqual(dict(DEFAULT_SPEC.compile().delimited), Lexer.DELIMITED_PATTERNS)
+        self.assertIs(Lexer("x").spec, DEFAULT_SPEC)
+    
+    def test_compilation_is_shared(self):
+        """Testa que especificações iguais compartilham a mesma compilação"""
+        spec = LexerSpec.from_dict(self.DIALECT)
+        same = LexerSpec.from_dict(self.DIALECT)
+        self.assertIsNot(spec, same)
+        self.assertEqual(spec, same)
+        self.assertIs(spec.compile(), same.compile())
+        self.assertIs(Lexer("a", spec=spec).compiled, Lexer("b", spec=same).compiled)
+        self.assertIs(LexerSpec.from_dict(DEFAULT_SPEC.to_dict()).compile(), DEFAULT_SPEC.compile())
+        self.assertNotEqual(spec.fingerprint(), DEFAULT_SPEC.fingerprint())
+    
+    def test_dialect_in_every_mode(self):
+        """Testa um dialeto nos dois engines, em bytes, em blocos e em paralelo"""
+        spec = LexerSpec.from_dict(self.DIALECT)
+        modes = {engine: Lexer(self.CODE, engine=engine, spec=spec).tokenize() for engine in Lexer.ENGINES}
+        modes['bytes'] = Lexer(self.CODE.encode('utf-8'), spec=spec).tokenize()
+        modes['stream'] = list(Lexer(self.CODE, spec=spec).iter_tokens())
+        modes['parallel'] = SmallRegionLexer(self.CODE * 3, spec=spec).tokenize(parallel=3)[:len(self.EXPECTED) - 1]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'code.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.CODE)
+            for chunk_size in (1, 2, 7, 1 << 20):
+                modes[f'iter_file {chunk_size}'] = list(Lexer.iter_file(path, chunk_size=chunk_size, spec=spec))
+        
+        for name, tokens in modes.items():
+            with self.subTest(name):
+                expected = self.EXPECTED[:-1] if name == 'parallel' else self.EXPECTED
+                self.assertEqual([(t.type, t.value, t.line, t.column) for t in tokens], expected)
+        
+        with self.assertRaises(LexerError):
+            Lexer("x % 2", spec=spec).tokenize()
+    
+    def test_from_file(self):
+        """Testa o carregamento de um arquivo JSON e os erros de validação"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'dialeto.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'keywords': {'se': 'IF'}}, f)
+            spec = LexerSpec.from_file(path)
+            # Campos ausentes vêm da especificação padrão
+            self.assertEqual(spec.operators, DEFAULT_SPEC.operators)
+            self.assertEqual([t.type for t in Lexer("se if", spec=spec).tokenize()],
+                             [TokenType.IF, TokenType.IDENTIFIER, TokenType.EOF])
+            
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('{nao e json')
+            with self.assertRaises(ValueError):
+                LexerSpec.from_file(path)
+        
+        invalid = [
+            {'keywords': {'se': 'SE'}},
+            {'operadores': {}},
+            {'literals': [['[0-9', 'NUMBER']]},
+            {'strings': ['""']},
+            {'operators': {'': 'PLUS'}},
+            {'literals': 5},
+        ]
+        for data in invalid:
+            with self.subTest(data):
+                with self.assertRaises(ValueError):
+                    LexerSpec.from_dict(data).compile()
+    
+    def test_cache_key_depends_on_spec(self):
+        """Testa que o cache não mistura tokens de dialetos diferentes"""
+        from src.cache import TokenCache
+        spec = LexerSpec.from_dict({'operators': {'=': 'EQUAL', ';': 'SEMICOLON'}})
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TokenCache(tmp)
+            default = Lexer("x = 1;", cache=cache).tokenize()
+            dialect = Lexer("x = 1;", cache=cache, spec=spec).tokenize()
+            self.assertEqual((cache.hits, cache.misses), (0, 2))
+            self.assertEqual(default[1].type, TokenType.ASSIGN)
+            self.assertEqual(dialect[1].type, TokenType.EQUAL)
 
 
 class TestTokenType(unittest.TestCase):
@@ -0,0 +1,185 @@
+import unittest
+import sys
+import os
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_cli(*args):
+    """Executa a CLI em um processo novo, como na linha de comando"""
+    return subprocess.run([sys.executable, '-m', 'src.main', *args], cwd=ROOT,
+                          capture_output=True, text=True, encoding='utf-8')
+
+
+class TestColdStart(unittest.TestCase):
+    """Testes para a inicialização da CLI"""
+
+    def test_optional_modules_are_not_imported(self):
+        """Testa que uma análise simples não carrega módulos das opções não usadas"""
+        deferred = ('src.batch', 'src.cache', 'src.profiling', 'src.server', 'src.tokfile',
+                    'pathlib', 'dataclasses', 'hashlib', 'asyncio')
+        code = ("import sys; sys.argv = ['lexer', 'int x = 1;']; import src.main; src.main.main(); "
+                f"sys.stderr.write(' '.join(m for m in {deferred!r} if m in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stderr, '')
+
+    def test_timings(self):
+        """Testa o relatório de tempos em stderr, separado da saída"""
+        result = run_cli('--timings', 'int x = 10 + 5;')
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('NUMBER(10)', result.stdout)
+        self.assertNotIn('Tempos:', result.stdout)
+        for phase in ('Importação', 'Preparação', 'Análise', 'Saída', 'Total'):
+            self.assertIn(phase, result.stderr)
+
+    def test_batch_input_still_detected(self):
+        """Testa que diretórios e globs continuam ativando o modo em lote"""
+        for pattern in ('exemplos', os.path.join('exemplos', '0*.txt')):
+            with self.subTest(pattern):
+                result = run_cli(pattern)
+                self.assertEqual(result.returncode, 0, result.stderr)
+                self.assertIn('Arquivos com erro: 0', result.stdout)
+
+
+
+class TestRecoverOption(unittest.TestCase):
+    """Testes para a opção --recover"""
+
+    def test_lists_all_errors(self):
+        """Testa que todos os erros são listados e o código de saída indica falha"""
+        result = run_cli('--recover', 'int x = @1;\ny = $ 2;')
+        self.assertEqual(result.returncode, 1)
+        self.assertIn('ERROR(@)', result.stdout)
+        self.assertIn('NUMBER(2)', result.stdout)
+        self.assertIn('Erros léxicos: 2', result.stdout)
+        self.assertIn("Linha 1, coluna 9: trecho não reconhecido '@'", result.stderr)
+        self.assertIn("Linha 2, coluna 5: trecho não reconhecido '$'", result.stderr)
+
+    def test_max_errors(self):
+        """Testa o limite de erros listados"""
+        result = run_cli('--recover', '--max-errors', '1', '@ # $')
+        self.assertEqual(result.returncode, 1)
+        self.assertIn('Erros léxicos: 3', result.stdout)
+        self.assertIn('... e mais 2 erros', result.stderr)
+        self.assertNotIn('coluna 3', result.stderr)
+
+
+
+class TestSpecOption(unittest.TestCase):
+    """Testes para a opção --spec"""
+
+    def test_dialect(self):
+        """Testa a análise com uma especificação carregada de um arquivo"""
+        import json
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'dialeto.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'keywords': {'se': 'IF'}, 'line_comments': ['#']}, f)
+            result = run_cli('--spec', path, 'se x # comentário')
+            invalid = run_cli('--spec', os.path.join(tmp, 'inexistente.json'), 'x')
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('  IF\n  IDENTIFIER(x)\n', result.stdout)
+        self.assertEqual(invalid.returncode, 2)
+        self.assertIn('--spec', invalid.stderr)
+
+
+class TestOutputFormats(unittest.TestCase):
+    """Testes para os formatos de saída e a opção --quiet"""
+
+    def test_ndjson(self):
+        """Testa um objeto por linha na saída padrão, com as mensagens em stderr"""
+        import json
+        result = run_cli('--format', 'ndjson', 'int x = 1;')
+        self.assertEqual(result.returncode, 0, result.stderr)
+        records = [json.loads(line) for line in result.stdout.splitlines()]
+        self.assertEqual(records[1], {'type': 'IDENTIFIER', 'value': 'x', 'line': 1, 'column': 5})
+        self.assertEqual(len(records), 5)
+        self.assertIn('Total de tokens: 5', result.stderr)
+
+    def test_csv(self):
+        """Testa o CSV com cabeçalho e valores com vírgulas e aspas"""
+        import csv
+        result = run_cli('--format', 'csv', 's = "a,b";')
+        self.assertEqual(result.returncode, 0, result.stderr)
+        rows = list(csv.reader(result.stdout.splitlines()))
+        self.assertEqual(rows[0], ['type', 'value', 'line', 'column'])
+        self.assertEqual(rows[3], ['STRING_LITERAL', '"a,b"', '1', '5'])
+
+    def test_json_matches_list(self):
+        """Testa que a lista JSON escrita item a item continua válida"""
+        import json
+        for code, count in (('int x;', 3), ('', 0)):
+            with self.subTest(code):
+                result = run_cli('--format', 'json', code)
+                self.assertEqual(result.returncode, 0, result.stderr)
+                body = result.stdout.split('-' * 50 + '\n', 1)[1].split('\nEstatísticas:')[0]
+                self.assertEqual(len(json.loads(body)), count)
+
+    def test_quiet(self):
+        """Testa que --quiet mostra só as estatísticas"""
+        result = run_cli('--quiet', 'int x = 1;')
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertNotIn('IDENTIFIER', result.stdout)
+        self.assertIn('Total de tokens: 5', result.stdout)
+        self.assertIn('Linhas processadas: 1', result.stdout)
+
+    def test_long_input_preview(self):
+        """Testa que o código fornecido é mostrado truncado"""
+        result = run_cli('--quiet', 'x ' * 500)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('(1000 caracteres)', result.stdout)
+        self.assertLess(len(result.stdout), 600)
+
+
+class TestStatsCommand(unittest.TestCase):
+    """Testes para o subcomando stats"""
+
+    def test_report(self):
+        """Testa o relatório de texto e o JSON de um diretório"""
+        import json
+        result = run_cli('stats', '--jobs', '1', '--top', '3', 'exemplos')
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('Arquivos analisados: 8', result.stdout)
+        self.assertIn('Identificadores mais frequentes:', result.stdout)
+        self.assertIn('Tamanho das linhas (bytes)', result.stdout)
+
+        result = run_cli('stats', '--jobs', '1', '--format', 'json', '--top', '3', 'exemplos')
+        self.assertEqual(result.returncode, 0, result.stderr)
+        report = json.loads(result.stdout)
+        self.assertEqual(report['files'], 8)
+        self.assertEqual(len(report['identifiers']), 3)
+        self.assertGreater(report['types']['IDENTIFIER'], 0)
+
+
+
+class TestPreprocessOption(unittest.TestCase):
+    """Testes para a opção --preprocess"""
+
+    def test_include_and_define(self):
+        """Testa includes, diretórios de inclusão e macros na CLI"""
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            os.mkdir(os.path.join(tmp, 'lib'))
+            with open(os.path.join(tmp, 'lib', 'defs.txt'), 'w', encoding='utf-8') as f:
+                f.write('define LIMITE 10\n')
+            main = os.path.join(tmp, 'main.txt')
+            with open(main, 'w', encoding='utf-8') as f:
+                f.write('include "defs.txt"\nint x = LIMITE;\n')
+            result = run_cli('--preprocess', '-I', os.path.join(tmp, 'lib'), main)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertIn('NUMBER(10)', result.stdout)
+            self.assertNotIn('LIMITE', result.stdout)
+
+            result = run_cli('--preprocess', main)
+            self.assertEqual(result.returncode, 1)
+            self.assertIn("Arquivo incluído não encontrado: 'defs.txt'", result.stderr)
+
+        result = run_cli('-I', 'lib', 'int x;')
+        self.assertEqual(result.returncode, 2)
+        self.assertIn('--include-dir requer --preprocess', result.stderr)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,133 @@
+import unittest
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.lexer import Lexer, LexerError, TokenType
+from src.preprocessor import IncludeCache, Preprocessor, PreprocessorError, preprocess_file
+
+
+def values(tokens):
+    return [t.value for t in tokens if t.type not in (TokenType.NEWLINE, TokenType.EOF)]
+
+
+class TestPreprocessor(unittest.TestCase):
+    """Testes para a expansão de includes e macros"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = os.path.realpath(directory.name)
+        self.cache = IncludeCache()
+
+    def write(self, name, code):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(code)
+        return path
+
+    def process(self, name, **kwargs):
+        return Preprocessor(cache=self.cache, **kwargs).process_file(os.path.join(self.root, name))
+
+    def test_include_and_positions(self):
+        """Testa a inclusão relativa e o arquivo e a posição de cada token"""
+        header = self.write('comum/cab.txt', 'int base = 1;\n')
+        main = self.write('main.txt', 'x = 0;\n  include "comum/cab.txt";\ny = base;')
+        tokens = self.process('main.txt')
+        self.assertEqual(values(tokens), ['x', '=', '0', ';', 'int', 'base', '=', '1', ';',
+                                          'y', '=', 'base', ';'])
+        base = tokens[[t.value for t in tokens].index('base')]
+        self.assertEqual((base.file, base.line, base.column), (header, 1, 5))
+        last = tokens[-2]
+        self.assertEqual((last.file, last.line, last.column), (main, 3, 9))
+        self.assertEqual((tokens[-1].type, tokens[-1].file), (TokenType.EOF, main))
+
+    def test_macros(self):
+        """Testa macros de objeto, aninhadas e autorreferentes"""
+        self.write('defs.txt', 'define LIMITE 100\n')
+        self.write('main.txt', 'include "defs.txt"\ndefine DOBRO LIMITE * 2 // fim\n'
+                               'define X X + 1\nx = DOBRO; y = X;\nLIMITE = 1;')
+        tokens = self.process('main.txt')
+        self.assertEqual(values(tokens), ['x', '=', '100', '*', '2', ';', 'y', '=', 'X', '+', '1', ';',
+                                          '100', '=', '1', ';'])
+
+    def test_not_directives(self):
+        """Testa include e define que não iniciam uma diretiva"""
+        self.write('main.txt', 'include = 1; define (2);\nx = include define;')
+        self.assertEqual(values(self.process('main.txt')),
+                         ['include', '=', '1', ';', 'define', '(', '2', ')', ';',
+                          'x', '=', 'include', 'define', ';'])
+
+    def test_each_file_lexed_once(self):
+        """Testa que um arquivo incluído várias vezes é tokenizado uma vez"""
+        self.write('cab.txt', 'int comum;\n')
+        self.write('a.txt', 'include "cab.txt"\n')
+        self.write('main.txt', 'include "a.txt"\ninclude "cab.txt"\ninclude "a.txt"\n')
+        tokens = self.process('main.txt')
+        self.assertEqual(values(tokens), ['int', 'comum', ';'] * 3)
+        self.assertEqual((self.cache.misses, len(self.cache)), (3, 3))
+        self.process('main.txt')
+        self.assertEqual(self.cache.misses, 3)
+
+        # Um arquivo alterado é tokenizado de novo
+        self.write('cab.txt', 'float outro;\n')
+        self.assertEqual(values(self.process('main.txt')), ['float', 'outro', ';'] * 3)
+        self.assertEqual(self.cache.misses, 4)
+
+    def test_include_dirs_and_whitespace(self):
+        """Testa diretórios de inclusão e a saída com whitespace e comentários"""
+        # A linha da diretiva, inclusive o comentário, é substituída pelo arquivo
+        self.write('lib/cab.txt', 'a /* b */ c')
+        self.write('src/main.txt', 'include "cab.txt" // comum\nd')
+        with self.assertRaises(PreprocessorError):
+            self.process('src/main.txt')
+        tokens = self.process('src/main.txt', include_dirs=[os.path.join(self.root, 'lib')],
+                              skip_whitespace=False, skip_comments=False)
+        self.assertEqual([t.value for t in tokens[:-1]],
+                         ['a', ' ', '/* b */', ' ', 'c', '\n', 'd'])
+
+    def test_errors(self):
+        """Testa ciclos, arquivos ausentes, texto após include e erros léxicos"""
+        self.write('a.txt', 'include "b.txt"\n')
+        self.write('b.txt', 'x;\ninclude "a.txt"\n')
+        self.write('ausente.txt', 'include "nao_existe.txt"\n')
+        self.write('extra.txt', 'include "a.txt" x\n')
+        self.write('lexico.txt', 'int x;\n\n  @\n')
+        self.write('usa_lexico.txt', 'include "lexico.txt"\n')
+        cases = [
+            ('a.txt', 'b.txt', (2, 1), 'Inclusão cíclica: a.txt -> b.txt -> a.txt'),
+            ('ausente.txt', 'ausente.txt', (1, 9), "não encontrado: 'nao_existe.txt'"),
+            ('extra.txt', 'extra.txt', (1, 17), "Texto inesperado"),
+            ('usa_lexico.txt', 'lexico.txt', (3, 3), "Caractere inesperado: '@'"),
+        ]
+        for name, where, position, message in cases:
+            with self.subTest(name):
+                with self.assertRaises(LexerError) as context:
+                    self.process(name)
+                error = context.exception
+                self.assertIsInstance(error, PreprocessorError)
+                self.assertEqual(error.path, os.path.join(self.root, where))
+                self.assertEqual((error.line, error.column), position)
+                self.assertIn(message, str(error))
+
+    def test_process_text(self):
+        """Testa o pré-processamento de um texto e preprocess_file"""
+        path = self.write('cab.txt', 'define N 7\n')
+        tokens = Preprocessor(cache=self.cache).process(f'include "{path}"\nx = N;')
+        self.assertEqual(values(tokens), ['x', '=', '7', ';'])
+        self.assertIsNone(tokens[-2].file)
+        self.assertEqual(tokens[-1].type, TokenType.EOF)
+        self.assertEqual(values(preprocess_file(self.write('m.txt', 'int x;'))), ['int', 'x', ';'])
+
+    def test_without_directives_matches_lexer(self):
+        """Testa que um arquivo sem diretivas produz os tokens do lexer"""
+        code = 'int x = 10; // c\n/* b */ y = "s";\n'
+        self.write('main.txt', code)
+        self.assertEqual(self.process('main.txt'), Lexer(code).tokenize())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.lexer import Lexer, LexerError, TokenType
+from src.profiling import LexerProfile
+
+EXEMPLOS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'exemplos')
+
+
+def pattern_index(pattern):
+    return [p for p, _ in Lexer.TOKEN_PATTERNS].index(pattern)
+
+
+class TestLexerProfile(unittest.TestCase):
+    """Testes para a tokenização instrumentada"""
+
+    def setUp(self):
+        with open(os.path.join(EXEMPLOS_DIR, '08_bubble_sort.txt'), 'r', encoding='utf-8') as f:
+            self.code = f.read()
+
+    def test_same_tokens(self):
+        """Testa que a instrumentação não altera o resultado"""
+        for engine in Lexer.ENGINES:
+            for as_buffer in (False, True):
+                with self.subTest(engine=engine, as_buffer=as_buffer):
+                    profile = LexerProfile()
+                    tokens = Lexer(self.code, engine=engine).tokenize(as_buffer=as_buffer, profile=profile)
+                    self.assertEqual(list(tokens), Lexer(self.code).tokenize())
+                    self.assertEqual(sum(profile.matches), profile.tokens)
+
+    def test_pattern_counts(self):
+        """Testa tentativas e falhas derivadas do padrão vencedor"""
+        profile = LexerProfile()
+        Lexer("x = 1.5 + 12; // fim").tokenize(profile=profile)
+        matches = dict(zip((p for p, _ in profile.patterns), profile.matches))
+        self.assertEqual(matches[r'\d+\.\d+'], 1)
+        self.assertEqual(matches[r'\d+'], 1)
+        self.assertEqual(matches[r'//.*'], 1)
+        self.assertEqual(profile.attempts[0], profile.tokens)
+        last = pattern_index(r'\n')
+        self.assertEqual(profile.attempts[last], 0)
+        identifier = pattern_index(r'[a-zA-Z_][a-zA-Z0-9_]*')
+        self.assertEqual(profile.failures[identifier], profile.attempts[identifier] - 1)
+
+    def test_keywords_and_binary_input(self):
+        """Testa palavras-chave (padrão de identificador) e entrada bytes"""
+        profile = LexerProfile()
+        Lexer("int acao = true;".encode('utf-8')).tokenize(profile=profile)
+        self.assertEqual(profile.matches[pattern_index(r'[a-zA-Z_][a-zA-Z0-9_]*')], 3)
+        self.assertEqual(profile.type_counts[TokenType.INT], 1)
+        self.assertEqual(profile.bytes, len("int acao = true;"))
+
+    def test_errors_and_regions(self):
+        """Testa a contagem de erros e as regiões por faixa de linhas"""
+        profile = LexerProfile(region_lines=2)
+        with self.assertRaises(LexerError):
+            Lexer("a\nb\nc\n@").tokenize(profile=profile)
+        self.assertEqual(profile.errors, 1)
+        self.assertEqual(profile.attempts[-1], profile.matches[-1] + 1)
+        regions = profile.slowest_regions(10)
+        self.assertEqual(sorted((first, last) for first, last, _ in regions), [(1, 2), (3, 4)])
+        self.assertTrue(any('Regiões mais lentas' in line for line in profile.report()))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,161 @@
+import unittest
+import sys
+import os
+import asyncio
+import struct
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.lexer import Lexer
+from src.server import LexerClient, LexerServer, encode_frame, read_frame, decode_body
+
+EXEMPLOS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'exemplos')
+
+
+class BlockingServer(LexerServer):
+    """Servidor cujos pedidos 'lex' esperam um evento antes de responder"""
+
+    async def _dispatch(self, request):
+        if request.get('op') == 'lex':
+            await self.release.wait()
+        return await super()._dispatch(request)
+
+
+class TestLexerServer(unittest.TestCase):
+    """Testes para o servidor em socket Unix"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'lexer.sock')
+
+    def run_with_server(self, scenario, server_class=LexerServer, **kwargs):
+        """Roda scenario(server) com um servidor ativo"""
+        async def main():
+            async with server_class(self.path, workers=2, **kwargs) as server:
+                return await scenario(server)
+        return asyncio.run(main())
+
+    async def client(self, scenario):
+        """Roda o cliente síncrono em uma thread, fora do laço de eventos"""
+        def run():
+            with LexerClient(self.path, timeout=30) as client:
+                return scenario(client)
+        return await asyncio.get_running_loop().run_in_executor(None, run)
+
+    def test_lex_text_and_file(self):
+        """Testa que as respostas correspondem à tokenização local"""
+        path = os.path.join(EXEMPLOS_DIR, '08_bubble_sort.txt')
+        with open(path, 'r', encoding='utf-8') as f:
+            code = f.read()
+        expected = [str(t) for t in Lexer(code).tokenize()][:-1]
+
+        def scenario(client):
+            return (client.lex(code, format='simple'), client.lex(path=path, format='simple'),
+                    client.lex(code, format='count', skip_comments=False),
+                    client.lex("int x;", engine='loop'))
+
+        text, file, count, loop = self.run_with_server(lambda server: self.client(scenario))
+        self.assertEqual(text['tokens'], expected)
+        self.assertEqual(file['tokens'], expected)
+        self.assertEqual(count['count'], len(Lexer(code).tokenize(skip_comments=False)) - 1)
+        self.assertNotIn('tokens', count)
+        self.assertEqual(loop['tokens'][1], {'type': 'IDENTIFIER', 'value': 'x', 'line': 1, 'column': 5})
+
+    def test_pipelining(self):
+        """Testa vários pedidos enviados antes de ler as respostas"""
+        codes = [f"int x{i} = {i};" for i in range(50)]
+
+        def scenario(client):
+            ids = [client.send('lex', text=code, format='simple') for code in codes]
+            return [client.receive(request_id) for request_id in reversed(ids)][::-1]
+
+        responses = self.run_with_server(lambda server: self.client(scenario))
+        for code, response in zip(codes, responses):
+            self.assertEqual(response['tokens'], [str(t) for t in Lexer(code).tokenize()][:-1])
+
+    def test_errors_keep_connection_open(self):
+        """Testa erros léxicos e pedidos inválidos sem derrubar a conexão"""
+        def scenario(client):
+            return [
+                client.lex("int x = @;"),
+                client.request('lex'),
+                client.request('lex', text="x", format='xml'),
+                client.request('apagar'),
+                client.lex(path=os.path.join(self.tmp.name, 'inexistente.txt')),
+                client.lex("x"),
+            ]
+
+        *errors, last = self.run_with_server(lambda server: self.client(scenario))
+        self.assertEqual([e['error']['type'] for e in errors], ['lexer', 'request', 'request', 'request', 'io'])
+        self.assertEqual((errors[0]['error']['line'], errors[0]['error']['column']), (1, 9))
+        self.assertTrue(last['ok'])
+
+    def test_health_and_stats(self):
+        """Testa o estado do servidor e os percentis de latência"""
+        def scenario(client):
+            for _ in range(10):
+                client.lex("int x;", format='count')
+            client.lex("@")
+            return client.request('health'), client.request('stats')
+
+        health, stats = self.run_with_server(lambda server: self.client(scenario))
+        self.assertEqual(health['status'], 'ok')
+        stats = stats['stats']
+        self.assertEqual((stats['requests'], stats['failed'], stats['workers']), (12, 1, 2))
+        latency = stats['latency_ms']
+        self.assertLessEqual(latency['p50'], latency['p90'])
+        self.assertLessEqual(latency['p90'], latency['p99'])
+        self.assertLessEqual(latency['p99'], latency['max'])
+
+    def test_backpressure(self):
+        """Testa que o servidor para de ler uma conexão com max_pending pedidos em andamento"""
+        async def scenario(server):
+            server.release = asyncio.Event()
+            reader, writer = await asyncio.open_unix_connection(self.path)
+            for i in range(6):
+                writer.write(encode_frame({'id': i, 'op': 'lex', 'text': 'x', 'format': 'count'}))
+            await writer.drain()
+            await asyncio.sleep(0.2)
+            in_flight = server.in_flight
+            server.release.set()
+            responses = [decode_body(await read_frame(reader)) for _ in range(6)]
+            writer.close()
+            return in_flight, responses
+
+        in_flight, responses = self.run_with_server(scenario, BlockingServer, max_pending=2)
+        self.assertEqual(in_flight, 2)
+        self.assertEqual(sorted(r['id'] for r in responses), list(range(6)))
+
+    def test_malformed_frames(self):
+        """Testa JSON inválido e mensagens acima do limite"""
+        async def scenario(server):
+            reader, writer = await asyncio.open_unix_connection(self.path)
+            body = b'{nao e json'
+            writer.write(struct.pack('>I', len(body)) + body)
+            invalid = decode_body(await read_frame(reader))
+            writer.write(struct.pack('>I', 1 << 20))
+            oversized = decode_body(await read_frame(reader))
+            closed = await read_frame(reader)
+            writer.close()
+            return invalid, oversized, closed
+
+        invalid, oversized, closed = self.run_with_server(scenario, max_request_size=1024)
+        self.assertEqual(invalid['error']['type'], 'request')
+        self.assertEqual(oversized['error']['type'], 'protocol')
+        self.assertIsNone(closed)
+
+    def test_stale_socket_is_replaced(self):
+        """Testa que um socket abandonado não impede o servidor de iniciar"""
+        import socket
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.path)
+        stale.close()
+        response = self.run_with_server(lambda server: self.client(lambda client: client.request('health')))
+        self.assertTrue(response['ok'])
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,140 @@
+import unittest
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.lexer import Lexer, LexerError, Token, TokenType
+from src.stream import TokenStream, UnexpectedTokenError
+
+
+class CountingSource:
+    """Fonte de tokens que conta quantos tokens foram lidos"""
+
+    def __init__(self, text):
+        self.tokens = Lexer(text).iter_tokens()
+        self.pulled = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        token = next(self.tokens)
+        self.pulled += 1
+        return token
+
+
+class TestTokenStream(unittest.TestCase):
+    """Testes para o cursor de tokens"""
+
+    def test_peek_next_expect(self):
+        """Testa a leitura com lookahead e a consumação dos tokens"""
+        stream = TokenStream.from_text("int x = 10;")
+        self.assertEqual(stream.peek().type, TokenType.INT)
+        self.assertEqual(stream.peek(2).type, TokenType.ASSIGN)
+        self.assertEqual(stream.next().type, TokenType.INT)
+        self.assertEqual(stream.expect(TokenType.IDENTIFIER).value, 'x')
+        self.assertIsNone(stream.accept(TokenType.SEMICOLON))
+        self.assertIsNotNone(stream.accept(TokenType.ASSIGN))
+        self.assertEqual(stream.expect(TokenType.NUMBER, '10').value, '10')
+        self.assertEqual(stream.position, 4)
+        stream.next()
+        self.assertTrue(stream.at_end)
+        for _ in range(3):
+            self.assertEqual(stream.next().type, TokenType.EOF)
+        self.assertEqual(stream.peek(5).type, TokenType.EOF)
+        self.assertEqual(stream.position, 6)
+
+    def test_expect_error(self):
+        """Testa o erro com a posição do token encontrado, sem consumi-lo"""
+        stream = TokenStream.from_text("int\n  x 5")
+        stream.next()
+        stream.expect(TokenType.NEWLINE)
+        with self.assertRaises(UnexpectedTokenError) as ctx:
+            stream.expect(TokenType.SEMICOLON)
+        error = ctx.exception
+        self.assertEqual((error.line, error.column), (2, 3))
+        self.assertEqual(error.token.value, 'x')
+        self.assertIn('esperado SEMICOLON, encontrado IDENTIFIER(x)', str(error))
+        with self.assertRaises(UnexpectedTokenError):
+            stream.expect(TokenType.IDENTIFIER, 'y')
+        self.assertEqual(stream.next().value, 'x')
+
+    def test_mark_and_reset(self):
+        """Testa retrocessos aninhados"""
+        stream = TokenStream.from_text("a b c d e f g h i j k l")
+        stream.next()
+        outer = stream.mark()
+        values = [stream.next().value for _ in range(3)]
+        inner = stream.mark()
+        values += [stream.next().value for _ in range(8)]
+        stream.reset(inner)
+        self.assertEqual(stream.next().value, 'e')
+        stream.reset(outer)
+        self.assertEqual(values, list('bcdefghijkl'))
+        self.assertEqual([t.value for t in stream][:-1], list('bcdefghijkl'))
+        with self.assertRaises(ValueError):
+            stream.reset(outer)
+
+    def test_release(self):
+        """Testa que liberar uma marca mantém a posição"""
+        stream = TokenStream.from_text("a b c")
+        mark = stream.mark()
+        stream.next()
+        stream.release(mark)
+        self.assertEqual(stream.next().value, 'b')
+        with self.assertRaises(ValueError):
+            stream.release(mark)
+
+    def test_lazy_and_bounded(self):
+        """Testa que os tokens são lidos sob demanda e o buffer não cresce com a entrada"""
+        source = CountingSource("x = 1;\n" * 20000)
+        stream = TokenStream(source)
+        stream.peek(2)
+        self.assertEqual(source.pulled, 3)
+        count = 0
+        while not stream.at_end:
+            stream.peek(3)
+            stream.next()
+            count += 1
+        self.assertEqual(count, 100000)
+        self.assertEqual(len(stream._ring), 8)
+
+        stream = TokenStream(CountingSource("x " * 100))
+        stream.mark()
+        for _ in range(50):
+            stream.next()
+        self.assertEqual(len(stream._ring), 64)
+
+    def test_source_without_eof(self):
+        """Testa o EOF sintetizado quando a fonte não termina com um"""
+        stream = TokenStream([Token(TokenType.IDENTIFIER, 'abc', 3, 7)])
+        stream.next()
+        eof = stream.next()
+        self.assertEqual((eof.type, eof.line, eof.column), (TokenType.EOF, 3, 10))
+
+    def test_lexer_errors_and_options(self):
+        """Testa erros léxicos no ponto da leitura e opções repassadas ao Lexer"""
+        stream = TokenStream.from_text("x @ y")
+        self.assertEqual(stream.next().value, 'x')
+        with self.assertRaises(LexerError):
+            stream.next()
+        stream = TokenStream.from_text("x @ y", recover=True, engine='loop')
+        self.assertEqual([t.type for t in stream][:3],
+                         [TokenType.IDENTIFIER, TokenType.ERROR, TokenType.IDENTIFIER])
+
+    def test_from_file(self):
+        """Testa um stream sobre um arquivo"""
+        code = "int x = 1; // c\nx = x + 2;\n"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'code.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(code)
+            with TokenStream.from_file(path) as stream:
+                tokens = list(stream)
+        self.assertEqual([str(t) for t in tokens], [str(t) for t in Lexer(code).tokenize()])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,97 @@
+import unittest
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.lexer import Lexer
+from src.tokfile import TokenFile, TokenFileError, TokenFileWriter, write_token_file
+
+EXEMPLOS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'exemplos')
+
+
+def token_tuples(tokens):
+    """Converte tokens em tuplas comparáveis"""
+    return [(t.type, t.value, t.line, t.column) for t in tokens]
+
+
+class TestTokenFile(unittest.TestCase):
+    """Testes para o formato binário de tokens"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'tokens.tok')
+        with open(os.path.join(EXEMPLOS_DIR, '08_bubble_sort.txt'), 'r', encoding='utf-8') as f:
+            self.tokens = Lexer(f.read()).tokenize(skip_whitespace=False, skip_comments=False)
+
+    def test_round_trip(self):
+        """Testa que os tokens lidos são iguais aos gravados"""
+        self.assertEqual(write_token_file(self.path, self.tokens), len(self.tokens))
+        with TokenFile(self.path) as tokens:
+            self.assertEqual(len(tokens), len(self.tokens))
+            self.assertEqual(token_tuples(tokens), token_tuples(self.tokens))
+
+    def test_random_access(self):
+        """Testa o acesso direto a posições arbitrárias"""
+        write_token_file(self.path, self.tokens)
+        with TokenFile(self.path) as tokens:
+            for index in (0, 17, len(self.tokens) // 2, -1):
+                self.assertEqual(token_tuples([tokens[index]]), token_tuples([self.tokens[index]]))
+            with self.assertRaises(IndexError):
+                tokens[len(self.tokens)]
+
+    def test_streaming_writer(self):
+        """Testa a gravação à medida que os tokens chegam, com cabeçalho no fim"""
+        import src.tokfile
+        original = src.tokfile._FLUSH_RECORDS
+        src.tokfile._FLUSH_RECORDS = 8
+        self.addCleanup(setattr, src.tokfile, '_FLUSH_RECORDS', original)
+        with open(self.path, 'wb') as f:
+            writer = TokenFileWriter(f)
+            writer.extend(self.tokens)
+            self.assertLess(len(writer._records), 8 * 4)
+            writer.finish()
+        with TokenFile(self.path) as tokens:
+            self.assertEqual(token_tuples(tokens), token_tuples(self.tokens))
+
+    def test_values_are_interned(self):
+        """Testa que valores repetidos ocupam uma única entrada de string"""
+        writer = TokenFileWriter()
+        writer.extend(self.tokens)
+        self.assertLess(len(writer._strings), len(self.tokens) // 2)
+
+    def test_unicode_and_empty(self):
+        """Testa valores não ASCII e arquivos sem tokens"""
+        tokens = Lexer('s = "ação ✓"; // comentário').tokenize(skip_comments=False)
+        write_token_file(self.path, tokens)
+        with TokenFile(self.path) as loaded:
+            self.assertEqual(token_tuples(loaded), token_tuples(tokens))
+
+        write_token_file(self.path, [])
+        with TokenFile(self.path) as loaded:
+            self.assertEqual(list(loaded), [])
+
+    def test_invalid_files(self):
+        """Testa arquivos que não são de tokens, de outra versão ou truncados"""
+        write_token_file(self.path, self.tokens)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+
+        cases = {
+            'magic': b'XXXX' + data[4:],
+            'versão': data[:4] + b'\x63\x00' + data[6:],
+            'truncado': data[:len(data) // 2],
+            'vazio': b'',
+        }
+        for name, content in cases.items():
+            with self.subTest(name):
+                with open(self.path, 'wb') as f:
+                    f.write(content)
+                with self.assertRaises(TokenFileError):
+                    TokenFile(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
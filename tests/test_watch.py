@@ -0,0 +1,164 @@
+import unittest
+import sys
+import os
+import socket
+import struct
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.server import decode_body
+from src.watch import EventBroadcaster, Watcher, format_event
+
+# Data de modificação antiga o bastante para a assinatura ser confiável
+OLD = 1_000_000_000
+
+
+class TestWatcher(unittest.TestCase):
+    """Testes para o modo de observação"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+        self.write('a.txt', 'int x = 1;\n')
+        self.write(os.path.join('sub', 'b.txt'), 'y = 2;\n')
+        self.write(os.path.join('.oculto', 'c.txt'), 'z;\n')
+        self.watcher = Watcher([self.root])
+        self.addCleanup(self.watcher.close)
+        self.checked = []
+        check = self.watcher._check
+
+        def counting_check(path, digest):
+            self.checked.append(os.path.basename(path))
+            return check(path, digest)
+        self.watcher._check = counting_check
+
+    def write(self, name, content, mtime=OLD):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+        return path
+
+    def events(self):
+        return {(event['event'], os.path.basename(event.get('path', ''))): event
+                for event in self.watcher.poll()}
+
+    def test_initial_scan(self):
+        """Testa que a primeira verificação anuncia os arquivos visíveis e o resumo"""
+        events = self.events()
+        self.assertEqual(set(events), {('added', 'a.txt'), ('added', 'b.txt'), ('summary', '')})
+        self.assertEqual(events[('added', 'a.txt')]['tokens'], 6)
+        self.assertEqual(events[('summary', '')]['tokens'], 11)
+
+    def test_only_changed_files_are_read(self):
+        """Testa que arquivos com a mesma assinatura não são lidos de novo"""
+        self.events()
+        self.checked.clear()
+        self.assertEqual(self.watcher.poll(), [])
+        self.assertEqual(self.checked, [])
+
+        self.write('a.txt', 'int x = 10;\n', OLD + 1)
+        events = self.events()
+        self.assertEqual(self.checked, ['a.txt'])
+        self.assertEqual(events[('changed', 'a.txt')]['delta'], {'tokens': 0, 'lines': 0, 'errors': 0})
+        self.assertEqual(events[('summary', '')]['files'], 2)
+
+    def test_same_content_is_not_relexed(self):
+        """Testa que mudar só a data (touch) não gera eventos"""
+        self.events()
+        path = os.path.join(self.root, 'a.txt')
+        os.utime(path, ns=(OLD + 5, OLD + 5))
+        self.assertEqual(self.watcher.poll(), [])
+        self.assertEqual(self.watcher.files[path].mtime_ns, OLD + 5)
+
+    def test_error_diff(self):
+        """Testa os erros novos e corrigidos entre versões de um arquivo"""
+        self.events()
+        self.write('a.txt', 'int x = @1;\n', OLD + 1)
+        event = self.events()[('changed', 'a.txt')]
+        self.assertEqual(event['new_errors'], [{'line': 1, 'column': 9, 'message': "Caractere inesperado: '@'"}])
+        self.assertEqual(event['delta']['errors'], 1)
+        self.assertEqual(self.watcher.failed, 1)
+        self.assertIn("  Linha 1, coluna 9: Caractere inesperado: '@'", format_event(event))
+
+        self.write('a.txt', 'int x = 1;\n', OLD + 2)
+        event = self.events()[('changed', 'a.txt')]
+        self.assertEqual(len(event['fixed_errors']), 1)
+        self.assertEqual(self.watcher.failed, 0)
+
+    def test_crlf_file(self):
+        """Testa que quebras de linha CRLF e CR são tratadas como no modo texto"""
+        self.events()
+        for step, newline in enumerate((b'\r\n', b'\r'), 1):
+            with self.subTest(newline=newline):
+                path = os.path.join(self.root, 'a.txt')
+                with open(path, 'wb') as f:
+                    f.write(b'int x = 1;' + newline + b'y = 2;' + newline)
+                os.utime(path, ns=(OLD + step, OLD + step))
+                event = self.events()[('changed', 'a.txt')]
+                self.assertEqual((event['tokens'], event['lines'], event['errors']), (11, 3, []))
+
+    def test_unicode_digits(self):
+        """Testa que dígitos não ASCII não são relatados como erro"""
+        self.events()
+        self.write('a.txt', 'x = ٣;\ny = 12٣ + 1.٣;\n', OLD + 1)
+        event = self.events()[('changed', 'a.txt')]
+        self.assertEqual((event['tokens'], event['lines'], event['errors']), (12, 3, []))
+
+    def test_added_and_removed(self):
+        """Testa arquivos e diretórios criados e removidos"""
+        import shutil
+        self.events()
+        self.write(os.path.join('novo', 'd.txt'), 'w = 3;\n')
+        self.assertIn(('added', 'd.txt'), self.events())
+        shutil.rmtree(os.path.join(self.root, 'sub'))
+        events = self.events()
+        self.assertIn(('removed', 'b.txt'), events)
+        self.assertEqual(events[('summary', '')]['files'], 2)
+
+    def test_recent_files_are_rechecked(self):
+        """Testa que um arquivo recém-modificado é comparado de novo no ciclo seguinte"""
+        self.events()
+        path = self.write('a.txt', 'int y = 1;\n', mtime=None)
+        self.assertIn(('changed', 'a.txt'), self.events())
+        self.checked.clear()
+        # Mesmo tamanho e, possivelmente, a mesma data
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('int y = @;\n')
+        self.assertIn(('changed', 'a.txt'), self.events())
+        self.assertEqual(self.checked, ['a.txt'])
+
+
+class TestEventBroadcaster(unittest.TestCase):
+    """Testes para o envio de eventos por socket Unix"""
+
+    def test_snapshot_and_events(self):
+        """Testa que um cliente recebe o estado atual e depois os eventos"""
+        with tempfile.TemporaryDirectory() as tmp:
+            socket_path = os.path.join(tmp, 'watch.sock')
+            broadcaster = EventBroadcaster(socket_path)
+            try:
+                client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                client.settimeout(5)
+                client.connect(socket_path)
+                broadcaster.accept([{'event': 'summary', 'files': 0}])
+                broadcaster.send([{'event': 'removed', 'path': 'x'}])
+                stream = client.makefile('rb')
+                messages = []
+                for _ in range(2):
+                    size, = struct.unpack('>I', stream.read(4))
+                    messages.append(decode_body(stream.read(size)))
+                stream.close()
+                client.close()
+            finally:
+                broadcaster.close()
+            self.assertFalse(os.path.exists(socket_path))
+        self.assertEqual([m['event'] for m in messages], ['summary', 'removed'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)